@@ -1,5 +1,4 @@
 import csv
-from datetime import timedelta
 from decimal import Decimal
 
 from django.contrib import admin
@@ -8,19 +7,24 @@ from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.http import HttpResponse
-from django.db.models import Sum, F, FloatField
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
 
 from products.models import Product, Category, Promotion, ProductImage
 from orders.models import Order, OrderItem, Coupon, DeliveryOption
+from orders import rollups
 from users.models import Profile, Wishlist, Address, Review, ReviewVote, Notification
 from payments.models import Payment, PaymentMethod, MobileMoneyProvider, SavedPaymentMethod
+from core import jobs, timeseries
+from core.models import Job
 
 User = get_user_model()
 
+ADMIN_STATS_CACHE_SECONDS = getattr(settings, "ADMIN_STATS_CACHE_SECONDS", 60)
+
 
 # ========================
 # MAIN ADMIN SITE (STAFF/SUPERUSER)
@@ -32,60 +36,52 @@ class StyleBazaarAdminSite(admin.AdminSite):
 
     def index(self, request, extra_context=None):
         extra_context = extra_context or {}
-        now = timezone.now()
-        twelve_months_ago = now - timedelta(days=365)
-
-        # Stats
-        total_users = User.objects.count()
-        total_sellers = User.objects.filter(role='seller').count()
-        total_products = Product.objects.count()
-        pending_products = Product.objects.filter(is_approved=False).count()
-        total_orders = Order.objects.count()
-        paid_orders = Order.objects.filter(is_paid=True).count()
-
-        # Revenue
-        revenue_agg = OrderItem.objects.filter(order__is_paid=True).aggregate(
-            total=Sum(F('price') * F('quantity'), output_field=FloatField())
-        )
-        total_revenue = revenue_agg['total'] or 0
 
-        # Recent Orders
-        recent_orders = Order.objects.select_related('buyer').order_by('-created_at')[:10]
+        # KPIs and chart are cached briefly; recent orders stay live
+        extra_context.update(cache.get_or_set("admin:index:stats", self.dashboard_stats, ADMIN_STATS_CACHE_SECONDS))
+        extra_context['recent_orders'] = Order.objects.select_related('buyer').order_by('-created_at')[:10]
 
-        # Monthly Revenue Chart Data
-        monthly_revenue = OrderItem.objects.filter(
-            order__is_paid=True,
-            order__created_at__gte=twelve_months_ago
-        ).annotate(
-            month=TruncMonth('order__created_at')
-        ).values('month').annotate(
-            revenue=Sum(F('price') * F('quantity'), output_field=FloatField())
-        ).order_by('month')
+        return super().index(request, extra_context)
 
-        monthly_labels = []
-        monthly_data = []
-        current = twelve_months_ago.replace(day=1)
-        for _ in range(12):
-            month_str = current.strftime('%b %Y')
-            monthly_labels.append(month_str)
-            found = next((item for item in monthly_revenue if item['month'].strftime('%b %Y') == month_str), None)
-            monthly_data.append(float(found['revenue'] or 0) if found else 0.0)
-            current = (current + timedelta(days=32)).replace(day=1)
+    def dashboard_stats(self):
+        # One conditional aggregate per table
+        users = User.objects.aggregate(
+            total=Count('id'),
+            sellers=Count('id', filter=Q(role='seller')),
+        )
+        products = Product.objects.aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(is_approved=False)),
+        )
+        orders = Order.objects.aggregate(
+            total=Count('id'),
+            paid=Count('id', filter=Q(is_paid=True)),
+            revenue=Sum('items_total', filter=Q(is_paid=True)),
+        )
 
-        extra_context.update({
-            'total_users': total_users,
-            'total_sellers': total_sellers,
-            'total_products': total_products,
-            'pending_approval': pending_products,
-            'total_orders': total_orders,
-            'paid_orders': paid_orders,
-            'total_revenue': total_revenue,
-            'recent_orders': recent_orders,
+        # Monthly Revenue Chart Data (last 12 months, this one included)
+        chart_start = timeseries.last_months(12)
+        monthly_revenue = Order.objects.filter(
+            is_paid=True,
+            created_at__gte=timeseries.aware_start(chart_start)
+        ).annotate(
+            month=TruncMonth('created_at')
+        ).values_list('month').annotate(
+            revenue=Sum('items_total')
+        ).order_by('month')
+        monthly_labels, monthly_data = timeseries.monthly_series(monthly_revenue, chart_start)
+
+        return {
+            'total_users': users['total'],
+            'total_sellers': users['sellers'],
+            'total_products': products['total'],
+            'pending_approval': products['pending'],
+            'total_orders': orders['total'],
+            'paid_orders': orders['paid'],
+            'total_revenue': float(orders['revenue'] or 0),
             'monthly_labels': monthly_labels,
             'monthly_data': monthly_data,
-        })
-
-        return super().index(request, extra_context)
+        }
 
 
 admin_site = StyleBazaarAdminSite(name='main_admin')
@@ -111,15 +107,11 @@ class SellerAdminSite(admin.AdminSite):
         active_products = Product.objects.filter(seller=seller, is_active=True, is_approved=True).count()
         pending_approval = Product.objects.filter(seller=seller, is_approved=False).count()
 
-        revenue_agg = OrderItem.objects.filter(
-            product__seller=seller,
-            order__is_paid=True
-        ).aggregate(total=Sum(F('price') * F('quantity')))
-        total_earnings = revenue_agg['total'] or 0
+        total_earnings = rollups.seller_totals(seller)['revenue']
 
         recent_orders = Order.objects.filter(
-            items__product__seller=seller
-        ).select_related('buyer').distinct().order_by('-created_at')[:10]
+            id__in=OrderItem.objects.filter(product__seller=seller).values('order_id')
+        ).select_related('buyer').order_by('-created_at')[:10]
 
         extra_context.update({
             'products_count': products_count,
@@ -178,6 +170,7 @@ class ProductAdmin(admin.ModelAdmin):
     inlines = [ProductImageInline]
     readonly_fields = ('created_at', 'updated_at')
     actions = ['approve_products', 'reject_products']
+    list_select_related = ('seller', 'category', 'promotion')
 
     def seller_link(self, obj):
         if not obj.seller:
@@ -206,25 +199,21 @@ class ProductAdmin(admin.ModelAdmin):
     approval_status.short_description = "Status"
 
     def approve_products(self, request, queryset):
-        updated = 0
-        for product in queryset.filter(is_approved=False):
-            product.is_approved = True
-            product.is_active = True
-            product.save(update_fields=['is_approved', 'is_active'])
-            updated += 1
-
-            send_mail(
-                subject="🎉 Your product has been approved!",
-                message=f"Great news! Your product '{product.name}' is now live.",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[product.seller.email],
-                fail_silently=False,
-            )
-        self.message_user(request, f"{updated} product(s) approved and notified.")
+        # One UPDATE for the whole selection, stamped so the sellers' digest
+        # job can find this batch; the job builds and queues the emails
+        approved_at = timezone.now()
+        updated = queryset.filter(is_approved=False).update(
+            is_approved=True, is_active=True, approved_at=approved_at, updated_at=approved_at
+        )
+        if updated:
+            jobs.enqueue("approval_digest", {"approved_at": approved_at.isoformat()})
+        self.message_user(request, f"{updated} product(s) approved; seller digests queued.")
     approve_products.short_description = "Approve & notify"
 
     def reject_products(self, request, queryset):
-        updated = queryset.filter(is_approved=False).update(is_approved=False, is_active=False)
+        updated = queryset.filter(is_approved=False).update(
+            is_approved=False, is_active=False, updated_at=timezone.now()
+        )
         self.message_user(request, f"{updated} product(s) rejected.")
     reject_products.short_description = "Reject products"
 
@@ -246,6 +235,21 @@ admin_site.register(SavedPaymentMethod)
 admin_site.register(DeliveryOption)
 
 
+@admin.register(Job, site=admin_site)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('created_at', 'finished_at', 'claimed_at', 'claim', 'last_error')
+    actions = ['retry_jobs']
+
+    def retry_jobs(self, request, queryset):
+        updated = queryset.filter(status=Job.FAILED).update(
+            status=Job.QUEUED, attempts=0, run_after=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f"{updated} job(s) queued again.")
+    retry_jobs.short_description = "Retry failed jobs"
+
+
 # ========================
 # SELLER ADMIN REGISTRATIONS
 # ========================
@@ -256,6 +260,7 @@ class SellerProductAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     inlines = [ProductImageInline]
     readonly_fields = ('created_at', 'updated_at')
+    list_select_related = ('category', 'promotion')
 
     def get_queryset(self, request):
         return super().get_queryset(request).filter(seller=request.user)
@@ -299,6 +304,7 @@ class SellerOrderAdmin(admin.ModelAdmin):
         total = obj.get_grand_total()
         return mark_safe(f'<strong class="text-2xl">K{total:.2f}</strong>')
     grand_total_display.short_description = "Total"
+    grand_total_display.admin_order_field = 'grand_total'
 
     def status_display(self, obj):
         status_text = obj.get_status_display().upper()
@@ -1,20 +1,190 @@
+from datetime import timedelta
 from decimal import Decimal
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
 from products.models import Product
-from orders.models import Coupon  # Optional: for future coupon support
+from products.pricing import resolve_prices
+from orders.models import Coupon
+from .models import CartLine
 
 
-class Cart:
+CART_SESSION_KEY = "cart"          # pre-CartLine session carts, imported on first use
+TOKEN_SESSION_KEY = "cart_token"   # owner of an anonymous cart
+# Cart writes delete the summary; that only reaches other workers through a shared cache
+SUMMARY_CACHE_SECONDS = 60 * 60 if getattr(settings, "CACHE_IS_SHARED", False) else 30
+ANONYMOUS_CART_DAYS = getattr(settings, "ANONYMOUS_CART_DAYS", 30)
+
+
+def cart_owner(request):
+    """CartLine filter for this request's cart, or None if there is no cart yet"""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return {"user_id": user.pk}
+    token = request.session.get(TOKEN_SESSION_KEY)
+    if token:
+        return {"cart_token": token}
+    return None
+
+
+def _summary_key(owner):
+    if "user_id" in owner:
+        return f"cart-summary:u{owner['user_id']}"
+    return f"cart-summary:t{owner['cart_token']}"
+
+
+def _summarize_session_cart(cart_data):
+    count = 0
+    subtotal = Decimal("0")
+    for item in cart_data.values():
+        count += item["quantity"]
+        subtotal += Decimal(item["price"]) * item["quantity"]
+    return {"count": count, "subtotal": str(subtotal.quantize(Decimal("0.01")))}
+
+
+class CartSummary:
+    """
+    Cheap view of the cart for the header badge: item count + subtotal at
+    the prices stored when added. Cached per cart owner and dropped on
+    every mutation; a miss costs one aggregate query. Built lazily by
+    cart.context_processors.cart.
+    """
+
     def __init__(self, request):
-        self.session = request.session
-        cart = self.session.get("cart")
+        self.count = 0
+        self.subtotal = Decimal("0")
 
-        if not cart:
-            cart = self.session["cart"] = {}
+        legacy = request.session.get(CART_SESSION_KEY)
+        if legacy:
+            summary = _summarize_session_cart(legacy)
+        else:
+            owner = cart_owner(request)
+            if owner is None:
+                return
+            key = _summary_key(owner)
+            summary = cache.get(key)
+            if summary is None:
+                totals = CartLine.objects.filter(**owner).aggregate(
+                    count=Sum("quantity"),
+                    subtotal=Sum(ExpressionWrapper(
+                        F("quantity") * F("price"),
+                        output_field=DecimalField(max_digits=14, decimal_places=2),
+                    )),
+                )
+                summary = {
+                    "count": totals["count"] or 0,
+                    "subtotal": str(totals["subtotal"] or Decimal("0")),
+                }
+                cache.set(key, summary, SUMMARY_CACHE_SECONDS)
+
+        self.count = summary["count"]
+        self.subtotal = Decimal(summary["subtotal"])
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+
+def merge_anonymous_cart(session, user):
+    """
+    Move the anonymous cart (session token) into `user`'s cart, adding
+    quantities for products already there. Called on login.
+    """
+    token = session.pop(TOKEN_SESSION_KEY, None)
+    if not token:
+        return 0
+
+    anonymous = list(CartLine.objects.filter(cart_token=token))
+    if not anonymous:
+        return 0
+
+    existing = {
+        line.product_id: line
+        for line in CartLine.objects.filter(user=user, product_id__in=[line.product_id for line in anonymous])
+    }
+    now = timezone.now()
+    merged, absorbed = [], []
+    for line in anonymous:
+        target = existing.get(line.product_id)
+        if target is not None:
+            target.quantity += line.quantity
+            target.updated_at = now
+            merged.append(target)
+            absorbed.append(line.pk)
+
+    with transaction.atomic():
+        if merged:
+            CartLine.objects.bulk_update(merged, ["quantity", "updated_at"])
+            CartLine.objects.filter(pk__in=absorbed).delete()
+        CartLine.objects.filter(cart_token=token).update(user=user, cart_token=None, updated_at=now)
+
+    cache.delete_many([_summary_key({"user_id": user.pk}), _summary_key({"cart_token": token})])
+    return len(anonymous)
+
+
+class Cart:
+    """
+    Database-backed cart (CartLine rows). All lines are read in one indexed
+    query with their products (plus images and live promotions), and line
+    items / totals are memoized until the cart is mutated. Mutations are
+    row-level upserts; the session is only written to create an anonymous
+    cart token or to drop a coupon.
+    """
 
-        self.cart = cart
+    def __init__(self, request):
+        self.session = request.session
+        self.owner = cart_owner(request)
 
         # Coupon support
         self.coupon_id = self.session.get("coupon_id")
+        self._coupon = None
+        self._coupon_loaded = False
+        self._invalidate()
+
+        legacy = self.session.get(CART_SESSION_KEY)
+        if legacy is not None:
+            self._import_session_cart(legacy)
+
+    def _invalidate(self):
+        self._rows = None
+        self._lines = None
+        self._subtotal = None
+
+    def _changed(self):
+        self._invalidate()
+        cache.delete(_summary_key(self.owner))
+
+    def _ensure_owner(self):
+        if self.owner is None:
+            token = uuid.uuid4().hex
+            self.session[TOKEN_SESSION_KEY] = token
+            self.owner = {"cart_token": token}
+        return self.owner
+
+    def _import_session_cart(self, data):
+        """One-off move of a pre-CartLine session cart into the table"""
+        del self.session[CART_SESSION_KEY]
+        self.session.pop("cart_summary", None)
+        if not data:
+            return
+        owner = self._ensure_owner()
+        valid_ids = set(Product.objects.filter(id__in=data.keys()).values_list("id", flat=True))
+        CartLine.objects.bulk_create(
+            [
+                CartLine(product_id=int(product_id), quantity=item["quantity"], price=Decimal(item["price"]), **owner)
+                for product_id, item in data.items()
+                if int(product_id) in valid_ids and item["quantity"] > 0
+            ],
+            ignore_conflicts=True,
+        )
+        self._changed()
 
     # -------------------------
     # ADD PRODUCT
@@ -24,106 +194,119 @@ class Cart:
         Add a product to the cart.
         - If price is provided, use it (e.g., snapshot at add time)
         - Otherwise, use product's current_price at the moment of adding
+        A quantity that would drop to 0 or below removes the line.
         """
-        product_id = str(product.id)
+        owner = self._ensure_owner()
         price_to_use = Decimal(price) if price is not None else product.current_price
-
-        if product_id not in self.cart:
-            self.cart[product_id] = {
-                "quantity": 0,
-                "price": str(price_to_use),  # Store as string for session safety
-            }
+        line = CartLine.objects.filter(product=product, **owner)
+        now = timezone.now()
 
         if override_quantity:
-            self.cart[product_id]["quantity"] = quantity
-        else:
-            self.cart[product_id]["quantity"] += quantity
-
-        # Remove if quantity drops to 0 or below
-        if self.cart[product_id]["quantity"] <= 0:
-            self.remove(product)
-
-        self.save()
+            if quantity > 0:
+                CartLine.objects.update_or_create(
+                    product=product, **owner,
+                    defaults={"quantity": quantity, "price": price_to_use},
+                )
+            else:
+                line.delete()
+        elif quantity > 0:
+            if not line.update(quantity=F("quantity") + quantity, updated_at=now):
+                try:
+                    with transaction.atomic():
+                        CartLine.objects.create(product=product, quantity=quantity, price=price_to_use, **owner)
+                except IntegrityError:
+                    # Created concurrently (double-click) — add to it instead
+                    line.update(quantity=F("quantity") + quantity, updated_at=now)
+        elif quantity < 0:
+            if not line.filter(quantity__gt=-quantity).update(quantity=F("quantity") + quantity, updated_at=now):
+                line.delete()
+
+        self._changed()
 
     # -------------------------
-    # SAVE SESSION
+    # SAVE
     # -------------------------
     def save(self):
-        self.session.modified = True
+        """Kept for callers of the session cart; lines are written as they change"""
+        self._changed()
 
     # -------------------------
     # REMOVE PRODUCT
     # -------------------------
     def remove(self, product):
-        product_id = str(product.id)
-        if product_id in self.cart:
-            del self.cart[product_id]
-            self.save()
+        if self.owner is None:
+            return
+        CartLine.objects.filter(product=product, **self.owner).delete()
+        self._changed()
 
     # -------------------------
-    # ITERATE CART (SAFE & UP-TO-DATE)
+    # LINE ITEMS (SAFE & UP-TO-DATE)
     # -------------------------
-    def __iter__(self):
-        """
-        Yield cart items with fresh product data and current pricing.
-        Uses Product.current_price → always correct (promotion, manual discount, or regular).
-        """
-        product_ids = self.cart.keys()
-        if not product_ids:
-            return
-
-        # Fetch products efficiently (no need for select_related("promotion"))
-        products = Product.objects.filter(id__in=product_ids).prefetch_related("images")
-
-        products_dict = {str(p.id): p for p in products}
-
-        for item in self.cart.values():
-            product_id_str = item.get("product_id") or list(self.cart.keys())[list(self.cart.values()).index(item)]
-            product = products_dict.get(product_id_str)
-
-            if product:
-                # Attach full product object
-                item["product"] = product
-
-                # Current unit price (refreshed every time cart is viewed)
-                current_unit_price = product.current_price
-
-                # Stored price when item was added (for reference)
-                stored_price = Decimal(item["price"])
-
-                item["unit_price"] = float(current_unit_price)
-                item["total_price"] = float(current_unit_price * item["quantity"])
+    def _load_rows(self):
+        if self._rows is None:
+            if self.owner is None:
+                self._rows = []
+            else:
+                self._rows = list(
+                    CartLine.objects
+                    .filter(**self.owner)
+                    .select_related("product", "product__seller")
+                    .prefetch_related("product__images")
+                )
+        return self._rows
 
-                # Useful flags for template
-                item["has_active_promotion"] = product.has_active_promotion
-                item["active_promotion"] = product.active_promotion  # Safe: returns None if no active promo
-                item["original_price"] = float(product.price) if product.price > current_unit_price else None
+    @property
+    def cart(self):
+        """{product_id: {"quantity", "price"}} — same shape as the old session cart"""
+        return {
+            str(row.product_id): {"quantity": row.quantity, "price": str(row.price)}
+            for row in self._load_rows()
+        }
+
+    def _load_lines(self):
+        """Line items with fresh product data and current pricing"""
+        rows = self._load_rows()
+        resolve_prices([row.product for row in rows])
+
+        lines = []
+        for row in rows:
+            product = row.product
+            unit_price = product.current_price
+            lines.append({
+                "product_id": product.id,
+                "product": product,
+                "quantity": row.quantity,
+                "price": row.price,  # stored when added
+                "unit_price": unit_price,
+                "total_price": unit_price * row.quantity,
+                "has_active_promotion": product.has_active_promotion,
+                "active_promotion": product.active_promotion,
+                "original_price": product.price if product.price > unit_price else None,
+            })
+        return lines
 
-            else:
-                # Product no longer exists — fallback to stored data
-                stored_price = Decimal(item["price"])
-                item["unit_price"] = float(stored_price)
-                item["total_price"] = float(stored_price * item["quantity"])
-                item["has_active_promotion"] = False
-                item["active_promotion"] = None
-                item["original_price"] = None
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = self._load_lines()
+        return self._lines
 
-            yield item
+    def __iter__(self):
+        return iter(self.lines)
 
     # -------------------------
     # CART LENGTH
     # -------------------------
     def __len__(self):
-        return sum(item["quantity"] for item in self.cart.values())
+        return sum(row.quantity for row in self._load_rows())
 
     # -------------------------
     # SUBTOTAL (based on current prices)
     # -------------------------
     def get_subtotal(self):
-        return sum(
-            Decimal(item["unit_price"]) * item["quantity"]
-            for item in self
-        )
+        if self._subtotal is None:
+            self._subtotal = sum((item["total_price"] for item in self.lines), Decimal("0"))
+        return self._subtotal
 
     # -------------------------
     # TOTAL PRICE (after coupon)
@@ -137,34 +320,41 @@ class Cart:
     # CLEAR CART
     # -------------------------
     def clear(self):
-        self.session["cart"] = {}
+        if self.owner is not None:
+            CartLine.objects.filter(**self.owner).delete()
+            self._changed()
         if "coupon_id" in self.session:
             del self.session["coupon_id"]
-        self.save()
+        self.coupon_id = None
+        self._coupon, self._coupon_loaded = None, True
 
     # -------------------------
     # COUPON SUPPORT
     # -------------------------
     @property
     def coupon(self):
-        if self.coupon_id:
-            try:
-                return Coupon.objects.get(id=self.coupon_id)
-            except Coupon.DoesNotExist:
-                self.coupon_id = None
-                self.save()
-        return None
+        if not self._coupon_loaded:
+            self._coupon_loaded = True
+            self._coupon = None
+            if self.coupon_id:
+                self._coupon = Coupon.objects.filter(id=self.coupon_id).first()
+                if self._coupon is None:
+                    self.coupon_id = None
+                    self.session.pop("coupon_id", None)
+        return self._coupon
 
     def apply_coupon(self, coupon):
         if coupon and getattr(coupon, "is_valid", lambda: True)():
             self.coupon_id = coupon.id
-            self.save()
+            self.session["coupon_id"] = coupon.id
+            self._coupon, self._coupon_loaded = coupon, True
             return True
         return False
 
     def get_discount(self):
-        if self.coupon:
-            discount_percent = Decimal(getattr(self.coupon, "discount_percent", 0))
+        coupon = self.coupon
+        if coupon:
+            discount_percent = Decimal(getattr(coupon, "discount_percent", 0))
             return (self.get_subtotal() * discount_percent) / Decimal("100")
         return Decimal("0")
 
@@ -175,7 +365,27 @@ class Cart:
     # HELPER: Get single item
     # -------------------------
     def get_item(self, product_id):
-        product_id_str = str(product_id)
-        if product_id_str in self.cart:
-            return self.cart[product_id_str]
-        return None
\ No newline at end of file
+        product_id = int(product_id)
+        for row in self._load_rows():
+            if row.product_id == product_id:
+                return {"quantity": row.quantity, "price": str(row.price)}
+        return None
+
+
+# -------------------------
+# HOUSEKEEPING
+# -------------------------
+def purge_anonymous_carts(older_than_days=ANONYMOUS_CART_DAYS):
+    """
+    Delete guest carts (cart_token lines) none of whose lines changed in
+    `older_than_days`. A cart with one recent line is kept whole.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    recent = CartLine.objects.filter(cart_token__isnull=False, updated_at__gte=cutoff).values("cart_token")
+    deleted, _ = (
+        CartLine.objects
+        .filter(cart_token__isnull=False, updated_at__lt=cutoff)
+        .exclude(cart_token__in=recent)
+        .delete()
+    )
+    return deleted
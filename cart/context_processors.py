@@ -1,4 +1,8 @@
-from .utils import Cart
+from django.utils.functional import SimpleLazyObject
+
+from .cart import CartSummary
+
 
 def cart(request):
-    return {"cart": Cart(request)}
+    # Lazy: pages that never render the cart badge do no cart work at all
+    return {"cart": SimpleLazyObject(lambda: CartSummary(request))}
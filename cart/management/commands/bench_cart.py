@@ -0,0 +1,104 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from cart.cart import TOKEN_SESSION_KEY, Cart
+from cart.models import CartLine
+from orders.models import Coupon
+from products.models import Promotion
+from products.testdata import create_catalog, store_effective_prices
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark a cart page's worth of Cart work (iterate lines, subtotal, "
+        "discount, total) for several cart sizes. Test data is created inside "
+        "a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1, 20, 200])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = options["sizes"]
+        try:
+            with transaction.atomic():
+                products, coupon = self._fixtures(max(sizes))
+                self.stdout.write(f"{'lines':>6} {'queries':>8} {'median ms':>10} {'max ms':>8}")
+                for size in sizes:
+                    queries, timings = self._run(products[:size], coupon, options["repeat"])
+                    self.stdout.write(
+                        f"{size:>6} {queries:>8} {statistics.median(timings):>10.2f} {max(timings):>8.2f}"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _fixtures(self, count):
+        tag = uuid.uuid4().hex[:8]
+        _seller, _category, products = create_catalog(f"bench-{tag}", count, price=Decimal("100.00"))
+
+        today = timezone.localdate()
+        Promotion.objects.bulk_create([
+            Promotion(
+                product=product,
+                discount_type="percentage",
+                discount_value=Decimal("10"),
+                start_date=today - timedelta(days=1),
+            )
+            for product in products[::2]
+        ])
+        # bulk_create skips Promotion.save(), which keeps the stored price in sync
+        store_effective_prices(products)
+        coupon = Coupon.objects.create(code=f"BENCH{tag}", discount_percent=10)
+        return products, coupon
+
+    def _request(self, token, coupon):
+        request = RequestFactory().get("/cart/")
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+        request.session[TOKEN_SESSION_KEY] = token
+        request.session["coupon_id"] = coupon.id
+        return request
+
+    def _page(self, request):
+        """What the cart page and checkout do with a cart"""
+        cart = Cart(request)
+        for item in cart:
+            item["total_price"]
+        len(cart)
+        cart.get_subtotal()
+        cart.get_discount()
+        cart.get_total_price()
+
+    def _run(self, products, coupon, repeat):
+        token = uuid.uuid4().hex
+        CartLine.objects.bulk_create([
+            CartLine(cart_token=token, product=product, quantity=2, price=product.price)
+            for product in products
+        ])
+
+        timings = []
+        queries = 0
+        for _ in range(max(repeat, 1)):
+            request = self._request(token, coupon)
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                self._page(request)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(ctx.captured_queries)
+        return queries, timings
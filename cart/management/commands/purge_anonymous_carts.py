@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from cart.cart import ANONYMOUS_CART_DAYS, purge_anonymous_carts
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned guest carts (no change in --days days). Run daily."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=ANONYMOUS_CART_DAYS)
+
+    def handle(self, *args, **options):
+        deleted = purge_anonymous_carts(options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} abandoned guest cart line(s)."))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0007_product_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cart_token', models.CharField(blank=True, max_length=32, null=True)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('price', models.DecimalField(decimal_places=2, help_text='Unit price when the product was added', max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_lines', to='products.product')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cart_lines', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='cart_cartli_user_id_299e0c_idx'), models.Index(fields=['cart_token', 'created_at'], name='cart_cartli_cart_to_3e99d0_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cartline',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('user', 'product'), name='cartline_unique_user_product'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartline',
+            constraint=models.UniqueConstraint(condition=models.Q(('cart_token__isnull', False)), fields=('cart_token', 'product'), name='cartline_unique_token_product'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartline',
+            constraint=models.CheckConstraint(check=models.Q(('user__isnull', False), ('cart_token__isnull', False), _connector='OR'), name='cartline_has_owner'),
+        ),
+    ]
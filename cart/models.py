@@ -1,3 +1,64 @@
 from django.db import models
+from django.conf import settings
+from django.db.models import Q
 
-# Create your models here.
+from products.models import Product
+
+
+class CartLine(models.Model):
+    """
+    One product in a cart. Owned by a user, or — before login — by an
+    anonymous cart token kept in the session (it survives the session key
+    rotation on login, when the lines are merged into the user's cart).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="cart_lines"
+    )
+    cart_token = models.CharField(max_length=32, null=True, blank=True)
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="cart_lines"
+    )
+    quantity = models.PositiveIntegerField(default=1)
+    price = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        help_text="Unit price when the product was added"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "product"],
+                condition=Q(user__isnull=False),
+                name="cartline_unique_user_product",
+            ),
+            models.UniqueConstraint(
+                fields=["cart_token", "product"],
+                condition=Q(cart_token__isnull=False),
+                name="cartline_unique_token_product",
+            ),
+            models.CheckConstraint(
+                check=Q(user__isnull=False) | Q(cart_token__isnull=False),
+                name="cartline_has_owner",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "created_at"]),
+            models.Index(fields=["cart_token", "created_at"]),
+        ]
+
+    def __str__(self):
+        owner = self.user_id or self.cart_token
+        return f"{self.quantity} × product #{self.product_id} (cart {owner})"
@@ -13,15 +13,9 @@ from .cart import Cart
 
 def cart_detail(request):
     """Display the current cart contents with up-to-date prices"""
+    # Line items already carry current prices (promotion started/ended/changed)
     cart = Cart(request)
 
-    # Update each item's price to reflect current product price (in case promotion started/ended/changed)
-    for item in cart:
-        item.update({
-            'unit_price': item['product'].current_price,
-            'total_price': item['product'].current_price * item['quantity']
-        })
-
     return render(request, "cart/cart_detail.html", {"cart": cart})
 
 
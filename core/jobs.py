@@ -0,0 +1,200 @@
+# core/jobs.py
+"""
+Database-backed job queue.
+
+Request code enqueues jobs (rows in core.Job) inside its own
+transaction, so work is only queued if the change it belongs to commits,
+and returns at once. `manage.py run_jobs` claims due jobs in batches,
+hands each kind's batch to its handler in one call (emails share one
+SMTP connection), and retries failures with exponential backoff until
+max_attempts.
+
+Handlers are registered with @handler("kind") in an app's `jobs` module;
+the worker imports every installed app's `jobs` module on start.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, "JOBS_BATCH_SIZE", 100)
+RETRY_BASE_SECONDS = getattr(settings, "JOBS_RETRY_BASE_SECONDS", 30)
+RETRY_MAX_SECONDS = getattr(settings, "JOBS_RETRY_MAX_SECONDS", 60 * 60)
+CLAIM_TIMEOUT_SECONDS = getattr(settings, "JOBS_CLAIM_TIMEOUT_SECONDS", 10 * 60)
+
+_handlers = {}
+
+
+def handler(kind):
+    """
+    Register `func(payloads)` for jobs of `kind`. It gets a list of
+    payloads and returns a list of the same length: None for each job
+    that succeeded, or the exception that made it fail.
+    """
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+# -------------------------
+# ENQUEUEING
+# -------------------------
+def enqueue(kind, payload, run_after=None, max_attempts=5):
+    return Job.objects.create(
+        kind=kind,
+        payload=payload,
+        run_after=run_after or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_many(kind, payloads, run_after=None, max_attempts=5):
+    """Queue one job per payload with a single INSERT"""
+    run_after = run_after or timezone.now()
+    return Job.objects.bulk_create([
+        Job(kind=kind, payload=payload, run_after=run_after, max_attempts=max_attempts)
+        for payload in payloads
+    ])
+
+
+def email_payload(subject, message, recipient_list, from_email=None, html_message=None):
+    return {
+        "subject": subject,
+        "message": message,
+        "from_email": from_email or settings.DEFAULT_FROM_EMAIL,
+        "recipient_list": list(recipient_list),
+        "html_message": html_message,
+    }
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None, html_message=None):
+    """Queued replacement for send_mail() — same arguments"""
+    return enqueue("email", email_payload(subject, message, recipient_list, from_email, html_message))
+
+
+def enqueue_emails(payloads):
+    """Queue many email_payload() dicts with one INSERT"""
+    return enqueue_many("email", [payload for payload in payloads if payload["recipient_list"]])
+
+
+# -------------------------
+# HANDLERS
+# -------------------------
+@handler("email")
+def send_emails(payloads):
+    """Send the whole batch over one SMTP connection"""
+    try:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+    except Exception as exc:
+        return [exc] * len(payloads)
+
+    errors = []
+    try:
+        for payload in payloads:
+            message = EmailMultiAlternatives(
+                subject=payload["subject"],
+                body=payload["message"],
+                from_email=payload.get("from_email") or settings.DEFAULT_FROM_EMAIL,
+                to=payload["recipient_list"],
+                connection=connection,
+            )
+            if payload.get("html_message"):
+                message.attach_alternative(payload["html_message"], "text/html")
+            try:
+                connection.send_messages([message])
+                errors.append(None)
+            except Exception as exc:
+                errors.append(exc)
+    finally:
+        connection.close()
+    return errors
+
+
+# -------------------------
+# WORKER
+# -------------------------
+def claim_batch(limit=BATCH_SIZE, kinds=None):
+    """
+    Claim up to `limit` due jobs for this worker with one conditional
+    UPDATE (safe with several workers) and return them. Jobs whose worker
+    died mid-run are claimed again after CLAIM_TIMEOUT_SECONDS.
+    """
+    now = timezone.now()
+    due = Q(status=Job.QUEUED, run_after__lte=now) | Q(
+        status=Job.RUNNING, claimed_at__lt=now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)
+    )
+    candidates = Job.objects.filter(due)
+    if kinds:
+        candidates = candidates.filter(kind__in=kinds)
+    ids = list(candidates.order_by("run_after", "id").values_list("id", flat=True)[:limit])
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    Job.objects.filter(Q(pk__in=ids) & due).update(
+        status=Job.RUNNING, claim=token, claimed_at=now, attempts=F("attempts") + 1
+    )
+    return list(Job.objects.filter(claim=token, status=Job.RUNNING))
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def run_batch(jobs):
+    """Run claimed jobs grouped by kind; returns (done, retried, failed) counts"""
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job.kind, []).append(job)
+
+    done, retry, failed = [], [], []
+    now = timezone.now()
+    for kind, batch in by_kind.items():
+        func = _handlers.get(kind)
+        if func is None:
+            errors = [LookupError(f"No handler for job kind {kind!r}")] * len(batch)
+        else:
+            try:
+                errors = func([job.payload for job in batch])
+            except Exception as exc:
+                errors = [exc] * len(batch)
+
+        for job, error in zip(batch, errors):
+            if error is None:
+                done.append(job.pk)
+                continue
+            job.last_error = f"{type(error).__name__}: {error}"[:2000]
+            job.claim = ""
+            if job.attempts >= job.max_attempts:
+                job.status = Job.FAILED
+                job.finished_at = now
+                failed.append(job)
+                logger.error("Job %s (%s) failed for good: %s", job.pk, kind, job.last_error)
+            else:
+                job.status = Job.QUEUED
+                job.run_after = now + retry_delay(job.attempts)
+                retry.append(job)
+
+    if done:
+        Job.objects.filter(pk__in=done).update(status=Job.DONE, finished_at=now, claim="", last_error="")
+    if retry or failed:
+        Job.objects.bulk_update(retry + failed, ["status", "run_after", "finished_at", "last_error", "claim"])
+    return len(done), len(retry), len(failed)
+
+
+def purge_finished(older_than_days=7):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.module_loading import autodiscover_modules
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (outbound email etc.). Keeps polling "
+        "unless --once is given; run one or more of these next to the web "
+        "workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the due jobs and exit.")
+        parser.add_argument("--batch-size", type=int, default=jobs.BATCH_SIZE)
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds between polls when idle.")
+        parser.add_argument("--kind", action="append", dest="kinds", help="Only run jobs of this kind (repeatable).")
+        parser.add_argument("--purge-days", type=int, default=7, help="Delete finished jobs older than this.")
+
+    def handle(self, *args, **options):
+        autodiscover_modules("jobs")  # handlers live in each app's jobs module
+        jobs.purge_finished(options["purge_days"])
+
+        while True:
+            close_old_connections()
+            batch = jobs.claim_batch(options["batch_size"], options["kinds"])
+            if batch:
+                done, retried, failed = jobs.run_batch(batch)
+                self.stdout.write(f"{len(batch)} job(s): {done} done, {retried} to retry, {failed} failed")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
@@ -0,0 +1,62 @@
+# core/timeseries.py
+"""
+Monthly series for the dashboard charts.
+
+Callers run one grouped query (TruncMonth + an aggregate) and pass the
+(month, value) rows to monthly_series(), which fills the months without
+data with zeros using a dict lookup. Months are stepped by calendar
+arithmetic, so none are skipped or repeated.
+"""
+
+from datetime import date, datetime, time
+
+from django.utils import timezone
+
+
+LABEL_FORMAT = "%b %Y"
+
+
+def month_start(value):
+    """First day of the (local) month containing a date or datetime"""
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def last_months(count, today=None):
+    """First day of the month `count - 1` months back, so the series ends with this month"""
+    return add_months(month_start(today or timezone.localdate()), -(count - 1))
+
+
+def aware_start(day):
+    """Local midnight of a date, for filtering DateTimeFields"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def months_between(start, end):
+    current, last = month_start(start), month_start(end)
+    months = []
+    while current <= last:
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+
+def monthly_series(rows, start, end=None, label_format=LABEL_FORMAT):
+    """
+    (labels, values) for every month from `start` to `end` (default: this
+    month). `rows` are (month, value) pairs; missing months are 0.0.
+    """
+    totals = {month_start(month): float(value or 0) for month, value in rows}
+    months = months_between(start, end or timezone.localdate())
+    return (
+        [month.strftime(label_format) for month in months],
+        [totals.get(month, 0.0) for month in months],
+    )
@@ -0,0 +1,157 @@
+# orders/exports.py
+"""
+Streaming CSV / XLSX downloads of a seller's sales.
+
+Each export is a header plus a row generator fed by `.iterator()`, so
+rows go from the database cursor to the response without the full result
+ever being held in memory. CSV is streamed as it's written. XLSX uses
+openpyxl's write-only workbook: rows are written to a temporary file,
+which is then streamed back.
+"""
+
+import csv
+import tempfile
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import DecimalField, F, Sum
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core import timeseries
+
+from . import rollups
+from .models import OrderItem
+
+
+EXPORT_CHUNK_SIZE = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+FORMATS = ("csv", "xlsx")
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# -------------------------
+# DATASETS
+# -------------------------
+def _seller_items(seller, start=None, end=None):
+    items = OrderItem.objects.filter(product__seller=seller, order__is_paid=True)
+    if start:
+        items = items.filter(order__created_at__gte=timeseries.aware_start(start))
+    if end:
+        items = items.filter(order__created_at__lt=timeseries.aware_start(end + timedelta(days=1)))
+    return items
+
+
+def transactions(seller, start=None, end=None):
+    """One row per paid order line"""
+    header = ["Order", "Date", "Status", "Buyer", "Product", "Quantity", "Unit price (ZMW)", "Total (ZMW)"]
+    rows = (
+        _seller_items(seller, start, end)
+        .order_by("-order__created_at", "-id")
+        .values_list(
+            "order_id", "order__created_at", "order__status", "order__full_name",
+            "product__name", "quantity", "price",
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return header, (
+        [order_id, created_at, status, buyer, product, quantity, price, price * quantity]
+        for order_id, created_at, status, buyer, product, quantity, price in rows
+    )
+
+
+def product_sales(seller, start=None, end=None):
+    """One row per product, from the daily rollups"""
+    header = ["Product", "Units sold", "Orders", "Revenue (ZMW)", "Last sale"]
+    rows = rollups.product_totals(seller, start, end).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return header, (
+        [row["product__name"], row["units"], row["orders"], row["revenue"], row["last_sale_at"]]
+        for row in rows
+    )
+
+
+def payouts(seller, start=None, end=None):
+    """One row per paid order: the seller's share of it"""
+    header = ["Order", "Date", "Status", "Buyer", "Amount (ZMW)"]
+    rows = (
+        _seller_items(seller, start, end)
+        .values("order_id", "order__created_at", "order__status", "order__full_name")
+        .annotate(amount=Sum(F("price") * F("quantity"), output_field=DecimalField(max_digits=14, decimal_places=2)))
+        .order_by("-order__created_at", "-order_id")
+        .values_list("order_id", "order__created_at", "order__status", "order__full_name", "amount")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return header, (list(row) for row in rows)
+
+
+DATASETS = {
+    "transactions": transactions,
+    "products": product_sales,
+    "payouts": payouts,
+}
+
+
+def date_range(params):
+    """(start, end) local dates from ?start_date=&end_date= (YYYY-MM-DD); bad or missing values are open"""
+    def parse(name):
+        try:
+            return parse_date(params.get(name) or "")
+        except ValueError:
+            return None
+    return parse("start_date"), parse("end_date")
+
+
+# -------------------------
+# WRITERS
+# -------------------------
+def _cell(value):
+    """Local naive datetimes, and text that a spreadsheet won't run as a formula"""
+    if isinstance(value, datetime):
+        return timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@"):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line straight back"""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(filename, header, rows):
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow([_cell(value) for value in row]) for row in _chain(header, rows))
+    response = StreamingHttpResponse(lines, content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(filename, header, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=filename[:31])
+    for row in _chain(header, rows):
+        sheet.append([_cell(value) for value in row])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=f"{filename}.xlsx", content_type=XLSX_CONTENT_TYPE)
+
+
+def _chain(header, rows):
+    yield header
+    yield from rows
+
+
+def export_response(dataset, seller, start=None, end=None, file_format="csv"):
+    """Download response for one of DATASETS in one of FORMATS"""
+    header, rows = DATASETS[dataset](seller, start, end)
+    filename = f"{dataset}-{timezone.localdate():%Y%m%d}"
+    if file_format == "xlsx":
+        return xlsx_response(filename, header, rows)
+    return csv_response(filename, header, rows)
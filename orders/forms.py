@@ -93,7 +93,7 @@ class CheckoutForm(forms.Form):
 
     def clean_delivery_option(self):
         delivery_option = self.cleaned_data.get('delivery_option')
-        if delivery_option and not delivery_option.active:  # ← change here too
+        if delivery_option and not delivery_option.is_active:
             raise forms.ValidationError("This delivery option is no longer available.")
         return delivery_option
 
@@ -0,0 +1,81 @@
+# orders/idempotency.py
+"""
+Idempotency keys for checkout.
+
+The checkout page carries a fresh key in a hidden field. The POST claims
+it (IdempotencyKey row) inside the same transaction that places the
+order, so a double-click or a network retry either replays the stored
+response or — while the first attempt is still running — is told so,
+and never places a second order. A failed attempt rolls the claim back,
+leaving the key usable for a retry. Keys expire after
+CHECKOUT_IDEMPOTENCY_TTL seconds (purge with `purge_idempotency_keys`).
+"""
+
+import re
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+
+TTL_SECONDS = getattr(settings, "CHECKOUT_IDEMPOTENCY_TTL", 60 * 60 * 24)
+
+_KEY_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+class KeyInUse(Exception):
+    """Another request already claimed this key"""
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def clean_key(value):
+    """The submitted key, or None if missing/malformed"""
+    if value and _KEY_RE.match(value):
+        return value
+    return None
+
+
+def find_completed(user, key):
+    """The finished submission for this key, if any (one indexed lookup)"""
+    return (
+        IdempotencyKey.objects
+        .filter(user=user, key=key, order__isnull=False, expires_at__gt=timezone.now())
+        .first()
+    )
+
+
+def claim(user, key):
+    """
+    Claim `key` for this submission. Call inside the checkout transaction;
+    raises KeyInUse if another request holds it.
+    """
+    now = timezone.now()
+    # A long-expired key may be reused
+    IdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user,
+                key=key,
+                expires_at=now + timedelta(seconds=TTL_SECONDS),
+            )
+    except IntegrityError:
+        raise KeyInUse(key)
+
+
+def complete(record, order, response):
+    record.order = order
+    record.response = response
+    record.save(update_fields=["order", "response"])
+
+
+def purge_expired():
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from orders import totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Repair Order.items_total / item_count / discount_amount / grand_total "
+        "from order items, in batches. Migration 0004 already filled them for "
+        "existing orders; this is for totals that drifted since. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only orders that have items but no stored items_total yet.",
+        )
+
+    def handle(self, *args, **options):
+        checked, updated = totals.backfill(
+            batch_size=options["batch_size"],
+            missing_only=options["missing_only"],
+            progress=lambda checked: self.stdout.write(f"  ...{checked} order(s) checked"),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} order(s), updated totals on {updated}."
+        ))
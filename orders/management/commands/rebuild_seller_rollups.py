@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from orders import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the seller / product daily sales rollups from paid orders. "
+        "Run after refunds or edits to paid orders. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seller",
+            type=int,
+            action="append",
+            dest="sellers",
+            help="Only rebuild this seller id (repeatable). Default: all sellers.",
+        )
+
+    def handle(self, *args, **options):
+        seller_rows, product_rows = rollups.rebuild(options["sellers"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {seller_rows} seller-day and {product_rows} product-day row(s)."
+        ))
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:44
+
+from django.db import migrations, models
+
+
+def backfill_totals(apps, schema_editor):
+    """Orders placed before 0003 have no stored totals yet — fill them from their items"""
+    from orders import totals
+
+    totals.backfill(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_stored_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of order lines'),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
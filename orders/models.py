@@ -1,12 +1,16 @@
 from django.db import models
+from django.db.models import Count, F, Sum
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from decimal import Decimal
 
 from products.models import Product
 
 User = settings.AUTH_USER_MODEL
 
+CENT = Decimal("0.01")
+
 
 # -------------------------
 # DELIVERY OPTIONS
@@ -221,6 +225,13 @@ class Order(models.Model):
         related_name="orders"
     )
     discount_amount = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+
+    # Stored totals — written at checkout from the priced cart lines and
+    # recalculated whenever an item changes (orders.signals)
+    items_total = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    item_count = models.PositiveIntegerField(default=0, help_text="Number of order lines")
+    grand_total = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHODS, default="mpesa")
     is_paid = models.BooleanField(default=False)
     paid_at = models.DateTimeField(null=True, blank=True)
@@ -234,32 +245,71 @@ class Order(models.Model):
         verbose_name = "Order"
         verbose_name_plural = "Orders"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        order = super().from_db(db, field_names, values)
+        # Remembered so orders.signals can spot the unpaid → paid transition
+        if "is_paid" in field_names:
+            order._loaded_is_paid = values[field_names.index("is_paid")]
+        return order
+
     def __str__(self):
         return f"Order #{self.id} - {self.buyer.get_full_name() or self.buyer.username} ({self.get_status_display()})"
 
     def get_items_total(self):
-        """Total price of all items before delivery & discount"""
-        return sum(item.get_total() for item in self.items.all())
+        """Total price of all items before delivery & discount (stored)"""
+        return self.items_total
 
     def get_discount_amount(self):
-        """Calculate discount based on applied coupon"""
-        if not self.coupon or not self.coupon.is_valid():
-            return 0
-        items_total = self.get_items_total()
-        return (items_total * self.coupon.discount_percent) / 100
+        """Coupon discount, fixed when the order was placed (stored)"""
+        return self.discount_amount
 
     def get_grand_total(self):
-        """Final total after discount and delivery"""
-        items_total = self.get_items_total()
-        discount = self.get_discount_amount()
-        return max(items_total - discount + self.delivery_price, 0)
+        """Final total after discount and delivery (stored)"""
+        return self.grand_total
+
+    def set_totals(self, items_total, item_count, validate_coupon=True):
+        """
+        Fill the stored totals from an already computed items total (e.g. the
+        cart subtotal). No queries. At checkout the coupon must still be
+        valid; recalculating an existing order keeps the coupon it was
+        placed with.
+        """
+        items_total = Decimal(items_total).quantize(CENT)
+        discount = Decimal("0")
+        if self.coupon and (not validate_coupon or self.coupon.is_valid()):
+            discount = (items_total * self.coupon.discount_percent / 100).quantize(CENT)
+        self.items_total = items_total
+        self.item_count = item_count
+        self.discount_amount = discount
+        self._set_grand_total()
+
+    def _set_grand_total(self):
+        self.grand_total = max(
+            Decimal(self.items_total) - Decimal(self.discount_amount) + Decimal(self.delivery_price),
+            Decimal("0"),
+        )
+
+    def recalculate_totals(self):
+        """Recompute the stored totals from this order's items (one aggregate query) and save them"""
+        totals = self.items.aggregate(
+            items_total=Sum(F("price") * F("quantity"), output_field=models.DecimalField()),
+            item_count=Count("id"),
+        )
+        self.set_totals(totals["items_total"] or 0, totals["item_count"], validate_coupon=False)
+        Order.objects.filter(pk=self.pk).update(
+            items_total=self.items_total,
+            item_count=self.item_count,
+            discount_amount=self.discount_amount,
+            grand_total=self.grand_total,
+        )
 
     def save(self, *args, **kwargs):
-        # Auto-calculate discount on save if coupon is applied
-        if self.coupon:
-            self.discount_amount = self.get_discount_amount()
-        else:
-            self.discount_amount = 0
+        # Delivery price may have been edited — keep grand_total consistent (no queries)
+        self._set_grand_total()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "delivery_price" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"grand_total"}
         super().save(*args, **kwargs)
 
 
@@ -291,4 +341,96 @@ class OrderItem(models.Model):
         return f"{self.quantity} × {self.product.name}"
 
     def get_total(self):
-        return self.price * self.quantity
\ No newline at end of file
+        return self.price * self.quantity
+
+
+# -------------------------
+# CHECKOUT IDEMPOTENCY
+# -------------------------
+class IdempotencyKey(models.Model):
+    """
+    One checkout submission. The key is issued with the checkout page and
+    claimed inside the checkout transaction; a retry with the same key gets
+    the stored response instead of placing another order.
+    """
+
+    key = models.CharField(max_length=64)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys"
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    response = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="idempotencykey_unique_user_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} → order #{self.order_id}"
+
+
+
+# -------------------------
+# SELLER ANALYTICS ROLLUPS
+# -------------------------
+class SellerDailyStats(models.Model):
+    """
+    Paid sales for one seller on one day (the order's local date), kept
+    current by orders.rollups when an order is marked paid and rebuilt
+    from scratch by `manage.py rebuild_seller_rollups`.
+    """
+
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_stats")
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    buyers = models.PositiveIntegerField(default=0, help_text="Distinct buyers that day")
+
+    class Meta:
+        ordering = ["-date"]
+        verbose_name = "Seller Daily Stats"
+        verbose_name_plural = "Seller Daily Stats"
+        constraints = [
+            models.UniqueConstraint(fields=["seller", "date"], name="sellerdailystats_unique_seller_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.seller_id} @ {self.date}: K{self.revenue}"
+
+
+class ProductDailyStats(models.Model):
+    """Paid sales for one product on one day — see SellerDailyStats"""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_stats")
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name="product_daily_stats")
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    last_sale_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-date"]
+        verbose_name = "Product Daily Stats"
+        verbose_name_plural = "Product Daily Stats"
+        constraints = [
+            models.UniqueConstraint(fields=["product", "date"], name="productdailystats_unique_product_date"),
+        ]
+        indexes = [
+            models.Index(fields=["seller", "date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.date}: {self.units} sold"
@@ -0,0 +1,253 @@
+# orders/rollups.py
+"""
+Seller analytics rollups.
+
+SellerDailyStats / ProductDailyStats hold paid sales per seller and per
+product per day, dated by the order's local creation date (the same date
+the dashboards always filtered on). When an order becomes paid its lines
+are added in with a few UPDATEs (orders.signals), so the dashboards sum a
+handful of small rows instead of aggregating OrderItem ⋈ Order ⋈ Product.
+
+Only the unpaid → paid transition is recorded. Refunds, or items edited
+after payment, are picked up by `manage.py rebuild_seller_rollups`, which
+recomputes the tables from the order history (the migration that creates
+them runs the same rebuild once).
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import Order, OrderItem, ProductDailyStats, SellerDailyStats
+
+
+REBUILD_BATCH_SIZE = 1000
+
+LINE_REVENUE = Sum(F("price") * F("quantity"), output_field=models.DecimalField(max_digits=14, decimal_places=2))
+
+
+def _add(model, lookup, increments, last_sale_at=None):
+    """Add `increments` to the row for `lookup`, creating it on first sale"""
+    updates = {field: F(field) + value for field, value in increments.items()}
+    if last_sale_at is not None:
+        updates["last_sale_at"] = Greatest(
+            Coalesce("last_sale_at", Value(last_sale_at)), Value(last_sale_at),
+            output_field=models.DateTimeField(),
+        )
+    if model.objects.filter(**lookup).update(**updates):
+        return
+
+    extra = {"last_sale_at": last_sale_at} if last_sale_at is not None else {}
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **increments, **extra)
+    except IntegrityError:
+        # Another payment created the row first
+        model.objects.filter(**lookup).update(**updates)
+
+
+def _day_bounds(date):
+    start = timezone.make_aware(datetime.combine(date, time.min))
+    return start, start + timedelta(days=1)
+
+
+def record_paid_order(order):
+    """Add a newly paid order to its sellers' and products' daily rows"""
+    date = timezone.localdate(order.created_at)
+    lines = (
+        OrderItem.objects
+        .filter(order=order)
+        .values("product_id", "product__seller_id")
+        .annotate(revenue=LINE_REVENUE, units=Sum("quantity"))
+    )
+
+    sellers = {}
+    with transaction.atomic():
+        for line in lines:
+            seller_id = line["product__seller_id"]
+            _add(
+                ProductDailyStats,
+                {"product_id": line["product_id"], "seller_id": seller_id, "date": date},
+                {"revenue": line["revenue"], "units": line["units"], "orders": 1},
+                last_sale_at=order.created_at,
+            )
+            totals = sellers.setdefault(seller_id, {"revenue": 0, "units": 0})
+            totals["revenue"] += line["revenue"]
+            totals["units"] += line["units"]
+
+        day_start, day_end = _day_bounds(date)
+        for seller_id, totals in sellers.items():
+            # A buyer counts once per seller per day
+            returning = (
+                Order.objects
+                .filter(
+                    buyer_id=order.buyer_id,
+                    is_paid=True,
+                    created_at__gte=day_start,
+                    created_at__lt=day_end,
+                    items__product__seller_id=seller_id,
+                )
+                .exclude(pk=order.pk)
+                .exists()
+            )
+            _add(
+                SellerDailyStats,
+                {"seller_id": seller_id, "date": date},
+                {**totals, "orders": 1, "buyers": 0 if returning else 1},
+            )
+
+
+# -------------------------
+# READING
+# -------------------------
+def _in_range(qs, start=None, end=None):
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    return qs
+
+
+def seller_totals(seller, start=None, end=None, **extra):
+    """
+    Revenue / units / paid orders for a seller between two local dates
+    (inclusive, either open). `extra` adds more aggregates to the same
+    query, e.g. month=revenue_since(first_of_month).
+    """
+    # Aliased so `extra` can still refer to the revenue/units/orders columns
+    totals = _in_range(SellerDailyStats.objects.filter(seller=seller), start, end).aggregate(
+        total_revenue=Coalesce(Sum("revenue"), Value(0), output_field=models.DecimalField()),
+        total_units=Coalesce(Sum("units"), 0),
+        total_orders=Coalesce(Sum("orders"), 0),
+        **extra,
+    )
+    for field in ("revenue", "units", "orders"):
+        totals[field] = totals.pop(f"total_{field}")
+    return totals
+
+
+def revenue_since(date):
+    """Aggregate for seller_totals(): revenue on or after `date`"""
+    return Coalesce(Sum("revenue", filter=Q(date__gte=date)), Value(0), output_field=models.DecimalField())
+
+
+def product_totals(seller, start=None, end=None):
+    """Per-product sales for a seller, best sellers first"""
+    return (
+        _in_range(ProductDailyStats.objects.filter(seller=seller), start, end)
+        .values("product_id", "product__name")
+        .annotate(
+            revenue=Sum("revenue"),
+            units=Sum("units"),
+            orders=Sum("orders"),
+            last_sale_at=Max("last_sale_at"),
+        )
+        .order_by("-revenue", "product_id")
+    )
+
+
+def monthly_revenue(seller, start=None, end=None):
+    """[(first day of month, revenue)] for a seller, oldest first"""
+    return [
+        (row["month"], row["revenue"])
+        for row in _in_range(SellerDailyStats.objects.filter(seller=seller), start, end)
+        .annotate(month=TruncMonth("date"))
+        .values("month")
+        .annotate(revenue=Sum("revenue"))
+        .order_by("month")
+    ]
+
+
+# -------------------------
+# REBUILDING
+# -------------------------
+def _bulk_create(model, rows):
+    batch = []
+    for row in rows:
+        batch.append(model(**row))
+        if len(batch) == REBUILD_BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def rebuild(seller_ids=None, apps=None):
+    """
+    Recompute the rollups from paid orders (all sellers, or just
+    `seller_ids`) in one transaction: two grouped queries, then batched
+    INSERTs. Returns (seller rows, product rows).
+
+    A migration passes its `apps` so the historical models are used.
+    """
+    if apps is None:
+        item_model, seller_model, product_model = OrderItem, SellerDailyStats, ProductDailyStats
+    else:
+        item_model, seller_model, product_model = (
+            apps.get_model("orders", name) for name in ("OrderItem", "SellerDailyStats", "ProductDailyStats")
+        )
+
+    items = item_model.objects.filter(order__is_paid=True)
+    seller_rows = seller_model.objects.all()
+    product_rows = product_model.objects.all()
+    if seller_ids is not None:
+        items = items.filter(product__seller_id__in=seller_ids)
+        seller_rows = seller_rows.filter(seller_id__in=seller_ids)
+        product_rows = product_rows.filter(seller_id__in=seller_ids)
+
+    # TruncDate uses the current time zone, i.e. the order's local date
+    items = items.annotate(day=TruncDate("order__created_at"))
+
+    by_product = (
+        items
+        .values("product_id", "product__seller_id", "day")
+        .annotate(
+            revenue=LINE_REVENUE,
+            units=Sum("quantity"),
+            orders=Count("order_id", distinct=True),
+            last_sale_at=Max("order__created_at"),
+        )
+        .order_by()
+    )
+    by_seller = (
+        items
+        .values("product__seller_id", "day")
+        .annotate(
+            revenue=LINE_REVENUE,
+            units=Sum("quantity"),
+            orders=Count("order_id", distinct=True),
+            buyers=Count("order__buyer_id", distinct=True),
+        )
+        .order_by()
+    )
+
+    with transaction.atomic():
+        seller_rows.delete()
+        product_rows.delete()
+        _bulk_create(product_model, (
+            {
+                "product_id": row["product_id"],
+                "seller_id": row["product__seller_id"],
+                "date": row["day"],
+                "revenue": row["revenue"],
+                "units": row["units"],
+                "orders": row["orders"],
+                "last_sale_at": row["last_sale_at"],
+            }
+            for row in by_product.iterator()
+        ))
+        _bulk_create(seller_model, (
+            {
+                "seller_id": row["product__seller_id"],
+                "date": row["day"],
+                "revenue": row["revenue"],
+                "units": row["units"],
+                "orders": row["orders"],
+                "buyers": row["buyers"],
+            }
+            for row in by_seller.iterator()
+        ))
+    return seller_rows.count(), product_rows.count()
@@ -0,0 +1,38 @@
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Order, OrderItem
+
+
+# Keep Order.items_total / item_count / grand_total in sync when items are
+# edited after checkout (admin, support). Checkout itself bulk-creates items
+# and sets the totals directly, so it doesn't come through here. Items
+# deleted along with their order (`origin` is the order) need nothing.
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def refresh_order_totals(sender, instance, raw=False, origin=None, **kwargs):
+    if raw:
+        return
+    if isinstance(origin, Order) or (isinstance(origin, models.QuerySet) and origin.model is Order):
+        return
+    instance.order.recalculate_totals()
+
+
+# Add an order to the seller analytics rollups once, when it becomes paid.
+# Runs after commit so the items are in place and a rollup error can't undo
+# the payment; `manage.py rebuild_seller_rollups` repairs anything missed.
+
+@receiver(post_save, sender=Order)
+def roll_up_paid_order(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not instance.is_paid:
+        return
+    if update_fields is not None and "is_paid" not in update_fields:
+        return
+    if not created and getattr(instance, "_loaded_is_paid", True):
+        return  # already paid, or not loaded from the DB (unknown)
+    instance._loaded_is_paid = True
+
+    from .rollups import record_paid_order
+    transaction.on_commit(lambda: record_paid_order(instance), robust=True)
@@ -0,0 +1,91 @@
+# orders/totals.py
+"""
+Backfill of the stored order totals (items_total / item_count /
+discount_amount / grand_total) from the order items.
+
+Migration 0004 runs it once over the orders that existed before the
+columns did; `manage.py backfill_order_totals` runs it again to repair
+totals that drifted (e.g. items changed by a raw UPDATE).
+"""
+
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Count, F, Sum
+
+from .models import CENT, Order, OrderItem
+
+
+TOTAL_FIELDS = ["items_total", "item_count", "discount_amount", "grand_total"]
+
+
+def _fill(order, items_total, item_count):
+    """Order.set_totals(..., validate_coupon=False) — historical models have no methods"""
+    items_total = Decimal(items_total).quantize(CENT)
+    discount = Decimal("0")
+    if order.coupon_id:
+        discount = (items_total * order.coupon.discount_percent / 100).quantize(CENT)
+    order.items_total = items_total
+    order.item_count = item_count
+    order.discount_amount = discount
+    order.grand_total = max(items_total - discount + Decimal(order.delivery_price), Decimal("0"))
+
+
+def _backfill_batch(batch, item_model, order_model):
+    # One grouped query for the whole batch
+    totals = {
+        row["order_id"]: row
+        for row in (
+            item_model.objects
+            .filter(order_id__in=[order.pk for order in batch])
+            .values("order_id")
+            .annotate(
+                items_total=Sum(F("price") * F("quantity"), output_field=models.DecimalField()),
+                item_count=Count("id"),
+            )
+            .order_by()
+        )
+    }
+
+    changed = []
+    for order in batch:
+        row = totals.get(order.pk, {})
+        before = [Decimal(getattr(order, field)) for field in TOTAL_FIELDS]
+        _fill(order, row.get("items_total") or Decimal("0"), row.get("item_count", 0))
+        if before != [Decimal(getattr(order, field)) for field in TOTAL_FIELDS]:
+            changed.append(order)
+
+    if changed:
+        with transaction.atomic():
+            order_model.objects.bulk_update(changed, TOTAL_FIELDS)
+    return len(changed)
+
+
+def backfill(batch_size=500, missing_only=False, apps=None, progress=None):
+    """
+    Recompute the stored totals in pk batches; returns (checked, updated).
+    `progress(checked)` is called after each batch.
+
+    A migration passes its `apps` so the historical models are used.
+    """
+    if apps is None:
+        order_model, item_model = Order, OrderItem
+    else:
+        order_model, item_model = (apps.get_model("orders", name) for name in ("Order", "OrderItem"))
+
+    orders = order_model.objects.select_related("coupon").order_by("pk")
+    if missing_only:
+        orders = orders.filter(items_total=0, items__isnull=False).distinct()
+
+    checked = updated = 0
+    last_pk = 0
+    while True:
+        batch = list(orders.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        checked += len(batch)
+        updated += _backfill_batch(batch, item_model, order_model)
+        if progress is not None:
+            progress(checked)
+    return checked, updated
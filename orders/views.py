@@ -3,10 +3,17 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import Http404
 from django.views.decorators.http import require_POST
+from django.db import transaction
 from django.db.models import Prefetch
 from decimal import Decimal
 from users.decorators import buyer_required, seller_required
 from cart.cart import Cart
+from products.inventory import InsufficientStock, reserve_stock
+from . import idempotency
+from core import jobs
+from payments import collection, gateways
+from payments.models import MobileMoneyProvider, Payment
+from users.models import Notification, NotificationBroadcast
 from products.models import Product
 from .models import Order, OrderItem, Coupon, DeliveryOption
 from .forms import CheckoutForm
@@ -72,10 +79,35 @@ from .models import Coupon
 from orders.models import DeliveryOption
 
 
+def _order_placed_response(request, data):
+    """Success response for a placed order — also replayed for retried submissions"""
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return JsonResponse({
+            "success": True,
+            "message": data["message"],
+            "order_id": data["order_id"],
+            "order_ref": f"ORDER-{data['order_id']}",
+            "total_amount": data["total_amount"],
+        })
+
+    messages.success(request, data["message"])
+    return redirect("orders:order_success", order_id=data["order_id"])
+
+
 @login_required
 @buyer_required
 @require_http_methods(["GET", "POST"])
 def checkout(request):
+    # A retried submission (double-click, flaky network) replays the first
+    # response — checked before anything else, the cart is already empty by then
+    idempotency_key = None
+    if request.method == "POST":
+        idempotency_key = idempotency.clean_key(request.POST.get("idempotency_key"))
+        if idempotency_key:
+            previous = idempotency.find_completed(request.user, idempotency_key)
+            if previous is not None:
+                return _order_placed_response(request, previous.response)
+
     cart = Cart(request)
 
     if len(cart) == 0:
@@ -107,50 +139,81 @@ def checkout(request):
 
         if form.is_valid():
             try:
-                order = form.save(commit=False)
-                order.buyer = request.user
-
-                # Delivery option
-                selected_delivery = form.cleaned_data["delivery_option"]
-                order.delivery_option = selected_delivery
-                order.delivery_price = selected_delivery.price
-
-                # Coupon handling
-                subtotal = cart.get_subtotal()
-                if coupon and coupon.is_valid():
-                    order.coupon = coupon
-                    order.discount_amount = coupon.calculate_discount(subtotal)
-                    coupon.increment_usage()
-
-                order.save()
-
-                # Create order items + reduce stock
-                for item in cart:
-                    OrderItem.objects.create(
-                        order=order,
-                        product=item["product"],
-                        price=item["price"],
-                        quantity=item["quantity"],
+                with transaction.atomic():
+                    claimed = idempotency.claim(request.user, idempotency_key) if idempotency_key else None
+
+                    # Reserve stock for every line up front (one conditional UPDATE);
+                    # lines that lost a race are rejected together and nothing is kept
+                    lines = list(cart)
+                    reserve_stock((item["product"].id, item["quantity"]) for item in lines)
+
+                    data = form.cleaned_data
+                    selected_delivery = data["delivery_option"]
+                    order = Order(
+                        buyer=request.user,
+                        full_name=data["full_name"],
+                        email=data["email"],
+                        phone=data.get("phone") or "",
+                        address=data["address"],
+                        delivery_option=selected_delivery,
+                        delivery_price=selected_delivery.price,
                     )
-                    item["product"].reduce_stock(item["quantity"])
+                    if coupon and coupon.is_valid():
+                        order.coupon = coupon
+
+                    # Totals once, from the already-priced cart lines
+                    order.set_totals(cart.get_subtotal(), len(lines))
+                    order.save()
+
+                    OrderItem.objects.bulk_create([
+                        OrderItem(
+                            order=order,
+                            product=item["product"],
+                            price=item["unit_price"],
+                            quantity=item["quantity"],
+                        )
+                        for item in lines
+                    ])
+
+                    if order.coupon:
+                        coupon.increment_usage()
+
+                    response_data = {
+                        "order_id": order.id,
+                        "message": f"Order #{order.id} created successfully! Please complete payment.",
+                        "total_amount": float(order.grand_total),
+                    }
+                    if claimed is not None:
+                        idempotency.complete(claimed, order, response_data)
 
                 # Cleanup
                 cart.clear()
                 request.session.pop("coupon_id", None)
 
-                success_message = f"Order #{order.id} created successfully! Please complete payment."
+                return _order_placed_response(request, response_data)
 
+            except idempotency.KeyInUse:
+                previous = idempotency.find_completed(request.user, idempotency_key)
+                if previous is not None:
+                    return _order_placed_response(request, previous.response)
+                error_msg = "This order is already being placed. Please wait a moment."
                 if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-                    return JsonResponse({
-                        "success": True,
-                        "message": success_message,
-                        "order_id": order.id,
-                        "order_ref": f"ORDER-{order.id}",
-                        "total_amount": float(order.get_grand_total()),
-                    })
+                    return JsonResponse({"success": False, "error": error_msg}, status=409)
+                messages.info(request, error_msg)
+                return redirect("orders:order_list")
 
-                messages.success(request, success_message)
-                return redirect("orders:order_success", order_id=order.id)
+            except InsufficientStock as exc:
+                sold_out = ", ".join(
+                    item["product"].name for item in cart if item["product"].id in exc.product_ids
+                )
+                error_msg = f"Sorry, there isn't enough stock left for: {sold_out}. Please update your cart."
+                if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+                    return JsonResponse(
+                        {"success": False, "error": error_msg, "sold_out": exc.product_ids},
+                        status=409
+                    )
+                messages.error(request, error_msg)
+                return redirect("cart_detail")
 
             except Exception as e:
                 error_msg = "An error occurred while placing your order. Please try again."
@@ -201,6 +264,7 @@ def checkout(request):
     context = {
         "form": form,
         "cart": cart,
+        "idempotency_key": idempotency_key or idempotency.new_key(),
         "coupon": coupon,
         "subtotal": subtotal,
         "discount_amount": discount_amount,
@@ -356,10 +420,8 @@ from django.views.decorators.http import require_POST
 @login_required
 @buyer_required
 def initiate_payment(request, order_id):
-    # Temporarily remove buyer and is_paid checks for testing
-    order = get_object_or_404(Order, id=order_id)  # ← Only check ID
+    order = get_object_or_404(Order, id=order_id)
 
-    # Optional: Re-add security check but show better message
     if order.buyer != request.user:
         messages.error(request, "You can only pay for your own orders.")
         return redirect("orders:order_list")
@@ -369,20 +431,36 @@ def initiate_payment(request, order_id):
         return redirect("orders:order_detail", order_id=order.id)
 
     method = request.POST.get("method")
-    valid_methods = ["airtelmoney", "mtn", "zamtel"]
-    if method not in valid_methods:
+    providers = {"airtelmoney": "airtel", "mtn": "mtn", "zamtel": "zamtel"}
+    if method not in providers:
         messages.error(request, "Please select a valid payment method.")
         return redirect("orders:order_success", order_id=order.id)
 
-    # Simulate payment
-    from django.utils import timezone
-    order.is_paid = True
-    order.paid_at = timezone.now()
-    order.payment_method = method
-    order.status = "confirmed"
-    order.save()
+    provider = MobileMoneyProvider.objects.filter(provider=providers[method], is_active=True).first()
+    if provider is None or gateways.is_unavailable(provider.provider):
+        messages.error(request, "That payment method is unavailable right now. Please try again shortly or choose another.")
+        return redirect("orders:order_success", order_id=order.id)
 
-    messages.success(request, f"Payment successful via {order.get_payment_method_display()}!")
+    if collection.awaiting_approval(Payment.objects.filter(order=order).first()):
+        messages.info(request, "A payment request is already waiting on your phone. Approve it to complete the order.")
+        return redirect("orders:order_detail", order_id=order.id)
+
+    phone = request.POST.get("phone_number", "").strip()
+    try:
+        collection.start(order, provider, phone)
+    except gateways.PaymentDeclined as exc:  # bad phone number
+        messages.error(request, str(exc))
+        return redirect("orders:order_success", order_id=order.id)
+    except gateways.GatewayError:  # provider not configured
+        messages.error(request, "That payment method is unavailable right now. Please try again shortly or choose another.")
+        return redirect("orders:order_success", order_id=order.id)
+
+    # The push and the wait for approval run on the gateway loop; the order updates when the provider confirms
+    messages.success(
+        request,
+        f"We've sent a payment request to {phone} via {provider.display_name}. "
+        "Approve it on your phone — this order updates automatically once payment is confirmed."
+    )
     return redirect("orders:order_detail", order_id=order.id)
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
@@ -471,23 +549,19 @@ def seller_notifications(request):
                 messages.warning(request, "You have no buyers to notify yet.")
                 return redirect("orders:seller_notifications")
 
-            notifications = [
-                Notification(
-                    user=buyer,
-                    sender=seller,
-                    title=title,
-                    message=message,
-                    notification_type="promotion",
-                    created_at=timezone.now()
-                )
-                for buyer in buyers_qs
-            ]
-
-            Notification.objects.bulk_create(notifications)
+            # Only record it here; the `broadcast` job writes the notifications in batches
+            broadcast = NotificationBroadcast.objects.create(
+                sender=seller,
+                title=title,
+                message=message,
+                notification_type="promotion",
+                total_recipients=buyer_count,
+            )
+            jobs.enqueue("broadcast", {"broadcast_id": broadcast.id})
 
             messages.success(
                 request,
-                f"Broadcast sent to {len(notifications)} buyer{'s' if len(notifications) != 1 else ''}!"
+                f"Broadcast to {buyer_count} buyer{'s' if buyer_count != 1 else ''} is on its way — progress is shown below."
             )
 
             return redirect("orders:seller_notifications")
@@ -549,6 +623,7 @@ def seller_notifications(request):
         "recent_orders": recent_orders,
         "buyer_count": buyer_count,
         "has_buyers": buyer_count > 0,
+        "broadcasts": NotificationBroadcast.objects.filter(sender=seller)[:5],
     }
 
     return render(request, "orders/seller_notifications.html", context)
@@ -557,21 +632,22 @@ def seller_notifications(request):
 @login_required
 @seller_required
 def mark_order_shipped(request, order_id):
-    order = get_object_or_404(Order, id=order_id, seller_items__product__seller=request.user)
-    if request.method == 'POST' and order.status == 'pending' and order.is_paid:
+    order = get_object_or_404(
+        Order.objects.filter(items__product__seller=request.user).distinct().select_related("buyer"), id=order_id
+    )
+    if request.method == 'POST' and order.status in ('pending', 'confirmed', 'processing') and order.is_paid:
         order.status = 'shipped'
-        order.shipped_at = timezone.now()
-        order.save()
-
-        # Send email to buyer
-        send_mail(
-            subject=f"Your order #{order.id} has been shipped!",
-            message=f"Hi {order.buyer.get_full_name()},\n\nGreat news! Your order from Style Bazaar has been shipped...\n\nTracking: Coming soon!",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.buyer.email],
-        )
+        order.save(update_fields=['status'])
+
+        # Email the buyer (queued; `manage.py run_jobs` sends it)
+        if order.buyer.email:
+            jobs.enqueue_email(
+                subject=f"Your order #{order.id} has been shipped!",
+                message=f"Hi {order.buyer.get_full_name()},\n\nGreat news! Your order from Style Bazaar has been shipped...\n\nTracking: Coming soon!",
+                recipient_list=[order.buyer.email],
+            )
 
         messages.success(request, "Order marked as shipped and buyer notified!")
         return redirect('orders:seller_order_detail', order_id=order.id)
 
-    return redirect('orders:seller_order_detail', order_id=order.id)
\ No newline at end of file
+    return redirect('orders:seller_order_detail', order_id=order.id)
@@ -0,0 +1,118 @@
+# payments/collection.py
+"""
+Mobile money collection for an order.
+
+start() records a pending Payment and hands the provider work to the
+gateway loop: send the push to the buyer's phone, then poll until the
+provider says paid or failed (or COLLECTION_TIMEOUT passes, leaving the
+payment pending). The request that started it returns immediately; the
+outcome is written back to the Payment and Order from the loop's
+executor threads.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import gateways
+from .models import Payment, PaymentMethod
+
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_TIMEOUT = getattr(settings, "MOBILE_MONEY_COLLECTION_TIMEOUT", 180)
+POLL_INTERVAL = getattr(settings, "MOBILE_MONEY_POLL_INTERVAL", 5)
+
+# MobileMoneyProvider.provider -> Order.payment_method
+ORDER_PAYMENT_METHODS = {"airtel": "airtelmoney", "mtn": "mtn", "zamtel": "zamtel"}
+
+
+def awaiting_approval(payment):
+    """A push for this payment may still be on the buyer's phone"""
+    return (
+        payment is not None
+        and payment.status == Payment.STATUS_PENDING
+        and payment.transaction_id
+        and (timezone.now() - payment.updated_at).total_seconds() < COLLECTION_TIMEOUT
+    )
+
+
+def start(order, provider, phone):
+    """
+    Create/reset the order's Payment and send the push in the background.
+    Raises PaymentDeclined for a bad phone number and GatewayError if the
+    provider isn't set up.
+    """
+    adapter = gateways.mobile_money_adapter(provider)
+    gateways.normalize_msisdn(phone)
+    method, _ = PaymentMethod.objects.get_or_create(method=PaymentMethod.MOBILE_MONEY)
+    reference = str(uuid.uuid4())
+    amount = order.get_grand_total()
+
+    Payment.objects.update_or_create(
+        order=order,
+        defaults={
+            "user": order.buyer,
+            "amount": amount,
+            "method": method,
+            "mobile_provider": provider,
+            "phone_number": phone,
+            "status": Payment.STATUS_PENDING,
+            "transaction_id": reference,
+            "completed_at": None,
+        },
+    )
+    gateways.submit(_collect(adapter, order.pk, reference, phone, amount))
+    return reference
+
+
+async def _collect(adapter, order_id, reference, phone, amount):
+    deadline = time.monotonic() + COLLECTION_TIMEOUT
+    try:
+        result = await adapter.request_payment(reference, phone, amount, description=f"StyleBazaar order #{order_id}")
+    except gateways.GatewayError as exc:
+        logger.warning("%s push for order %s failed: %s", adapter.name, order_id, exc)
+        result = gateways.ChargeResult(gateways.FAILED, reference, None, str(exc))
+
+    while result.status == gateways.PENDING and time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        try:
+            result = await adapter.payment_status(reference)
+        except gateways.GatewayError as exc:
+            logger.info("%s status check for order %s failed, will retry: %s", adapter.name, order_id, exc)
+
+    if result.status != gateways.PENDING:
+        await sync_to_async(_record, thread_sensitive=False)(order_id, adapter.name, result)
+    return result
+
+
+def _record(order_id, provider_name, result):
+    close_old_connections()
+    try:
+        with transaction.atomic():
+            payment = (
+                Payment.objects.select_for_update()
+                .select_related("order")
+                .filter(order_id=order_id, transaction_id=result.reference, status=Payment.STATUS_PENDING)
+                .first()
+            )
+            if payment is None:  # superseded by a newer attempt, or already settled
+                return
+            if result.status == gateways.PAID:
+                payment.mark_paid(transaction_id=result.provider_reference)
+                order = payment.order
+                order.payment_method = ORDER_PAYMENT_METHODS.get(provider_name, order.payment_method)
+                if order.status == "pending":
+                    order.status = "confirmed"
+                order.save(update_fields=["payment_method", "status"])
+            else:
+                payment.mark_failed()
+                logger.info("Order %s payment via %s failed: %s", order_id, provider_name, result.message)
+    finally:
+        close_old_connections()
@@ -0,0 +1,21 @@
+"""
+Payment provider gateways: async adapters, a pooled HTTP client with
+retries and circuit breakers, and the background loop they run on.
+"""
+
+from .adapters import (
+    FAILED,
+    PAID,
+    PENDING,
+    ChargeResult,
+    StripeAdapter,
+    mobile_money_adapter,
+    normalize_msisdn,
+)
+from .client import GatewayError, GatewayUnavailable, PaymentDeclined, breaker
+from .runner import call, submit
+
+
+def is_unavailable(name):
+    """True while `name`'s circuit is open (fail fast instead of queueing work)"""
+    return breaker(name).is_open
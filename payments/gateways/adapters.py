@@ -0,0 +1,287 @@
+# payments/gateways/adapters.py
+"""
+One adapter per payment provider.
+
+Mobile money adapters (Airtel, MTN, Zamtel) share one interface:
+request_payment() sends the USSD push to the buyer's phone and
+payment_status() looks it up again by our reference; both return a
+ChargeResult. Every push carries our own reference, which the providers
+treat as an idempotency key, so client.request() may safely retry it.
+Credentials come from the MobileMoneyProvider row (merchant_id/api_key);
+base URLs from settings.PAYMENT_GATEWAY_URLS.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+
+from . import client
+from .client import GatewayError, PaymentDeclined
+
+
+PENDING = "pending"
+PAID = "paid"
+FAILED = "failed"
+
+ChargeResult = namedtuple("ChargeResult", "status reference provider_reference message")
+
+CURRENCY = getattr(settings, "MOBILE_MONEY_CURRENCY", "ZMW")
+COUNTRY = getattr(settings, "MOBILE_MONEY_COUNTRY", "ZM")
+
+
+def base_url(provider):
+    url = getattr(settings, "PAYMENT_GATEWAY_URLS", {}).get(provider)
+    if not url:
+        raise GatewayError(f"No API URL configured for {provider}")
+    return url.rstrip("/")
+
+
+def normalize_msisdn(phone):
+    """'0977 123456', '+260977123456' → '260977123456'"""
+    digits = "".join(ch for ch in str(phone) if ch.isdigit())
+    if digits.startswith("0"):
+        digits = "260" + digits[1:]
+    elif len(digits) == 9:
+        digits = "260" + digits
+    if len(digits) != 12 or not digits.startswith("260"):
+        raise PaymentDeclined(f"{phone} isn't a valid Zambian mobile number")
+    return digits
+
+
+def _json(response, provider):
+    try:
+        return response.json()
+    except ValueError:
+        raise GatewayError(f"{provider} answered HTTP {response.status_code} with a non-JSON body") from None
+
+
+class MobileMoneyAdapter(ABC):
+    name = None
+
+    def __init__(self, merchant_id="", api_key="", url=None):
+        self.merchant_id = merchant_id
+        self.api_key = api_key
+        self.url = (url or base_url(self.name)).rstrip("/")
+
+    @classmethod
+    def for_provider(cls, provider):
+        """Adapter for a MobileMoneyProvider row"""
+        return cls(merchant_id=provider.merchant_id, api_key=provider.api_key)
+
+    async def _request(self, method, path, **kwargs):
+        return await client.request(self.name, method, self.url + path, **kwargs)
+
+    @abstractmethod
+    async def request_payment(self, reference, phone, amount, description=""):
+        """Send the USSD push; PENDING if the provider accepted it"""
+
+    @abstractmethod
+    async def payment_status(self, reference):
+        """Look the push up again by our reference"""
+
+
+class AirtelAdapter(MobileMoneyAdapter):
+    """Airtel Money Collections API (merchant_id/api_key are the OAuth client id/secret)"""
+
+    name = "airtel"
+    STATUSES = {"TS": PAID, "TF": FAILED, "TIP": PENDING, "TA": PENDING}
+
+    _tokens = {}  # (url, client id) -> (token, expires at); only touched on the gateway loop
+
+    async def _token(self):
+        key = (self.url, self.merchant_id)
+        token, expires = self._tokens.get(key, (None, 0))
+        if token and expires > time.monotonic():
+            return token
+        response = await self._request("POST", "/auth/oauth2/token", json={
+            "client_id": self.merchant_id,
+            "client_secret": self.api_key,
+            "grant_type": "client_credentials",
+        })
+        if response.status_code != 200:
+            raise GatewayError(f"airtel token request failed: HTTP {response.status_code}")
+        data = _json(response, self.name)
+        self._tokens[key] = (data["access_token"], time.monotonic() + int(data.get("expires_in", 180)) - 30)
+        return data["access_token"]
+
+    async def _headers(self):
+        return {
+            "Authorization": f"Bearer {await self._token()}",
+            "X-Country": COUNTRY,
+            "X-Currency": CURRENCY,
+        }
+
+    async def request_payment(self, reference, phone, amount, description=""):
+        msisdn = normalize_msisdn(phone)[3:]  # Airtel wants the national number
+        response = await self._request("POST", "/merchant/v1/payments/", headers=await self._headers(), json={
+            "reference": description[:64] or reference,
+            "subscriber": {"country": COUNTRY, "currency": CURRENCY, "msisdn": msisdn},
+            "transaction": {"amount": float(amount), "country": COUNTRY, "currency": CURRENCY, "id": reference},
+        })
+        data = _json(response, self.name)
+        status = data.get("status") or {}
+        if response.status_code >= 400 or not status.get("success"):
+            return ChargeResult(FAILED, reference, None, status.get("message") or f"HTTP {response.status_code}")
+        return ChargeResult(PENDING, reference, None, status.get("message", ""))
+
+    async def payment_status(self, reference):
+        response = await self._request("GET", f"/standard/v1/payments/{reference}", headers=await self._headers())
+        if response.status_code == 404:
+            return ChargeResult(PENDING, reference, None, "Not registered yet")
+        transaction = (_json(response, self.name).get("data") or {}).get("transaction") or {}
+        return ChargeResult(
+            self.STATUSES.get(transaction.get("status"), PENDING),
+            reference,
+            transaction.get("airtel_money_id"),
+            transaction.get("message", ""),
+        )
+
+
+class MTNAdapter(MobileMoneyAdapter):
+    """
+    MTN MoMo Collections (request-to-pay). merchant_id/api_key are the API
+    user and key; the product subscription key is MTN_MOMO_SUBSCRIPTION_KEY.
+    Our reference must be a UUID — it is MTN's X-Reference-Id.
+    """
+
+    name = "mtn"
+    STATUSES = {"SUCCESSFUL": PAID, "FAILED": FAILED, "REJECTED": FAILED, "TIMEOUT": FAILED, "PENDING": PENDING}
+
+    _tokens = {}
+
+    def _base_headers(self):
+        return {
+            "Ocp-Apim-Subscription-Key": getattr(settings, "MTN_MOMO_SUBSCRIPTION_KEY", ""),
+            "X-Target-Environment": getattr(settings, "MTN_MOMO_ENVIRONMENT", "mtnzambia"),
+        }
+
+    async def _headers(self):
+        key = (self.url, self.merchant_id)
+        token, expires = self._tokens.get(key, (None, 0))
+        if not token or expires <= time.monotonic():
+            response = await self._request(
+                "POST", "/collection/token/",
+                auth=(self.merchant_id, self.api_key),
+                headers=self._base_headers(),
+            )
+            if response.status_code != 200:
+                raise GatewayError(f"mtn token request failed: HTTP {response.status_code}")
+            data = _json(response, self.name)
+            token = data["access_token"]
+            self._tokens[key] = (token, time.monotonic() + int(data.get("expires_in", 3600)) - 60)
+        return {**self._base_headers(), "Authorization": f"Bearer {token}"}
+
+    async def request_payment(self, reference, phone, amount, description=""):
+        response = await self._request(
+            "POST", "/collection/v1_0/requesttopay",
+            headers={**await self._headers(), "X-Reference-Id": reference},
+            json={
+                "amount": str(Decimal(amount).quantize(Decimal("0.01"))),
+                "currency": CURRENCY,
+                "externalId": reference,
+                "payer": {"partyIdType": "MSISDN", "partyId": normalize_msisdn(phone)},
+                "payerMessage": description[:160],
+                "payeeNote": description[:160],
+            },
+        )
+        # 202 Accepted; 409 means this reference was already sent — same request, so still pending
+        if response.status_code in (202, 409):
+            return ChargeResult(PENDING, reference, None, "")
+        return ChargeResult(FAILED, reference, None, f"HTTP {response.status_code}")
+
+    async def payment_status(self, reference):
+        response = await self._request(
+            "GET", f"/collection/v1_0/requesttopay/{reference}", headers=await self._headers()
+        )
+        if response.status_code == 404:
+            return ChargeResult(PENDING, reference, None, "Not registered yet")
+        data = _json(response, self.name)
+        reason = data.get("reason")
+        return ChargeResult(
+            self.STATUSES.get(data.get("status"), PENDING),
+            reference,
+            data.get("financialTransactionId"),
+            reason.get("message", "") if isinstance(reason, dict) else (reason or ""),
+        )
+
+
+class ZamtelAdapter(MobileMoneyAdapter):
+    """Zamtel Kwacha merchant collections (bearer api_key, merchant_id in the body)"""
+
+    name = "zamtel"
+    STATUSES = {"SUCCESSFUL": PAID, "FAILED": FAILED, "PENDING": PENDING}
+
+    def _headers(self):
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    async def request_payment(self, reference, phone, amount, description=""):
+        response = await self._request("POST", "/api/v1/collections", headers=self._headers(), json={
+            "merchant_id": self.merchant_id,
+            "msisdn": normalize_msisdn(phone),
+            "amount": str(Decimal(amount).quantize(Decimal("0.01"))),
+            "currency": CURRENCY,
+            "reference": reference,
+            "narration": description[:100],
+        })
+        if response.status_code not in (200, 201, 202, 409):
+            return ChargeResult(FAILED, reference, None, f"HTTP {response.status_code}")
+        data = _json(response, self.name)
+        return ChargeResult(
+            self.STATUSES.get(data.get("status"), PENDING), reference, data.get("transaction_id"), data.get("message", "")
+        )
+
+    async def payment_status(self, reference):
+        response = await self._request("GET", f"/api/v1/collections/{reference}", headers=self._headers())
+        if response.status_code == 404:
+            return ChargeResult(PENDING, reference, None, "Not registered yet")
+        data = _json(response, self.name)
+        return ChargeResult(
+            self.STATUSES.get(data.get("status"), PENDING), reference, data.get("transaction_id"), data.get("message", "")
+        )
+
+
+class StripeAdapter:
+    """The two PaymentIntent calls the card payment page needs, over Stripe's REST API"""
+
+    name = "stripe"
+
+    def __init__(self, secret_key=None, url=None):
+        self.secret_key = secret_key if secret_key is not None else settings.STRIPE_SECRET_KEY
+        self.url = (url or base_url(self.name)).rstrip("/")
+
+    async def _call(self, method, path, **kwargs):
+        response = await client.request(self.name, method, self.url + path, auth=(self.secret_key, ""), **kwargs)
+        data = _json(response, self.name)
+        if response.status_code >= 400:
+            message = (data.get("error") or {}).get("message") or f"HTTP {response.status_code}"
+            raise PaymentDeclined(f"stripe: {message}")
+        return data
+
+    async def create_payment_intent(self, amount, currency, metadata=None, idempotency_key=None):
+        form = {"amount": int(amount), "currency": currency}
+        for key, value in (metadata or {}).items():
+            form[f"metadata[{key}]"] = str(value)
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+        return await self._call("POST", "/v1/payment_intents", data=form, headers=headers)
+
+    async def retrieve_payment_intent(self, intent_id):
+        return await self._call("GET", f"/v1/payment_intents/{intent_id}")
+
+
+MOBILE_MONEY_ADAPTERS = {
+    AirtelAdapter.name: AirtelAdapter,
+    MTNAdapter.name: MTNAdapter,
+    ZamtelAdapter.name: ZamtelAdapter,
+}
+
+
+def mobile_money_adapter(provider):
+    """Adapter for a MobileMoneyProvider row"""
+    try:
+        adapter_class = MOBILE_MONEY_ADAPTERS[provider.provider]
+    except KeyError:
+        raise GatewayError(f"No gateway adapter for {provider.provider}") from None
+    return adapter_class.for_provider(provider)
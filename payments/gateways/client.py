@@ -0,0 +1,148 @@
+# payments/gateways/client.py
+"""
+Shared async HTTP plumbing for the payment gateways.
+
+One pooled httpx.AsyncClient per process (keep-alive connections are
+reused across payments), a per-provider circuit breaker, and a request
+helper that retries timeouts, connection errors, 429s and 5xxs with
+exponential backoff. Everything here runs on the gateway event loop
+(payments.gateways.runner), never on a request thread.
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = getattr(settings, "PAYMENT_GATEWAY_TIMEOUT", 10)
+CONNECT_TIMEOUT = getattr(settings, "PAYMENT_GATEWAY_CONNECT_TIMEOUT", 3)
+MAX_CONNECTIONS = getattr(settings, "PAYMENT_GATEWAY_MAX_CONNECTIONS", 50)
+MAX_KEEPALIVE = getattr(settings, "PAYMENT_GATEWAY_MAX_KEEPALIVE", 20)
+RETRIES = getattr(settings, "PAYMENT_GATEWAY_RETRIES", 2)
+BACKOFF = getattr(settings, "PAYMENT_GATEWAY_BACKOFF", 0.5)
+BREAKER_THRESHOLD = getattr(settings, "PAYMENT_GATEWAY_BREAKER_THRESHOLD", 5)
+BREAKER_RESET_SECONDS = getattr(settings, "PAYMENT_GATEWAY_BREAKER_RESET", 30)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GatewayError(Exception):
+    """The provider couldn't be reached or gave an unusable answer"""
+
+
+class GatewayUnavailable(GatewayError):
+    """The provider's circuit is open — failing fast without a request"""
+
+
+class PaymentDeclined(GatewayError):
+    """The provider answered, and the answer was no"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed calls and rejects calls for
+    `reset_after` seconds; then lets a single trial call through
+    (half-open) and closes again if it succeeds.
+    """
+
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, reset_after=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_after
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if self.is_open or self._trial:
+            return False
+        self._trial = True  # half-open: one call decides
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial or self.failures >= self.threshold:
+            if self.opened_at is None or self._trial:
+                logger.warning("Payment gateway %s: circuit open after %s failure(s)", self.name, self.failures)
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+
+_breakers = {}
+_client = None
+
+
+def breaker(name):
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+def get_client():
+    """The process-wide pooled client (created on the gateway loop on first use)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+            ),
+            headers={"User-Agent": "StyleBazaar/1.0"},
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def request(provider, method, url, retries=RETRIES, **kwargs):
+    """
+    Send one request to `provider` through its circuit breaker.
+
+    Only safe to retry because every call that creates something carries
+    the provider's idempotency reference (see the adapters). 4xx answers
+    are returned to the caller — the provider is up, the request was bad.
+    """
+    circuit = breaker(provider)
+    if not circuit.allow():
+        raise GatewayUnavailable(f"{provider} is temporarily unavailable")
+
+    client = get_client()
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            await asyncio.sleep(BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:  # timeouts, refused/reset connections
+            error = exc
+            continue
+        if response.status_code not in RETRY_STATUSES:
+            circuit.record_success()
+            return response
+        error = GatewayError(f"{provider} answered HTTP {response.status_code}")
+
+    circuit.record_failure()
+    raise GatewayError(f"{provider} request failed after {retries + 1} attempt(s): {error!r}") from error
@@ -0,0 +1,225 @@
+# payments/gateways/fakes.py
+"""
+Local fake provider servers for tests and development.
+
+start() serves fake Airtel, MTN, Zamtel and Stripe APIs on localhost
+(one ThreadingHTTPServer each) speaking the same request/response shapes
+the adapters use. Knobs to exercise the client:
+
+- latency: seconds to sleep before every answer
+- fail_rate: share of requests answered with 503 (retries, breakers)
+- fail_next: the next this-many requests are answered with 503
+- approve_after: seconds a mobile money push stays pending
+
+Numbers ending in 0000 decline. Point the app at them with the
+PAYMENT_GATEWAY_URLS setting (see the run_fake_providers command).
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+class _FakeProvider(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so the client's pool is exercised
+    options = None  # set per server in start()
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+            return dict(parse_qsl(raw.decode()))
+        return json.loads(raw or b"{}")
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # the client timed out and hung up (latency)
+
+    def _handle(self, method):
+        options = self.options
+        with options["lock"]:
+            options["requests"] += 1
+            fail = options["fail_next"] > 0
+            if fail:
+                options["fail_next"] -= 1
+        body = self._body() if method == "POST" else None  # always drain it (keep-alive)
+        if options["latency"]:
+            time.sleep(options["latency"])
+        if fail or random.random() < options["fail_rate"]:
+            return self._send(503, {"error": "fake outage"})
+        status, payload = self.route(method, self.path.split("?")[0], body)
+        self._send(status, payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    # Mobile money pushes: reference -> (created at, msisdn, provider txn id)
+    def _push(self, reference, msisdn):
+        pushes = self.options["pushes"]
+        with self.options["lock"]:
+            duplicate = reference in pushes
+            if not duplicate:
+                pushes[reference] = (time.monotonic(), str(msisdn), uuid.uuid4().hex[:12].upper())
+        return duplicate
+
+    def _push_state(self, reference):
+        push = self.options["pushes"].get(reference)
+        if push is None:
+            return None, None
+        created, msisdn, txn = push
+        if msisdn.endswith("0000"):
+            return "FAILED", txn
+        if time.monotonic() - created < self.options["approve_after"]:
+            return "PENDING", txn
+        return "SUCCESSFUL", txn
+
+    def route(self, method, path, body):
+        return 404, {"error": "not found"}
+
+
+class FakeAirtel(_FakeProvider):
+    CODES = {"SUCCESSFUL": "TS", "FAILED": "TF", "PENDING": "TIP"}
+
+    def route(self, method, path, body):
+        if method == "POST" and path == "/auth/oauth2/token":
+            return 200, {"access_token": "fake-airtel-token", "expires_in": 180, "token_type": "bearer"}
+        if method == "POST" and path == "/merchant/v1/payments/":
+            transaction = body["transaction"]
+            self._push(transaction["id"], body["subscriber"]["msisdn"])
+            return 200, {
+                "data": {"transaction": {"id": transaction["id"], "status": "Success."}},
+                "status": {"code": "200", "message": "Success.", "result_code": "ESB000010", "success": True},
+            }
+        if method == "GET" and path.startswith("/standard/v1/payments/"):
+            reference = path.rsplit("/", 1)[-1]
+            state, txn = self._push_state(reference)
+            if state is None:
+                return 404, {"status": {"success": False, "message": "Transaction not found"}}
+            return 200, {
+                "data": {"transaction": {"id": reference, "status": self.CODES[state], "airtel_money_id": txn}},
+                "status": {"success": True},
+            }
+        return super().route(method, path, body)
+
+
+class FakeMTN(_FakeProvider):
+    def route(self, method, path, body):
+        if method == "POST" and path == "/collection/token/":
+            return 200, {"access_token": "fake-mtn-token", "expires_in": 3600, "token_type": "access_token"}
+        if method == "POST" and path == "/collection/v1_0/requesttopay":
+            duplicate = self._push(self.headers["X-Reference-Id"], body["payer"]["partyId"])
+            return (409, {"code": "RESOURCE_ALREADY_EXIST"}) if duplicate else (202, None)
+        if method == "GET" and path.startswith("/collection/v1_0/requesttopay/"):
+            reference = path.rsplit("/", 1)[-1]
+            state, txn = self._push_state(reference)
+            if state is None:
+                return 404, {"code": "RESOURCE_NOT_FOUND"}
+            payload = {"externalId": reference, "status": state}
+            if state == "SUCCESSFUL":
+                payload["financialTransactionId"] = txn
+            if state == "FAILED":
+                payload["reason"] = "APPROVAL_REJECTED"
+            return 200, payload
+        return super().route(method, path, body)
+
+
+class FakeZamtel(_FakeProvider):
+    def route(self, method, path, body):
+        if method == "POST" and path == "/api/v1/collections":
+            self._push(body["reference"], body["msisdn"])
+            return 202, {"reference": body["reference"], "status": "PENDING"}
+        if method == "GET" and path.startswith("/api/v1/collections/"):
+            reference = path.rsplit("/", 1)[-1]
+            state, txn = self._push_state(reference)
+            if state is None:
+                return 404, {"message": "Unknown reference"}
+            return 200, {"reference": reference, "status": state, "transaction_id": txn}
+        return super().route(method, path, body)
+
+
+class FakeStripe(_FakeProvider):
+    def route(self, method, path, body):
+        intents = self.options["intents"]
+        if method == "POST" and path == "/v1/payment_intents":
+            key = self.headers.get("Idempotency-Key")
+            with self.options["lock"]:
+                if key and key in self.options["idempotency"]:
+                    return 200, intents[self.options["idempotency"][key]]
+                intent_id = f"pi_fake{uuid.uuid4().hex[:16]}"
+                intents[intent_id] = {
+                    "id": intent_id,
+                    "object": "payment_intent",
+                    "amount": int(body["amount"]),
+                    "currency": body["currency"],
+                    "client_secret": f"{intent_id}_secret_{uuid.uuid4().hex[:16]}",
+                    "status": "requires_payment_method",
+                    "metadata": {k[9:-1]: v for k, v in body.items() if k.startswith("metadata[")},
+                }
+                if key:
+                    self.options["idempotency"][key] = intent_id
+            return 200, intents[intent_id]
+        if method == "GET" and path.startswith("/v1/payment_intents/"):
+            intent = intents.get(path.rsplit("/", 1)[-1])
+            if intent is None:
+                return 404, {"error": {"type": "invalid_request_error", "message": "No such payment_intent"}}
+            return 200, intent
+        return super().route(method, path, body)
+
+
+PROVIDERS = {"airtel": FakeAirtel, "mtn": FakeMTN, "zamtel": FakeZamtel, "stripe": FakeStripe}
+
+
+class FakeProviders:
+    """Running fake servers; `urls` is ready to drop into PAYMENT_GATEWAY_URLS"""
+
+    def __init__(self, servers):
+        self.servers = servers
+        self.urls = {name: f"http://127.0.0.1:{server.server_address[1]}" for name, server in servers.items()}
+
+    def options(self, name):
+        return self.servers[name].RequestHandlerClass.options
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+def start(latency=0, fail_rate=0, approve_after=0, port=0):
+    """Serve every fake provider on consecutive ports from `port` (0 = any free port)"""
+    servers = {}
+    for offset, (name, handler) in enumerate(PROVIDERS.items()):
+        options = {
+            "latency": latency,
+            "fail_rate": fail_rate,
+            "fail_next": 0,
+            "approve_after": approve_after,
+            "requests": 0,
+            "lock": threading.Lock(),
+            "pushes": {},
+            "intents": {},
+            "idempotency": {},
+        }
+        handler_class = type(handler.__name__, (handler,), {"options": options})
+        server = ThreadingHTTPServer(("127.0.0.1", port + offset if port else 0), handler_class)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=f"fake-{name}", daemon=True).start()
+        servers[name] = server
+    return FakeProviders(servers)
@@ -0,0 +1,55 @@
+# payments/gateways/runner.py
+"""
+The gateway event loop.
+
+Each process runs one daemon thread with an asyncio loop that owns the
+pooled HTTP client. Views hand it coroutines with submit() (fire and
+forget — the request returns at once) or call() (wait, but never longer
+than the given deadline), so a slow provider ties up sockets on this
+loop instead of WSGI workers. Restarted automatically after a fork.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+
+
+_lock = threading.Lock()
+_loop = None
+_pid = None
+
+
+def _run(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_loop():
+    global _loop, _pid
+    with _lock:
+        if _loop is None or _pid != os.getpid():
+            from . import client
+
+            client._client = None  # a forked child can't reuse the parent's sockets
+            _loop = asyncio.new_event_loop()
+            _pid = os.getpid()
+            threading.Thread(target=_run, args=(_loop,), name="payment-gateways", daemon=True).start()
+        return _loop
+
+
+def submit(coro):
+    """Schedule `coro` on the gateway loop; returns a concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def call(coro, timeout):
+    """Run `coro` on the gateway loop and wait up to `timeout` seconds for its result"""
+    future = submit(coro)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        from .client import GatewayError
+
+        raise GatewayError(f"No answer within {timeout}s") from None
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.gateways import fakes
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve fake Airtel, MTN, Zamtel and Stripe APIs on localhost for "
+        "development. Point PAYMENT_GATEWAY_URLS at the printed URLs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=9100, help="First port; providers use consecutive ports.")
+        parser.add_argument("--latency", type=float, default=0, help="Seconds to wait before every answer.")
+        parser.add_argument("--fail-rate", type=float, default=0, help="Share of requests answered with 503.")
+        parser.add_argument("--approve-after", type=float, default=5, help="Seconds a mobile money push stays pending.")
+
+    def handle(self, *args, **options):
+        servers = fakes.start(
+            latency=options["latency"],
+            fail_rate=options["fail_rate"],
+            approve_after=options["approve_after"],
+            port=options["port"],
+        )
+        env_names = {"airtel": "AIRTEL_API_URL", "mtn": "MTN_MOMO_API_URL", "zamtel": "ZAMTEL_API_URL", "stripe": "STRIPE_API_URL"}
+        for name, url in servers.urls.items():
+            self.stdout.write(f"{env_names[name]}={url}")
+        self.stdout.write(self.style.SUCCESS("Fake providers running — Ctrl+C to stop."))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            servers.stop()
@@ -1,3 +1,144 @@
-from django.test import TestCase
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .gateways import adapters, client, fakes, runner
+from .gateways.client import GatewayError, GatewayUnavailable, PaymentDeclined
+
+
+class GatewayTestCase(SimpleTestCase):
+    """Adapters and client against the local fake providers, on the real gateway loop"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.providers = fakes.start()
+        cls.addClassCleanup(cls.providers.stop)
+
+    def setUp(self):
+        for name in fakes.PROVIDERS:
+            self.providers.options(name).update(latency=0, fail_rate=0, fail_next=0, approve_after=0, requests=0)
+        client._breakers.clear()
+        # No backoff waits, and a short timeout for the pooled client built on the next request
+        for name, value in {"BACKOFF": 0, "TIMEOUT": 0.3, "CONNECT_TIMEOUT": 0.3}.items():
+            patcher = mock.patch.object(client, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self._close_client()
+        self.addCleanup(self._close_client)
+
+    def _close_client(self):
+        runner.call(client.close_client(), timeout=5)
+
+    def run_gateway(self, coro, timeout=10):
+        return runner.call(coro, timeout=timeout)
+
+    def adapter(self, adapter_class):
+        return adapter_class(merchant_id="merchant", api_key="key", url=self.providers.urls[adapter_class.name])
+
+    def requests(self, name):
+        return self.providers.options(name)["requests"]
+
+
+class MobileMoneyAdapterTests(GatewayTestCase):
+    def test_base_adapter_is_abstract(self):
+        with self.assertRaises(TypeError):
+            adapters.MobileMoneyAdapter(url="http://127.0.0.1")
+
+    def test_push_then_paid(self):
+        for adapter_class in adapters.MOBILE_MONEY_ADAPTERS.values():
+            with self.subTest(provider=adapter_class.name):
+                adapter = self.adapter(adapter_class)
+                reference = str(uuid.uuid4())
+                result = self.run_gateway(adapter.request_payment(reference, "0977123456", "150.00", "Order #1"))
+                self.assertEqual(result.status, adapters.PENDING)
+                result = self.run_gateway(adapter.payment_status(reference))
+                self.assertEqual(result.status, adapters.PAID)
+                self.assertTrue(result.provider_reference)
+
+    def test_declined_number_fails(self):
+        adapter = self.adapter(adapters.MTNAdapter)
+        reference = str(uuid.uuid4())
+        self.run_gateway(adapter.request_payment(reference, "0977110000", "10.00"))
+        self.assertEqual(self.run_gateway(adapter.payment_status(reference)).status, adapters.FAILED)
+
+    def test_resent_push_is_still_pending(self):
+        adapter = self.adapter(adapters.MTNAdapter)
+        reference = str(uuid.uuid4())
+        self.providers.options("mtn")["approve_after"] = 60
+        self.run_gateway(adapter.request_payment(reference, "0977123456", "10.00"))
+        result = self.run_gateway(adapter.request_payment(reference, "0977123456", "10.00"))
+        self.assertEqual(result.status, adapters.PENDING)
+
+
+class ClientRetryTests(GatewayTestCase):
+    def test_retries_5xx_until_success(self):
+        self.providers.options("zamtel")["fail_next"] = client.RETRIES
+        result = self.run_gateway(self.adapter(adapters.ZamtelAdapter).request_payment("ref-1", "0977123456", "10"))
+        self.assertEqual(result.status, adapters.PENDING)
+        self.assertEqual(self.requests("zamtel"), client.RETRIES + 1)
+        self.assertEqual(client.breaker("zamtel").failures, 0)
+
+    def test_gives_up_after_retries(self):
+        self.providers.options("zamtel")["fail_rate"] = 1
+        with self.assertRaises(GatewayError):
+            self.run_gateway(self.adapter(adapters.ZamtelAdapter).request_payment("ref-2", "0977123456", "10"))
+        self.assertEqual(self.requests("zamtel"), client.RETRIES + 1)
+
+    def test_timeouts_are_retried(self):
+        self.providers.options("zamtel")["latency"] = 1
+        with self.assertRaises(GatewayError) as raised:
+            self.run_gateway(self.adapter(adapters.ZamtelAdapter).payment_status("ref-3"))
+        self.assertIn("Timeout", str(raised.exception))
+        self.assertEqual(self.requests("zamtel"), client.RETRIES + 1)
+
+    def test_4xx_is_not_retried(self):
+        stripe = adapters.StripeAdapter(secret_key="sk_test", url=self.providers.urls["stripe"])
+        with self.assertRaises(PaymentDeclined):
+            self.run_gateway(stripe.retrieve_payment_intent("pi_missing"))
+        self.assertEqual(self.requests("stripe"), 1)
+
+    def test_call_deadline(self):
+        self.providers.options("zamtel")["latency"] = 1
+        with self.assertRaisesMessage(GatewayError, "No answer within"):
+            runner.call(self.adapter(adapters.ZamtelAdapter).payment_status("ref-4"), timeout=0.1)
+
+
+class CircuitBreakerTests(GatewayTestCase):
+    def setUp(self):
+        super().setUp()
+        client._breakers["zamtel"] = client.CircuitBreaker("zamtel", threshold=2, reset_after=0.5)
+        self.zamtel = self.adapter(adapters.ZamtelAdapter)
+
+    def fail_twice(self):
+        self.providers.options("zamtel")["fail_rate"] = 1
+        for _ in range(2):
+            with self.assertRaises(GatewayError):
+                self.run_gateway(self.zamtel.payment_status("ref"))
+
+    def test_opens_and_fails_fast(self):
+        self.fail_twice()
+        sent = self.requests("zamtel")
+        with self.assertRaises(GatewayUnavailable):
+            self.run_gateway(self.zamtel.payment_status("ref"))
+        self.assertEqual(self.requests("zamtel"), sent)
+        self.assertTrue(adapters.client.breaker("zamtel").is_open)
+
+    def test_half_open_trial_closes_it(self):
+        self.fail_twice()
+        self.providers.options("zamtel")["fail_rate"] = 0
+        time.sleep(0.6)
+        self.run_gateway(self.zamtel.payment_status("ref"))
+        circuit = client.breaker("zamtel")
+        self.assertFalse(circuit.is_open)
+        self.assertIsNone(circuit.opened_at)
+
+    def test_failed_trial_reopens_it(self):
+        self.fail_twice()
+        time.sleep(0.6)
+        with self.assertRaises(GatewayError):
+            self.run_gateway(self.zamtel.payment_status("ref"))
+        with self.assertRaises(GatewayUnavailable):
+            self.run_gateway(self.zamtel.payment_status("ref"))
@@ -1,45 +1,64 @@
-import stripe
 from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from orders.models import Order
-from .models import SavedPaymentMethod, MobileMoneyProvider, PaymentMethod  # Assuming PaymentMethod is your model with choices
+from . import gateways
+from .models import Payment, SavedPaymentMethod, MobileMoneyProvider, PaymentMethod  # Assuming PaymentMethod is your model with choices
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+# Longest a request waits on Stripe (the HTTP call itself runs on the gateway loop)
+STRIPE_WAIT_SECONDS = getattr(settings, "STRIPE_GATEWAY_WAIT", 8)
 
 
+@login_required
 def payment(request, order_id):
     """
     View to initiate Stripe card payment for an order.
     Creates a PaymentIntent and renders the payment page.
     """
-    order = get_object_or_404(Order, id=order_id, user=request.user)  # Add user check for security
-
-    # Optional: Prevent recreating intent if already exists
-    if not order.stripe_payment_intent_id:
-        intent = stripe.PaymentIntent.create(
-            amount=int(order.get_total_price() * 100),  # Amount in cents
-            currency="usd",  # Change to your currency, e.g., "zmw" if supported
-            metadata={
-                "order_id": str(order.id),
-                "user_id": str(request.user.id),
-            },
-            # automatic_payment_methods={"enabled": True},  # Recommended for modern integrations
-        )
-        order.stripe_payment_intent_id = intent.id
-        order.save(update_fields=["stripe_payment_intent_id"])
+    order = get_object_or_404(Order, id=order_id, buyer=request.user)
+
+    if gateways.is_unavailable("stripe"):
+        messages.error(request, "Card payments are unavailable right now. Please try again shortly or pay with mobile money.")
+        return redirect("orders:order_success", order_id=order.id)
 
-    else:
-        # Retrieve existing intent if needed (optional)
-        intent = stripe.PaymentIntent.retrieve(order.stripe_payment_intent_id)
+    existing = Payment.objects.filter(order=order).exclude(stripe_payment_intent__isnull=True).exclude(stripe_payment_intent="").first()
+    adapter = gateways.StripeAdapter()
+    try:
+        # Reuse the order's intent instead of creating a new one on every visit
+        if existing:
+            intent = gateways.call(adapter.retrieve_payment_intent(existing.stripe_payment_intent), timeout=STRIPE_WAIT_SECONDS)
+        else:
+            intent = gateways.call(
+                adapter.create_payment_intent(
+                    amount=int(order.get_grand_total() * 100),  # Amount in cents
+                    currency="usd",  # Change to your currency, e.g., "zmw" if supported
+                    metadata={"order_id": order.id, "user_id": request.user.id},
+                    idempotency_key=f"order-{order.id}-payment-intent",
+                ),
+                timeout=STRIPE_WAIT_SECONDS,
+            )
+            method, _ = PaymentMethod.objects.get_or_create(method=PaymentMethod.STRIPE)
+            Payment.objects.update_or_create(
+                order=order,
+                defaults={
+                    "user": request.user,
+                    "amount": order.get_grand_total(),
+                    "method": method,
+                    "status": Payment.STATUS_PENDING,
+                    "stripe_payment_intent": intent["id"],
+                },
+            )
+    except gateways.GatewayError:
+        messages.error(request, "We couldn't reach the card processor. Please try again shortly.")
+        return redirect("orders:order_success", order_id=order.id)
 
     return render(
         request,
         "payments/payment.html",
         {
             "order": order,
-            "client_secret": intent.client_secret,
+            "client_secret": intent["client_secret"],
             "stripe_public_key": settings.STRIPE_PUBLIC_KEY,
         },
     )
@@ -0,0 +1,351 @@
+# products/autocomplete.py
+"""
+In-process type-ahead index for the header search box.
+
+Each worker keeps an inverted index (token → entry ids) plus a prefix trie
+over those tokens, holding approved product names and category names.
+Every trie node keeps its TOP_PER_NODE best-ranked entries, so a prefix
+lookup reads the winners straight off the node instead of walking (and
+truncating) the subtree.
+
+It is built on first use, updated incrementally by products.signals, and
+rebuilt in a background thread every AUTOCOMPLETE_REBUILD_SECONDS so
+workers converge on changes made by other processes; requests keep using
+the old index until the new one is swapped in. Memory is bounded by
+AUTOCOMPLETE_MAX_ENTRIES (most-sold products win) and reported by stats().
+"""
+
+import bisect
+import heapq
+import logging
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.urls import reverse
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = getattr(settings, "AUTOCOMPLETE_MAX_ENTRIES", 20000)
+REBUILD_SECONDS = getattr(settings, "AUTOCOMPLETE_REBUILD_SECONDS", 600)
+TOP_PER_NODE = 20  # the most suggestions a request can ask for
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Categories rank above products with the same text match
+CATEGORY_BOOST = 10 ** 9
+
+
+def tokenize(text):
+    return _WORD_RE.findall((text or "").lower())
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.terminal = False  # a token ends here
+        self.top = []  # best (rank, key) in this subtree, sorted; None = recount on next read
+
+
+def _rank(key, entry):
+    """Sort key: highest score first, then shortest label"""
+    label, kind, _url, score, _words = entry
+    return (-(score + (CATEGORY_BOOST if kind == "category" else 0)), len(label), key)
+
+
+class SuggestionIndex:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.root = _Node()
+        self.tokens = {}    # token → set(entry key)
+        self.entries = {}   # entry key → (label, kind, url, score, tokens)
+        self.node_count = 1
+        self.built_at = None
+        self._lock = threading.RLock()
+
+    # -----------------------------
+    # MUTATION
+    # -----------------------------
+    def add(self, key, label, kind, url, score=0):
+        with self._lock:
+            words = tuple(set(tokenize(label)))
+            entry = (label, kind, url, score, words)
+            old = self.entries.get(key)
+            if old is not None:
+                if set(old[4]) == set(words) and _rank(key, entry) <= _rank(key, old):
+                    # Same words, ranked no lower (e.g. sold_count went up): re-rank in place
+                    self.entries[key] = entry
+                    for word in words:
+                        for node in self._path(word):
+                            self._top_discard(node, key, recount=False)
+                            self._top_insert(node, _rank(key, entry), key)
+                    return True
+                self.remove(key)
+            elif len(self.entries) >= self.max_entries:
+                return False
+
+            self.entries[key] = entry
+            rank = _rank(key, entry)
+            for word in words:
+                bucket = self.tokens.get(word)
+                if bucket is None:
+                    bucket = self.tokens[word] = set()
+                    self._trie_insert(word)
+                bucket.add(key)
+                for node in self._path(word):
+                    self._top_insert(node, rank, key)
+            return True
+
+    def remove(self, key):
+        with self._lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return
+            for word in entry[4]:
+                for node in self._path(word):
+                    self._top_discard(node, key)
+                bucket = self.tokens.get(word)
+                if bucket is None:
+                    continue
+                bucket.discard(key)
+                if not bucket:
+                    del self.tokens[word]
+                    self._trie_remove(word)
+
+    def _path(self, word):
+        """The nodes spelling `word`, below the root"""
+        node = self.root
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return
+            yield node
+
+    def _top_insert(self, node, rank, key):
+        top = node.top
+        if top is None or any(k == key for _rank_, k in top):
+            return
+        if len(top) < TOP_PER_NODE or (rank, key) < top[-1]:
+            bisect.insort(top, (rank, key))
+            del top[TOP_PER_NODE:]
+
+    def _top_discard(self, node, key, recount=True):
+        top = node.top
+        if top is None:
+            return
+        for position, (_rank_, k) in enumerate(top):
+            if k == key:
+                del top[position]
+                # A full list may have left out an entry that belongs in it now
+                if recount and len(top) == TOP_PER_NODE - 1:
+                    node.top = None
+                return
+
+    def _trie_insert(self, word):
+        node = self.root
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+                self.node_count += 1
+            node = child
+        node.terminal = True
+
+    def _trie_remove(self, word):
+        path = [self.root]
+        for char in word:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].terminal = False
+        # Prune now-empty branches
+        for depth in range(len(word), 0, -1):
+            node = path[depth]
+            if node.children or node.terminal:
+                break
+            del path[depth - 1].children[word[depth - 1]]
+            self.node_count -= 1
+
+    # -----------------------------
+    # LOOKUP
+    # -----------------------------
+    def _node(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _top(self, node, prefix):
+        """node.top, recounted from the subtree if a removal invalidated it"""
+        if node.top is None:
+            keys = set()
+            stack = [(node, prefix)]
+            while stack:
+                current, word = stack.pop()
+                if current.terminal:
+                    keys |= self.tokens.get(word, set())
+                stack.extend((child, word + char) for char, child in current.children.items())
+            node.top = heapq.nsmallest(TOP_PER_NODE, ((_rank(key, self.entries[key]), key) for key in keys))
+        return node.top
+
+    def suggest(self, query, limit=8):
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            return self._suggest(words, limit)
+
+    def _suggest(self, words, limit):
+        *complete, last = words
+        if not complete:
+            # Just a prefix: the node already holds the best entries under it
+            node = self._node(last)
+            keys = [key for _rank_, key in self._top(node, last)[:limit]] if node else []
+        else:
+            # Whole words typed so far must match exactly (inverted index),
+            # and one of the entry's words must start with the last one
+            candidates = None
+            for word in sorted(complete, key=lambda word: len(self.tokens.get(word, ()))):
+                ids = self.tokens.get(word)
+                if not ids:
+                    return []
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+            keys = heapq.nsmallest(limit, (
+                key for key in candidates
+                if any(word.startswith(last) for word in self.entries[key][4])
+            ), key=lambda key: _rank(key, self.entries[key]))
+
+        return [
+            {"label": label, "type": kind, "url": url}
+            for label, kind, url, _score, _words in (self.entries[key] for key in keys)
+        ]
+
+    # -----------------------------
+    # FOOTPRINT
+    # -----------------------------
+    def stats(self):
+        """Approximate memory use of this worker's index"""
+        node_bytes = sys.getsizeof(_Node()) + sys.getsizeof({})
+        entry_bytes = sum(
+            sys.getsizeof(label) + sys.getsizeof(url) + 120
+            for label, _kind, url, _score, _words in self.entries.values()
+        )
+        token_bytes = sum(sys.getsizeof(token) + sys.getsizeof(ids) for token, ids in self.tokens.items())
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "tokens": len(self.tokens),
+            "trie_nodes": self.node_count,
+            "approx_bytes": self.node_count * node_bytes + entry_bytes + token_bytes,
+            "built_at": self.built_at,
+        }
+
+
+# -----------------------------
+# PER-WORKER SINGLETON
+# -----------------------------
+_index = None
+_rebuilding = False
+_build_lock = threading.Lock()
+
+
+def product_entry(product):
+    return (
+        f"product:{product.pk}",
+        product.name,
+        "product",
+        reverse("products:product_detail", args=[product.slug]),
+        product.sold_count,
+    )
+
+
+def category_entry(category):
+    return (
+        f"category:{category.pk}",
+        category.name,
+        "category",
+        reverse("products:category_detail", args=[category.slug]),
+        0,
+    )
+
+
+def build_index():
+    from .models import Category, Product
+
+    started = time.perf_counter()
+    index = SuggestionIndex()
+
+    for category in Category.objects.filter(is_approved=True).only("pk", "name", "slug"):
+        index.add(*category_entry(category))
+
+    products = (
+        Product.objects
+        .filter(is_active=True, is_approved=True)
+        .only("pk", "name", "slug", "sold_count")
+        .order_by("-sold_count", "-id")
+    )
+    for product in products[:max(index.max_entries - len(index.entries), 0)].iterator(chunk_size=2000):
+        index.add(*product_entry(product))
+
+    index.built_at = time.time()
+    stats = index.stats()
+    logger.info(
+        "Autocomplete index built: %s entries, %s trie nodes, ~%s KB in %.0f ms",
+        stats["entries"], stats["trie_nodes"], stats["approx_bytes"] // 1024,
+        (time.perf_counter() - started) * 1000,
+    )
+    return index
+
+
+def _rebuild():
+    global _index, _rebuilding
+    from django.db import connection
+
+    try:
+        _index = build_index()
+    except Exception:
+        logger.exception("Autocomplete index rebuild failed; keeping the old one")
+    finally:
+        _rebuilding = False
+        connection.close()  # this thread's connection
+
+
+def get_index():
+    """
+    This worker's index. The first call builds it; once it is older than
+    REBUILD_SECONDS a background thread builds a fresh one and swaps it in,
+    while requests keep using the current one.
+    """
+    global _index, _rebuilding
+    index = _index
+    if index is None:
+        with _build_lock:
+            if _index is None:
+                _index = build_index()
+            return _index
+    if time.time() - index.built_at > REBUILD_SECONDS and not _rebuilding:
+        with _build_lock:
+            if not _rebuilding:
+                _rebuilding = True
+                threading.Thread(target=_rebuild, name="autocomplete-rebuild", daemon=True).start()
+    return index
+
+
+def current_index():
+    """The built index, or None if this worker hasn't needed one yet"""
+    return _index
+
+
+def suggest(query, limit=8):
+    return get_index().suggest(query, limit=limit)
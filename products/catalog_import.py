@@ -0,0 +1,229 @@
+# products/catalog_import.py
+"""
+Bulk catalog import for sellers (CSV, JSON array or JSON Lines).
+
+Rows are read and validated in one streaming pass with
+ProductImportRowForm, which runs no queries. Valid rows are inserted
+IMPORT_BATCH_SIZE at a time: the batch's slugs are allocated together
+(products.slugs), then one bulk_create and one search-index write run
+in a short transaction per batch. Invalid or unparseable rows are
+skipped and reported with their row number. If the file stops being
+readable part-way (bad bytes), the batches before it are kept and
+ImportResult.stopped_at says where it stopped.
+
+Imported products start unapproved and without images, like a product
+created from the seller form before its photos are added. They go
+through the usual admin approval.
+
+Used by `manage.py import_products` and the seller upload page.
+"""
+
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from . import search
+from .forms import ProductImportRowForm
+from .models import Category, Product
+from .slugs import unique_slugs
+
+
+IMPORT_BATCH_SIZE = getattr(settings, "CATALOG_IMPORT_BATCH_SIZE", 1000)
+FORMATS = ("csv", "json")
+COLUMNS = ("name", "description", "price", "discounted_price", "stock", "category", "is_promoted")
+
+
+class CatalogImportError(Exception):
+    """The file can't be read at all (bad encoding, malformed JSON array or CSV header)"""
+
+
+class UnreadableRow:
+    """
+    Yielded by read_rows() in place of a row it couldn't parse. `last` is
+    set when nothing after it can be read (e.g. a bad byte sequence).
+    """
+
+    def __init__(self, message, last=False):
+        self.message = message
+        self.last = last
+
+
+class ImportResult:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.errors = []  # (row number, ["message", …])
+        self.stopped_at = None  # row the file stopped being readable at
+
+    @property
+    def valid(self):
+        return self.rows - len(self.errors)
+
+    def add_error(self, number, form):
+        messages = []
+        for field, errors in form.errors.items():
+            prefix = "" if field == "__all__" else f"{field}: "
+            messages.extend(prefix + error for error in errors)
+        self.errors.append((number, messages))
+
+    def add_unreadable(self, number, row):
+        self.errors.append((number, [row.message]))
+        if row.last:
+            self.stopped_at = number
+
+
+# -------------------------
+# READING
+# -------------------------
+def _normalize(row):
+    return {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+
+
+def _csv_rows(text):
+    reader = csv.DictReader(text)
+    reader.fieldnames  # a bad header makes the whole file unreadable
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield UnreadableRow(f"Could not read this row: {exc}")
+            continue
+        yield _normalize(row)
+
+
+def _json_rows(text):
+    first = text.read(1)
+    while first.isspace():
+        first = text.read(1)
+    if first == "[":
+        # A JSON array has to be parsed whole; JSON Lines streams
+        rows = json.loads(first + text.read())
+    else:
+        rows = _json_lines(first, text)
+    for row in rows:
+        if isinstance(row, UnreadableRow):
+            yield row
+        elif not isinstance(row, dict):
+            yield UnreadableRow("Each JSON row must be an object.")
+        else:
+            yield _normalize(row)
+
+
+def _json_lines(first, text):
+    line = first + text.readline()
+    while line:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield UnreadableRow(f"Not valid JSON: {exc}")
+        line = text.readline()
+
+
+def read_rows(file, file_format="csv"):
+    """
+    Yield row dicts from a binary file. CSV needs a header row (see
+    COLUMNS); JSON is either an array of objects or one object per line.
+
+    A row that can't be parsed is yielded as an UnreadableRow, so it is
+    reported with its number while the rows around it still import. Only
+    a file that fails before its first row raises CatalogImportError.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    rows = _csv_rows(text) if file_format == "csv" else _json_rows(text)
+    started = False
+    try:
+        for row in rows:
+            started = True
+            yield row
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as exc:
+        if isinstance(exc, UnicodeDecodeError):
+            message = "The file must be UTF-8 encoded."
+        else:
+            message = f"Could not read the file: {exc}"
+        if not started:
+            raise CatalogImportError(message)
+        yield UnreadableRow(f"{message} Nothing after this row was read.", last=True)
+    finally:
+        rows.close()
+        text.detach()  # leave the caller's file open
+
+
+# -------------------------
+# IMPORTING
+# -------------------------
+def category_lookup():
+    """Approved categories by lower-cased name and slug (one query)"""
+    lookup = {}
+    for pk, name, slug in Category.objects.filter(is_approved=True).values_list("pk", "name", "slug"):
+        lookup[name.strip().lower()] = pk
+        lookup[slug.lower()] = pk
+    return lookup
+
+
+def _build(seller, data):
+    product = Product(
+        seller=seller,
+        category_id=data["category"],
+        name=data["name"].strip(),
+        description=data["description"],
+        price=data["price"],
+        discounted_price=data["discounted_price"],
+        stock=data["stock"],
+        is_promoted=data["is_promoted"],
+        is_approved=False,  # New products need approval
+    )
+    product._store_price_info()  # no promotion yet: manual discount or price
+    return product
+
+
+def _insert(batch, allocated):
+    for product, slug in zip(batch, unique_slugs(Product.objects.all(), [p.name for p in batch], allocated)):
+        product.slug = slug
+    with transaction.atomic():
+        created = Product.objects.bulk_create(batch)
+        search.index_products([product.pk for product in created])
+    return len(created)
+
+
+def import_products(seller, rows, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """Validate `rows` (dicts) and create the valid ones for `seller`; returns an ImportResult"""
+    result = ImportResult(dry_run=dry_run)
+    categories = category_lookup()
+    allocated = set()
+    batch = []
+    form = ProductImportRowForm({}, categories=categories)
+
+    for number, row in enumerate(rows, start=1):
+        result.rows = number
+        if isinstance(row, UnreadableRow):
+            result.add_unreadable(number, row)
+            continue
+        form.rebind({key: row.get(key) for key in COLUMNS})
+        if not form.is_valid():
+            result.add_error(number, form)
+            continue
+        if dry_run:
+            continue
+        batch.append(_build(seller, form.cleaned_data))
+        if len(batch) >= batch_size:
+            result.created += _insert(batch, allocated)
+            batch = []
+
+    if batch:
+        result.created += _insert(batch, allocated)
+    return result
+
+
+def import_file(seller, file, file_format="csv", dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    return import_products(seller, read_rows(file, file_format), dry_run=dry_run, batch_size=batch_size)
+
+
+def guess_format(filename):
+    return "json" if filename.lower().endswith((".json", ".jsonl", ".ndjson")) else "csv"
@@ -0,0 +1,103 @@
+# products/category_cache.py
+"""
+Approved categories, cached.
+
+The list (id, name, slug, image URL) lives in the Django cache under a
+versioned key and in process memory. Category save/delete bumps the
+version (products.signals). With a shared cache (settings.CACHE_IS_SHARED)
+every worker sees the bump and reloads on its next read; with the
+per-process fallback only the saving worker does, so the version expires
+after CACHE_SECONDS and the others catch up within that.
+A warm read costs one cache get (the version) and no queries.
+"""
+
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+VERSION_KEY = "categories:version"
+DATA_KEY = "categories:list:{version}"
+SHARED = getattr(settings, "CACHE_IS_SHARED", False)
+CACHE_SECONDS = getattr(settings, "CATEGORY_CACHE_SECONDS", 60 * 60 * 24 if SHARED else 60)
+VERSION_SECONDS = None if SHARED else CACHE_SECONDS
+
+_local = {"version": None, "categories": None, "by_slug": None}
+_lock = threading.Lock()
+
+
+class CachedCategory:
+    """Read-only stand-in for Category in templates and filters"""
+
+    __slots__ = ("id", "name", "slug", "image_url")
+
+    def __init__(self, id, name, slug, image_url=""):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.image_url = image_url
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"<CachedCategory {self.slug}>"
+
+
+def _load():
+    from .models import Category
+
+    rows = Category.objects.filter(is_approved=True).order_by("name").only("id", "name", "slug", "image")
+    return [
+        (category.id, category.name, category.slug, category.image.url if category.image else "")
+        for category in rows
+    ]
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # Another worker may have set it first — use theirs
+        if not cache.add(VERSION_KEY, version, VERSION_SECONDS):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def get_categories():
+    """Approved categories ordered by name, as CachedCategory objects"""
+    version = _current_version()
+    if _local["version"] == version:
+        return _local["categories"]
+
+    key = DATA_KEY.format(version=version)
+    rows = cache.get(key)
+    if rows is None:
+        rows = _load()
+        cache.set(key, rows, CACHE_SECONDS)
+
+    categories = [CachedCategory(*row) for row in rows]
+    with _lock:
+        _local["categories"] = categories
+        _local["by_slug"] = {category.slug: category for category in categories}
+        _local["version"] = version
+    return categories
+
+
+def get_category_by_slug(slug):
+    """Approved category with this slug, or None"""
+    get_categories()
+    return _local["by_slug"].get(slug)
+
+
+def invalidate():
+    """Bump the version so readers of this cache reload on their next read"""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, VERSION_SECONDS)
+    with _lock:
+        _local["version"] = None
@@ -1,6 +1,6 @@
-from .models import Category
+from .category_cache import get_categories
 
 def categories_processor(request):
     return {
-        "categories": Category.objects.all()
+        "categories": get_categories()
     }
@@ -0,0 +1,215 @@
+# products/facets.py
+"""
+Faceted navigation for the buyer catalog.
+
+Facets: category, price bucket (on effective_price), on-sale and in-stock.
+Each facet's counts respect every *other* active filter (selecting a
+category doesn't zero out the other categories). All of them come from one
+grouped aggregate query — GROUP BY (category, bucket, on_sale, in_stock) —
+folded in Python, and the result is cached per filter signature for
+FACET_CACHE_SECONDS.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Count, F, IntegerField, Q, Value, When
+
+
+FACET_CACHE_SECONDS = getattr(settings, "FACET_CACHE_SECONDS", 120)
+
+# (key, label, low inclusive, high exclusive) — contiguous, on effective_price
+PRICE_BUCKETS = (
+    ("under-100", "Under K100", None, 100),
+    ("100-250", "K100 – K250", 100, 250),
+    ("250-500", "K250 – K500", 250, 500),
+    ("500-1000", "K500 – K1,000", 500, 1000),
+    ("1000-plus", "K1,000+", 1000, None),
+)
+BUCKET_KEYS = [key for key, _label, _low, _high in PRICE_BUCKETS]
+
+
+def parse_selection(params, category=None):
+    """Facet selection from request.GET (category already resolved by the view)"""
+    price = params.get("price")
+    return {
+        "category": category.pk if category else None,
+        "price": price if price in BUCKET_KEYS else None,
+        "on_sale": params.get("on_sale") == "1",
+        "in_stock": params.get("in_stock") == "1",
+    }
+
+
+# -----------------------------
+# FILTERING
+# -----------------------------
+def _bucket_q(key):
+    for bucket_key, _label, low, high in PRICE_BUCKETS:
+        if bucket_key == key:
+            q = Q()
+            if low is not None:
+                q &= Q(effective_price__gte=low)
+            if high is not None:
+                q &= Q(effective_price__lt=high)
+            return q
+    return Q()
+
+
+def facet_filters(selected, exclude=None):
+    """Q for the selected facets, optionally leaving one facet out"""
+    q = Q()
+    if selected["category"] and exclude != "category":
+        q &= Q(category_id=selected["category"])
+    if selected["price"] and exclude != "price":
+        q &= _bucket_q(selected["price"])
+    if selected["on_sale"] and exclude != "on_sale":
+        q &= Q(effective_price__lt=F("price"))
+    if selected["in_stock"] and exclude != "in_stock":
+        q &= Q(stock__gt=0)
+    return q
+
+
+def apply_facets(queryset, selected):
+    return queryset.filter(facet_filters(selected))
+
+
+# -----------------------------
+# COUNTING
+# -----------------------------
+def _bucket_expression():
+    whens = [
+        When(effective_price__lt=high, then=Value(index))
+        for index, (_key, _label, _low, high) in enumerate(PRICE_BUCKETS)
+        if high is not None
+    ]
+    return Case(*whens, default=Value(len(PRICE_BUCKETS) - 1), output_field=IntegerField())
+
+
+def _grouped_rows(queryset):
+    """One GROUP BY query: [(category_id, bucket index, on_sale, in_stock, count)]"""
+    rows = (
+        queryset
+        .order_by()
+        .annotate(
+            facet_bucket=_bucket_expression(),
+            facet_on_sale=Case(
+                When(effective_price__lt=F("price"), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            facet_in_stock=Case(
+                When(stock__gt=0, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+        .values("category_id", "facet_bucket", "facet_on_sale", "facet_in_stock")
+        .annotate(n=Count("id"))
+        .values_list("category_id", "facet_bucket", "facet_on_sale", "facet_in_stock", "n")
+    )
+    return [tuple(row) for row in rows]
+
+
+def _matches(row, selected, exclude):
+    category_id, bucket, on_sale, in_stock, _n = row
+    if selected["category"] and exclude != "category" and category_id != selected["category"]:
+        return False
+    if selected["price"] and exclude != "price" and BUCKET_KEYS[bucket] != selected["price"]:
+        return False
+    if selected["on_sale"] and exclude != "on_sale" and not on_sale:
+        return False
+    if selected["in_stock"] and exclude != "in_stock" and not in_stock:
+        return False
+    return True
+
+
+def fold_counts(rows, selected):
+    """Per-facet counts from the grouped rows, each ignoring its own filter"""
+    counts = {"category": {}, "price": {key: 0 for key in BUCKET_KEYS}, "on_sale": 0, "in_stock": 0, "total": 0}
+    for row in rows:
+        category_id, bucket, on_sale, in_stock, n = row
+        if _matches(row, selected, "category"):
+            counts["category"][category_id] = counts["category"].get(category_id, 0) + n
+        if _matches(row, selected, "price"):
+            counts["price"][BUCKET_KEYS[bucket]] += n
+        if on_sale and _matches(row, selected, "on_sale"):
+            counts["on_sale"] += n
+        if in_stock and _matches(row, selected, "in_stock"):
+            counts["in_stock"] += n
+        if _matches(row, selected, None):
+            counts["total"] += n
+    return counts
+
+
+def filter_signature(**params):
+    """Stable cache key for a combination of filter values"""
+    raw = "|".join(f"{name}={params[name] if params[name] is not None else ''}" for name in sorted(params))
+    return "catalog-facets:" + hashlib.md5(raw.encode()).hexdigest()
+
+
+def facet_counts(base_queryset, selected, signature):
+    """
+    Counts for every facet. `base_queryset` carries the non-facet filters
+    (visibility, search, min/max price); `signature` must identify them
+    plus `selected`.
+    """
+    counts = cache.get(signature)
+    if counts is None:
+        counts = fold_counts(_grouped_rows(base_queryset), selected)
+        cache.set(signature, counts, FACET_CACHE_SECONDS)
+    return counts
+
+
+# -----------------------------
+# TEMPLATE DATA
+# -----------------------------
+def _toggle_query(request, name, value):
+    params = request.GET.copy()
+    params.pop("cursor", None)
+    params.pop("page", None)
+    if value is None:
+        params.pop(name, None)
+    else:
+        params[name] = value
+    return params.urlencode()
+
+
+def build_facets(request, categories, counts, selected):
+    """Lists of {label, count, selected, query} ready for the sidebar"""
+    category_items = [
+        {
+            "label": category.name,
+            "count": counts["category"].get(category.pk, 0),
+            "selected": category.pk == selected["category"],
+            "query": _toggle_query(
+                request, "category",
+                None if category.pk == selected["category"] else category.slug,
+            ),
+        }
+        for category in categories
+    ]
+    price_items = [
+        {
+            "label": label,
+            "count": counts["price"][key],
+            "selected": key == selected["price"],
+            "query": _toggle_query(request, "price", None if key == selected["price"] else key),
+        }
+        for key, label, _low, _high in PRICE_BUCKETS
+    ]
+    flag_items = [
+        {
+            "label": label,
+            "count": counts[name],
+            "selected": selected[name],
+            "query": _toggle_query(request, name, None if selected[name] else "1"),
+        }
+        for name, label in (("on_sale", "On sale"), ("in_stock", "In stock"))
+    ]
+    return {
+        "categories": category_items,
+        "prices": price_items,
+        "flags": flag_items,
+        "total": counts["total"],
+    }
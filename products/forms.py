@@ -185,4 +185,59 @@ class PromotionForm(forms.ModelForm):
         if start_date and end_date and end_date < start_date:
             raise forms.ValidationError("End date cannot be earlier than start date.")
 
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+# -------------------------
+# BULK CATALOG IMPORT
+# -------------------------
+TRUE_VALUES = {"1", "true", "yes", "y", "on"}
+
+
+class ProductImportRowForm(forms.Form):
+    """
+    One row of a catalog import (products.catalog_import). Same rules as
+    ProductForm; the category is looked up by name or slug in a dict the
+    importer loads once, so validating a row runs no queries.
+    """
+
+    name = forms.CharField(max_length=255)
+    description = forms.CharField()
+    price = forms.DecimalField(max_digits=12, decimal_places=2, min_value=0)
+    discounted_price = forms.DecimalField(max_digits=12, decimal_places=2, min_value=0, required=False)
+    stock = forms.IntegerField(min_value=0, required=False)
+    category = forms.CharField(max_length=120)
+    is_promoted = forms.CharField(required=False)
+
+    def __init__(self, *args, categories=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.categories = categories or {}
+
+    def rebind(self, data):
+        """Validate another row with this form (building a new form per row deep-copies every field)"""
+        self.data = data
+        self._errors = None
+        return self
+
+    def clean_category(self):
+        value = self.cleaned_data["category"].strip().lower()
+        if value not in self.categories:
+            raise forms.ValidationError(f'Unknown or unapproved category "{self.cleaned_data["category"]}".')
+        return self.categories[value]
+
+    def clean_stock(self):
+        return self.cleaned_data["stock"] or 0
+
+    def clean_is_promoted(self):
+        return str(self.cleaned_data["is_promoted"]).strip().lower() in TRUE_VALUES
+
+    def clean(self):
+        cleaned_data = super().clean()
+        price = cleaned_data.get("price")
+        discounted_price = cleaned_data.get("discounted_price")
+
+        if discounted_price and price and discounted_price >= price:
+            raise forms.ValidationError(
+                "Discounted price must be less than the original price."
+            )
+
+        return cleaned_data
@@ -0,0 +1,71 @@
+# products/inventory.py
+"""
+Race-free stock changes.
+
+Stock is only ever decremented with a conditional UPDATE
+(`... SET stock = stock - n WHERE id = x AND stock >= n`), so the check
+and the write happen in the database in one statement and concurrent
+buyers can't both take the last unit.
+"""
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+
+class InsufficientStock(ValueError):
+    """One or more lines couldn't be reserved; nothing was reserved"""
+
+    def __init__(self, product_ids):
+        self.product_ids = list(product_ids)
+        super().__init__(f"Not enough stock for product(s) {', '.join(map(str, self.product_ids))}")
+
+
+def take_stock(product_id, quantity):
+    """Decrement stock if at least `quantity` is left; returns 1 on success, 0 otherwise"""
+    from .models import Product
+
+    return Product.objects.filter(pk=product_id, stock__gte=quantity).update(
+        stock=F("stock") - quantity,
+        sold_count=F("sold_count") + quantity,
+    )
+
+
+def reserve_stock(lines):
+    """
+    Reserve every (product_id, quantity) in `lines` atomically, with one
+    conditional UPDATE for the whole cart.
+
+    If any line lost the race the reservation is rolled back and every
+    short line is reported together in InsufficientStock. Call inside the
+    checkout's transaction so the stock also comes back if creating the
+    order fails.
+    """
+    from .models import Product
+
+    totals = {}
+    for product_id, quantity in lines:
+        totals[product_id] = totals.get(product_id, 0) + quantity
+    if not totals:
+        return
+
+    wanted = Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in totals.items()],
+        output_field=IntegerField(),
+    )
+    with transaction.atomic():
+        reserved = (
+            Product.objects
+            .filter(pk__in=totals.keys(), stock__gte=wanted)
+            .update(stock=F("stock") - wanted, sold_count=F("sold_count") + wanted)
+        )
+        if reserved == len(totals):
+            return
+        transaction.set_rollback(True)
+
+    # Which lines were short (for the message) — outside the rolled-back block
+    stock = dict(Product.objects.filter(pk__in=totals.keys()).values_list("pk", "stock"))
+    failed = [
+        product_id for product_id in sorted(totals)
+        if stock.get(product_id, 0) < totals[product_id]
+    ]
+    raise InsufficientStock(failed or sorted(totals))
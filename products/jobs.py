@@ -0,0 +1,46 @@
+# products/jobs.py
+"""Background job handlers for products (run by `manage.py run_jobs`)."""
+
+from django.utils.dateparse import parse_datetime
+
+from core import jobs
+
+from .models import Product
+
+
+DIGEST_MAX_LISTED = 50
+
+
+@jobs.handler("approval_digest")
+def approval_digests(payloads):
+    """
+    One email per seller listing every product approved in the given
+    admin approval batches (one query, one INSERT of email jobs).
+    """
+    stamps = {parse_datetime(payload["approved_at"]) for payload in payloads}
+    rows = (
+        Product.objects
+        .filter(approved_at__in=stamps, is_approved=True)
+        .values_list("seller_id", "seller__email", "seller__first_name", "seller__username", "name")
+        .order_by("seller_id", "name")
+    )
+
+    sellers = {}
+    for seller_id, email, first_name, username, name in rows:
+        seller = sellers.setdefault(seller_id, {"email": email, "name": first_name or username, "products": []})
+        seller["products"].append(name)
+
+    emails = []
+    for seller in sellers.values():
+        products = seller["products"]
+        listed = "\n".join(f"  • {name}" for name in products[:DIGEST_MAX_LISTED])
+        if len(products) > DIGEST_MAX_LISTED:
+            listed += f"\n  …and {len(products) - DIGEST_MAX_LISTED} more"
+        emails.append(jobs.email_payload(
+            subject=f"🎉 {len(products)} of your products have been approved!" if len(products) > 1
+            else "🎉 Your product has been approved!",
+            message=f"Hi {seller['name']},\n\nGreat news! These products are now live:\n\n{listed}\n",
+            recipient_list=[seller["email"]] if seller["email"] else [],
+        ))
+    jobs.enqueue_emails(emails)
+    return [None] * len(payloads)
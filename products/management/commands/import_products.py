@@ -0,0 +1,62 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from products import catalog_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import products for a seller from a CSV or JSON file. Columns: "
+        + ", ".join(catalog_import.COLUMNS)
+        + ". Products are created unapproved; invalid rows are skipped and reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV, JSON array or JSON Lines file")
+        parser.add_argument("--seller", required=True, help="Seller username or id")
+        parser.add_argument("--format", choices=catalog_import.FORMATS, help="Default: from the file extension")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; create nothing.")
+        parser.add_argument("--batch-size", type=int, default=catalog_import.IMPORT_BATCH_SIZE)
+        parser.add_argument("--max-errors", type=int, default=50, help="How many row errors to print.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        seller_ref = options["seller"]
+        lookup = {"pk": int(seller_ref)} if seller_ref.isdigit() else {"username": seller_ref}
+        try:
+            seller = User.objects.get(role="seller", **lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"No seller {seller_ref!r}.")
+
+        file_format = options["format"] or catalog_import.guess_format(options["path"])
+        started = time.monotonic()
+        try:
+            with open(options["path"], "rb") as file:
+                result = catalog_import.import_file(
+                    seller, file, file_format,
+                    dry_run=options["dry_run"],
+                    batch_size=options["batch_size"],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except catalog_import.CatalogImportError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.monotonic() - started
+
+        for number, messages in result.errors[:options["max_errors"]]:
+            self.stderr.write(f"  row {number}: {'; '.join(messages)}")
+        if len(result.errors) > options["max_errors"]:
+            self.stderr.write(f"  …and {len(result.errors) - options['max_errors']} more row error(s)")
+
+        if result.stopped_at:
+            self.stderr.write(self.style.WARNING(
+                f"The file could not be read past row {result.stopped_at}; the rows before it were processed."
+            ))
+
+        summary = f"{result.rows} row(s) read, {result.valid} valid, {len(result.errors)} rejected"
+        if result.dry_run:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {summary}. Nothing created ({elapsed:.1f}s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{summary}; created {result.created} product(s) in {elapsed:.1f}s."))
@@ -0,0 +1,84 @@
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from products.inventory import InsufficientStock, reserve_stock
+from products.models import Product
+from products.testdata import create_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one hot product with concurrent reserve_stock() calls from many "
+        "threads and check nothing was oversold. Creates a throwaway product "
+        "(committed, so every thread sees it) and deletes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--attempts", type=int, default=25, help="Checkouts per thread.")
+        parser.add_argument("--stock", type=int, default=100)
+        parser.add_argument("--quantity", type=int, default=1, help="Units per checkout.")
+
+    def handle(self, *args, **options):
+        product, cleanup = self._fixtures(options["stock"])
+        results = {"ok": 0, "sold_out": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def buyer():
+            try:
+                for _ in range(options["attempts"]):
+                    outcome = self._checkout(product.pk, options["quantity"])
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=buyer) for _ in range(options["threads"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        product.refresh_from_db(fields=["stock", "sold_count"])
+        cleanup()
+
+        sold = results["ok"] * options["quantity"]
+        self.stdout.write(
+            f"{options['threads']} threads x {options['attempts']} checkouts in {elapsed:.2f}s: "
+            f"{results['ok']} reserved, {results['sold_out']} rejected, {results['errors']} errors"
+        )
+        self.stdout.write(f"stock {options['stock']} -> {product.stock}, sold_count {product.sold_count}")
+
+        if product.stock + sold != options["stock"] or product.sold_count != sold:
+            raise CommandError("Stock accounting mismatch!")
+        if sold > options["stock"]:
+            raise CommandError(f"Oversold by {sold - options['stock']} unit(s)!")
+        self.stdout.write(self.style.SUCCESS("No oversell."))
+
+    def _checkout(self, product_id, quantity, retries=20):
+        for _ in range(retries):
+            try:
+                reserve_stock([(product_id, quantity)])
+                return "ok"
+            except InsufficientStock:
+                return "sold_out"
+            except OperationalError:
+                # SQLite: "database is locked" under write contention — retry
+                time.sleep(0.01)
+        return "errors"
+
+    def _fixtures(self, stock):
+        seller, category, [product] = create_catalog(f"loadtest-{uuid.uuid4().hex[:8]}", stock=stock)
+
+        def cleanup():
+            Product.objects.filter(pk=product.pk).delete()
+            category.delete()
+            seller.delete()
+
+        return product, cleanup
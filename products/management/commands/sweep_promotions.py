@@ -0,0 +1,82 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Product.effective_price / promo_active for promotions whose "
+        "start or end date crossed midnight (Africa/Lusaka). Run daily just after midnight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=1,
+            help="How many past midnights to cover (use more if the job was missed).",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-check every product instead of only recently started/ended promotions.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        since = today - timedelta(days=max(options["days"], 1))
+        batch_size = options["batch_size"]
+
+        products = Product.objects.all()
+        if not options["all"]:
+            products = products.filter(
+                # Promotion started since the last sweep
+                Q(promotion__start_date__gt=since, promotion__start_date__lte=today)
+                # ...or ended (last valid day was before today)
+                | Q(promotion__end_date__gte=since, promotion__end_date__lt=today)
+                # ...or the stored flag is stale (promotion removed / deactivated)
+                | Q(promo_active=True)
+            )
+
+        products = (
+            products
+            .with_effective_price(today)
+            .only("id", "effective_price", "promo_active")
+            .order_by("pk")
+        )
+
+        cent = Decimal("0.01")
+        checked = 0
+        changed = 0
+        batch = []
+
+        for product in products.iterator(chunk_size=batch_size):
+            checked += 1
+            live_price = Decimal(product.live_price).quantize(cent)
+            live_promo = bool(product.live_promo_active)
+
+            if product.effective_price == live_price and product.promo_active == live_promo:
+                continue
+
+            product.effective_price = live_price
+            product.promo_active = live_promo
+            batch.append(product)
+
+            if len(batch) >= batch_size:
+                Product.objects.bulk_update(batch, ["effective_price", "promo_active"])
+                changed += len(batch)
+                batch = []
+
+        if batch:
+            Product.objects.bulk_update(batch, ["effective_price", "promo_active"])
+            changed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} product(s), updated {changed} effective price(s) for {today}."
+        ))
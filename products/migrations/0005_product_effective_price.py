@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:31
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_effective_price(apps, schema_editor):
+    """Populate effective_price / promo_active for existing products"""
+    Product = apps.get_model('products', 'Product')
+    Promotion = apps.get_model('products', 'Promotion')
+    today = timezone.localdate()
+
+    live = {
+        promo.product_id: promo
+        for promo in Promotion.objects.filter(is_active=True, start_date__lte=today)
+        if promo.end_date is None or promo.end_date >= today
+    }
+
+    batch = []
+    for product in Product.objects.all().iterator(chunk_size=1000):
+        promo = live.get(product.pk)
+        if product.discounted_price is not None:
+            price = product.discounted_price
+        elif promo is not None:
+            if promo.discount_type == 'percentage':
+                discount = product.price * (promo.discount_value / Decimal('100'))
+            else:
+                discount = promo.discount_value
+            price = max(product.price - discount, Decimal('0'))
+        else:
+            price = product.price
+        product.effective_price = price
+        product.promo_active = promo is not None
+        batch.append(product)
+        if len(batch) >= 1000:
+            Product.objects.bulk_update(batch, ['effective_price', 'promo_active'])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ['effective_price', 'promo_active'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_alter_product_is_approved_alter_product_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, editable=False, help_text='What the buyer pays today (manual discount or live promotion applied)', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='promo_active',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_effective_price, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, editable=False, help_text='What the buyer pays today (manual discount or live promotion applied)', max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'is_approved', 'effective_price'], name='products_pr_is_acti_bb05f8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['promo_active'], name='products_pr_promo_a_88aebc_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Search side table for products.search — FTS5 on SQLite, tsvector + GIN on PostgreSQL
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS products_search USING fts5("
+            "name, description, category, shop, tokenize='porter unicode61')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS products_search ("
+            "product_id bigint PRIMARY KEY REFERENCES products_product(id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS products_search_document_gin "
+            "ON products_search USING GIN (document)"
+        )
+    else:
+        return
+
+    # Index whatever is already in the catalog
+    Product = apps.get_model('products', 'Product')
+    rows = Product.objects.values_list(
+        'id', 'name', 'description', 'category__name', 'seller__seller_profile__shop_name'
+    ).order_by()
+    rows = [(pk, name or '', desc or '', cat or '', shop or '') for pk, name, desc, cat, shop in rows]
+    if not rows:
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.executemany(
+                "INSERT INTO products_search (rowid, name, description, category, shop) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+        else:
+            cursor.executemany(
+                "INSERT INTO products_search (product_id, document) VALUES (%s, "
+                "setweight(to_tsvector('english', %s), 'A') || "
+                "setweight(to_tsvector('english', %s), 'C') || "
+                "setweight(to_tsvector('english', %s), 'B') || "
+                "setweight(to_tsvector('english', %s), 'B'))",
+                rows,
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS products_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_keyset_indexes'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='approved_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Set by the admin approval action; one timestamp per approval batch', null=True),
+        ),
+    ]
@@ -5,7 +5,16 @@ from django.conf import settings
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from decimal import Decimal
+
+from .inventory import InsufficientStock, take_stock
+from .slugs import unique_slug
+from .pricing import (
+    apply_discount,
+    build_price_info,
+    effective_price_expression,
+    promo_active_expression,
+    promotion_is_live,
+)
 
 
 User = settings.AUTH_USER_MODEL
@@ -42,11 +51,24 @@ class Category(models.Model):
         return f"{self.name} ({status})"
 
 
-from decimal import Decimal
 from django.db import models
 from django.utils import timezone
 from django.utils.text import slugify
 
+
+class ProductQuerySet(models.QuerySet):
+    def with_effective_price(self, today=None):
+        """
+        Annotate `live_price` / `live_promo_active` computed in SQL from the
+        current promotion window. The stored `effective_price` column is the
+        fast path for catalog queries; this is used to (re)compute it.
+        """
+        return self.annotate(
+            live_price=effective_price_expression(today),
+            live_promo_active=promo_active_expression(today),
+        )
+
+
 class Product(models.Model):
     seller = models.ForeignKey(
         User,
@@ -75,15 +97,33 @@ class Product(models.Model):
         help_text="Manual override price — takes priority over any promotion"
     )
 
+    # Denormalized pricing — kept in sync by save(), Promotion save/delete
+    # and the `sweep_promotions` command (promotion windows crossing midnight)
+    effective_price = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        editable=False,
+        help_text="What the buyer pays today (manual discount or live promotion applied)"
+    )
+    promo_active = models.BooleanField(default=False, editable=False)
+
     stock = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     is_promoted = models.BooleanField(default=False)
     is_approved = models.BooleanField(default=False)
+    approved_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Set by the admin approval action; one timestamp per approval batch"
+    )
 
     sold_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
         verbose_name = "Product"
@@ -94,22 +134,62 @@ class Product(models.Model):
             models.Index(fields=["seller"]),
             models.Index(fields=["category"]),
             models.Index(fields=["is_promoted"]),
+            models.Index(fields=["is_active", "is_approved", "effective_price"]),
+            models.Index(fields=["promo_active"]),
+            # Keyset pagination on (-created_at, -id)
+            models.Index(fields=["is_active", "is_approved", "-created_at", "-id"]),
+            models.Index(fields=["category", "-created_at", "-id"]),
         ]
 
+    PRICE_FIELDS = {"price", "discounted_price"}
+    SEARCH_FIELDS = {"name", "description", "category"}  # products.search document
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        product = super().from_db(db, field_names, values)
+        # What the search document was built from, so an unrelated save skips reindexing
+        if {"name", "description", "category_id"} <= set(field_names):
+            product._loaded_search_values = product._search_values()
+        return product
+
+    def _search_values(self):
+        return (self.name, self.description, self.category_id)
+
     # -----------------------------
     # SAVE
     # -----------------------------
     def save(self, *args, **kwargs):
         if not self.slug:
-            base_slug = slugify(self.name)
-            slug = base_slug
-            counter = 1
-            while Product.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            self.slug = unique_slug(Product.objects.exclude(pk=self.pk), self.name)
+
+        # Keep the stored effective price in sync, unless this is a partial
+        # save that doesn't touch any price input (e.g. reduce_stock)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or self.PRICE_FIELDS.intersection(update_fields):
+            self._price_info = None
+            self._store_price_info()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"effective_price", "promo_active"}
+
         super().save(*args, **kwargs)
 
+    def _store_price_info(self):
+        info = self.price_info
+        self.effective_price = info.current_price
+        self.promo_active = info.has_active_promotion
+
+    def refresh_effective_price(self):
+        """
+        Recompute effective_price / promo_active and write just those columns.
+        Called when this product's promotion changes.
+        """
+        self._price_info = None
+        self._store_price_info()
+        Product.objects.filter(pk=self.pk).update(
+            effective_price=self.effective_price,
+            promo_active=self.promo_active,
+        )
+
     # -----------------------------
     # STOCK
     # -----------------------------
@@ -117,67 +197,51 @@ class Product(models.Model):
         return self.stock > 0
 
     def reduce_stock(self, quantity: int):
-        if quantity > self.stock:
-            raise ValueError("Not enough stock available")
-        self.stock -= quantity
-        self.sold_count += quantity
-        self.save(update_fields=["stock", "sold_count"])
+        """Conditional UPDATE — safe against concurrent buyers (see products.inventory)"""
+        if not take_stock(self.pk, quantity):
+            raise InsufficientStock([self.pk])
+        self.refresh_from_db(fields=["stock", "sold_count"])
 
     # -----------------------------
-    # PROMOTION (CRASH-PROOF)
+    # PRICING (BUSINESS LOGIC)
     # -----------------------------
     @property
-    def active_promotion(self):
+    def price_info(self):
         """
-        Returns the currently valid promotion or None.
-        NEVER raises RelatedObjectDoesNotExist.
+        Resolved pricing, cached on the instance.
+        Listing views pre-fill this in bulk via products.pricing.resolve_prices;
+        otherwise it is resolved here from this product's own promotion.
         """
-        promo = getattr(self, "promotion", None)
-        if not promo:
-            return None
-
-        today = timezone.now().date()
+        info = getattr(self, "_price_info", None)
+        if info is None:
+            # NEVER raises RelatedObjectDoesNotExist
+            promo = getattr(self, "promotion", None)
+            if not promotion_is_live(promo, timezone.localdate()):
+                promo = None
+            info = self._price_info = build_price_info(self, promo)
+        return info
 
-        if not promo.is_active:
-            return None
-        if promo.start_date > today:
-            return None
-        if promo.end_date and promo.end_date < today:
-            return None
-
-        return promo
+    @property
+    def active_promotion(self):
+        """Returns the currently valid promotion or None."""
+        return self.price_info.promotion
 
-    # -----------------------------
-    # PRICING (BUSINESS LOGIC)
-    # -----------------------------
     @property
     def current_price(self):
         """Final price customer pays"""
-        # 1. Manual override (highest priority)
-        if self.discounted_price is not None:
-            return self.discounted_price
-
-        # 2. Active promotion
-        promo = self.active_promotion
-        if promo:
-            return promo.get_discounted_price(self.price)
-
-        # 3. Regular price
-        return self.price
+        return self.price_info.current_price
 
     @property
     def has_active_promotion(self):
-        return self.active_promotion is not None
+        return self.price_info.has_active_promotion
 
     @property
     def savings_amount(self):
-        if self.current_price < self.price:
-            return self.price - self.current_price
-        return Decimal("0.00")
+        return self.price_info.savings_amount
 
     @property
     def has_savings(self):
-        return self.savings_amount > Decimal("0.00")
+        return self.price_info.has_savings
 
     # -----------------------------
     # MEDIA
@@ -227,7 +291,6 @@ class DeliveryOption(models.Model):
         days = f" ({self.estimated_days} days)" if self.estimated_days else ""
         return f"{self.name}{days} - K{self.price}"
 
-from decimal import Decimal
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -292,17 +355,23 @@ class Promotion(models.Model):
         if self.end_date and self.start_date > self.end_date:
             raise ValidationError("End date cannot be earlier than start date.")
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        product = self.product
+        Product.promotion.related.set_cached_value(product, self)
+        product.refresh_effective_price()
+
+    def delete(self, *args, **kwargs):
+        product = self.product
+        result = super().delete(*args, **kwargs)
+        Product.promotion.related.set_cached_value(product, None)
+        product.refresh_effective_price()
+        return result
+
     @property
     def is_valid(self):
         """Check if promotion is currently valid"""
-        today = timezone.now().date()
-        if not self.is_active:
-            return False
-        if self.start_date > today:
-            return False
-        if self.end_date and self.end_date < today:
-            return False
-        return True
+        return promotion_is_live(self, timezone.localdate())
 
     def get_discounted_price(self, original_price=None):
         """Safely apply discount"""
@@ -310,10 +379,4 @@ class Promotion(models.Model):
             return original_price
 
         price = original_price or self.product.price
-
-        if self.discount_type == "percentage":
-            discount = price * (self.discount_value / Decimal("100"))
-        else:
-            discount = self.discount_value
-
-        return max(price - discount, Decimal("0"))
+        return apply_discount(price, self.discount_type, self.discount_value)
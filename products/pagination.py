@@ -0,0 +1,211 @@
+# products/pagination.py
+
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = getattr(settings, "CATALOG_PAGE_SIZE", 24)
+MAX_PAGE_SIZE = getattr(settings, "CATALOG_MAX_PAGE_SIZE", 96)
+COUNT_CAP = getattr(settings, "CATALOG_COUNT_CAP", 1000)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    """One page of keyset (cursor) pagination results"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None,
+                 page_size=DEFAULT_PAGE_SIZE, total_count=None, count_is_exact=True):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.page_size = page_size
+        self.total_count = total_count
+        self.count_is_exact = count_is_exact
+        self.next_query = ""
+        self.previous_query = ""
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _parse_ordering(ordering):
+    return [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+
+def _encode_cursor(values, direction):
+    raw = json.dumps({"k": values, "d": direction}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(token, model, fields):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = data["k"], data["d"]
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise InvalidCursor("Malformed cursor")
+
+    if direction not in ("n", "p") or len(values) != len(fields):
+        raise InvalidCursor("Cursor does not match this listing")
+
+    decoded = []
+    for (name, _desc), value in zip(fields, values):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotation (e.g. search_rank) — JSON already kept the number
+            if not isinstance(value, (int, float)):
+                raise InvalidCursor("Cursor does not match this listing")
+            decoded.append(value)
+            continue
+        try:
+            decoded.append(field.to_python(value))
+        except ValidationError:
+            raise InvalidCursor("Cursor does not match this listing")
+    return decoded, direction
+
+
+def _seek_filter(fields, values, forward):
+    """
+    Build the row-value comparison `(a, b, ...) > (x, y, ...)` as OR'd
+    prefix matches, honouring per-field direction. `forward=False` seeks
+    backwards (for the previous page).
+    """
+    condition = Q()
+    for i, (name, desc) in enumerate(fields):
+        lookup = "lt" if desc == forward else "gt"
+        clause = Q(**{f"{name}__{lookup}": values[i]})
+        for j in range(i):
+            clause &= Q(**{fields[j][0]: values[j]})
+        condition |= clause
+    return condition
+
+
+def _key_for(obj, fields):
+    return [getattr(obj, name) for name, _desc in fields]
+
+
+def approximate_count(queryset, cap=COUNT_CAP):
+    """
+    Count at most `cap` + 1 rows, so the cost is bounded however big the
+    listing gets. Returns (count, is_exact).
+    """
+    count = queryset.order_by()[:cap + 1].count()
+    if count > cap:
+        return cap, False
+    return count, True
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE):
+    try:
+        size = int(request.GET.get("per_page", default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE, with_count=False):
+    """
+    Paginate `queryset` by seeking on `ordering` (e.g. ("-created_at", "-id")),
+    so page N costs the same as page 1. The last ordering field must be unique.
+
+    `cursor` is an opaque token from a previous page's next/previous cursor;
+    an invalid token falls back to the first page.
+    """
+    fields = _parse_ordering(ordering)
+    model = queryset.model
+
+    values, direction = None, "n"
+    if cursor:
+        try:
+            values, direction = _decode_cursor(cursor, model, fields)
+        except InvalidCursor:
+            values, direction = None, "n"
+
+    forward = direction == "n"
+    qs = queryset
+    if values is not None:
+        qs = qs.filter(_seek_filter(fields, values, forward))
+
+    if forward:
+        qs = qs.order_by(*ordering)
+    else:
+        qs = qs.order_by(*[name[1:] if name.startswith("-") else f"-{name}" for name in ordering])
+
+    rows = list(qs[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if not forward:
+        rows.reverse()
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if (forward and has_more) or (not forward and values is not None):
+            next_cursor = _encode_cursor(_key_for(rows[-1], fields), "n")
+        if (forward and values is not None) or (not forward and has_more):
+            previous_cursor = _encode_cursor(_key_for(rows[0], fields), "p")
+
+    total_count, exact = (None, True)
+    if with_count:
+        total_count, exact = approximate_count(queryset)
+
+    return KeysetPage(
+        rows,
+        next_cursor=next_cursor,
+        previous_cursor=previous_cursor,
+        page_size=page_size,
+        total_count=total_count,
+        count_is_exact=exact,
+    )
+
+
+def cursor_querystring(request, cursor):
+    """Current query string with `cursor` replaced (for next/prev links)"""
+    params = request.GET.copy()
+    params.pop("cursor", None)
+    params.pop("page", None)
+    if cursor:
+        params["cursor"] = cursor
+    return params.urlencode()
+
+
+def paginate_request(request, queryset, ordering, with_count=False):
+    """
+    keyset_paginate() driven by the request's `cursor` / `per_page` params.
+    The returned page also carries ready-made `next_query` / `previous_query`
+    strings for the template links.
+    """
+    page = keyset_paginate(
+        queryset,
+        ordering,
+        cursor=request.GET.get("cursor"),
+        page_size=get_page_size(request),
+        with_count=with_count,
+    )
+    page.next_query = cursor_querystring(request, page.next_cursor) if page.has_next else ""
+    page.previous_query = cursor_querystring(request, page.previous_cursor) if page.has_previous else ""
+    return page
@@ -0,0 +1,169 @@
+# products/pricing.py
+
+from decimal import Decimal
+
+from django.db.models import BooleanField, Case, DecimalField, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+
+ZERO = Decimal("0.00")
+
+
+def apply_discount(price, discount_type, discount_value):
+    """Apply a promotion discount to a price (never below zero)"""
+    if discount_type == "percentage":
+        discount = price * (discount_value / Decimal("100"))
+    else:
+        discount = discount_value
+    return max(price - discount, Decimal("0"))
+
+
+def promotion_is_live(promo, today):
+    """Same rules as Promotion.is_valid, but against a fixed 'today'"""
+    if promo is None or not promo.is_active:
+        return False
+    if promo.start_date > today:
+        return False
+    if promo.end_date and promo.end_date < today:
+        return False
+    return True
+
+
+class PriceInfo:
+    """
+    Resolved pricing for a single product.
+    Built once per product and cached on the instance as `_price_info`.
+    """
+
+    __slots__ = ("price", "current_price", "promotion")
+
+    def __init__(self, price, current_price, promotion=None):
+        self.price = price
+        self.current_price = current_price
+        self.promotion = promotion
+
+    @property
+    def has_active_promotion(self):
+        return self.promotion is not None
+
+    @property
+    def savings_amount(self):
+        if self.current_price < self.price:
+            return self.price - self.current_price
+        return ZERO
+
+    @property
+    def has_savings(self):
+        return self.savings_amount > ZERO
+
+
+def build_price_info(product, promo):
+    """
+    Resolve the final price for `product` given its live promotion (or None).
+    Priority: manual discounted_price → active promotion → regular price.
+    """
+    if product.discounted_price is not None:
+        current = product.discounted_price
+    elif promo is not None:
+        current = apply_discount(product.price, promo.discount_type, promo.discount_value)
+    else:
+        current = product.price
+    return PriceInfo(product.price, current, promo)
+
+
+def resolve_prices(products, today=None):
+    """
+    Resolve pricing for many products in one pass.
+
+    Accepts a queryset or any iterable of Product instances. All live
+    promotions are fetched with a single query and each product gets a
+    cached PriceInfo, so `current_price`, `savings_amount`,
+    `active_promotion` etc. no longer hit the database per row.
+
+    A queryset is evaluated in place and returned as-is, so templates can
+    keep using it (e.g. `products.count` reads the result cache).
+    """
+    from .models import Product, Promotion
+
+    items = list(products)
+    if not items:
+        return products
+
+    today = today or timezone.localdate()
+
+    pending = [p for p in items if getattr(p, "_price_info", None) is None]
+    if not pending:
+        return products
+
+    promos = {
+        promo.product_id: promo
+        for promo in Promotion.objects.filter(
+            product_id__in=[p.pk for p in pending],
+            is_active=True,
+            start_date__lte=today,
+        ).filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=today)
+        )
+    }
+
+    for product in pending:
+        promo = promos.get(product.pk)
+        if promo is not None:
+            # Fill the reverse one-to-one cache so `product.promotion` is free too
+            Promotion.product.field.set_cached_value(promo, product)
+            Product.promotion.related.set_cached_value(product, promo)
+        product._price_info = build_price_info(product, promo)
+
+    return products
+
+
+
+def live_promotion_q(today, prefix="promotion__"):
+    """Q matching rows whose promotion (reached via `prefix`) is live on `today`"""
+    return Q(**{
+        f"{prefix}is_active": True,
+        f"{prefix}start_date__lte": today,
+    }) & (
+        Q(**{f"{prefix}end_date__isnull": True})
+        | Q(**{f"{prefix}end_date__gte": today})
+    )
+
+
+def effective_price_expression(today=None):
+    """
+    SQL version of build_price_info for Product querysets:
+    manual discounted_price → live promotion (percentage / fixed) → price.
+    """
+    today = today or timezone.localdate()
+    output = DecimalField(max_digits=12, decimal_places=2)
+    live = live_promotion_q(today)
+    zero = Value(Decimal("0"), output_field=output)
+
+    return Case(
+        When(discounted_price__isnull=False, then=F("discounted_price")),
+        When(
+            live & Q(promotion__discount_type="percentage"),
+            then=Greatest(
+                F("price") - F("price") * F("promotion__discount_value") / Value(Decimal("100")),
+                zero,
+                output_field=output,
+            ),
+        ),
+        When(
+            live,
+            then=Greatest(F("price") - F("promotion__discount_value"), zero, output_field=output),
+        ),
+        default=F("price"),
+        output_field=output,
+    )
+
+
+def promo_active_expression(today=None):
+    """SQL flag: does a live promotion apply to this product today?"""
+    today = today or timezone.localdate()
+    return Case(
+        When(live_promotion_q(today), then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
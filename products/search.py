@@ -0,0 +1,187 @@
+# products/search.py
+"""
+Full-text product search.
+
+One API over two engines:
+- SQLite: an FTS5 virtual table (porter stemming, bm25 ranking)
+- PostgreSQL: a weighted tsvector table with a GIN index (ts_rank)
+
+Both live in a side table keyed by product id (`products_search`), created
+by migration 0007 and kept current by products.signals plus the
+`rebuild_search_index` management command. Any other database falls back
+to icontains matching without ranking.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_TABLE = "products_search"
+SEARCH_ORDERING = ("-search_rank", "-id")
+
+# Column weights: name, description, category, shop
+SQLITE_WEIGHTS = "10.0, 1.0, 4.0, 2.0"
+PG_CONFIG = "english"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _vendor():
+    return connection.vendor
+
+
+def is_supported():
+    return _vendor() in ("sqlite", "postgresql")
+
+
+# -----------------------------
+# QUERYING
+# -----------------------------
+def _fts5_query(query):
+    """Turn free text into a safe FTS5 MATCH string (AND of terms, last one as prefix)"""
+    terms = _WORD_RE.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_products(queryset, query):
+    """
+    Filter a Product queryset to rows matching `query` and annotate
+    `search_rank` (higher = more relevant). Order with SEARCH_ORDERING.
+    """
+    query = (query or "").strip()
+    if not query:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    table = connection.ops.quote_name(SEARCH_TABLE)
+    pk = f"{connection.ops.quote_name(queryset.model._meta.db_table)}.id"
+    vendor = _vendor()
+
+    if vendor == "sqlite":
+        match = _fts5_query(query)
+        if match is None:
+            return queryset.none()
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({table}, {SQLITE_WEIGHTS}) FROM {table} "
+                f"WHERE {table} MATCH %s AND rowid = {pk}",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    if vendor == "postgresql":
+        tsquery = f"websearch_to_tsquery('{PG_CONFIG}', %s)"
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT product_id FROM {table} WHERE document @@ {tsquery}", [query])
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT ts_rank(document, {tsquery}) FROM {table} WHERE product_id = {pk}",
+                [query],
+                output_field=FloatField(),
+            )
+        )
+
+    # Fallback: unranked substring match
+    return queryset.filter(
+        Q(name__icontains=query)
+        | Q(description__icontains=query)
+        | Q(category__name__icontains=query)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+# -----------------------------
+# INDEXING
+# -----------------------------
+def _documents(product_ids):
+    from .models import Product
+
+    return (
+        Product.objects
+        .filter(id__in=product_ids)
+        .values_list("id", "name", "description", "category__name", "seller__seller_profile__shop_name")
+        .order_by()
+    )
+
+
+def index_products(product_ids):
+    """(Re)index the given products in one batch"""
+    product_ids = list(product_ids)
+    if not product_ids or not is_supported():
+        return 0
+
+    rows = [
+        (pk, name or "", description or "", category or "", shop or "")
+        for pk, name, description, category, shop in _documents(product_ids)
+    ]
+    table = connection.ops.quote_name(SEARCH_TABLE)
+
+    with connection.cursor() as cursor:
+        if _vendor() == "sqlite":
+            # FTS5 has no upsert — delete then insert
+            _delete(cursor, product_ids)
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, name, description, category, shop) VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {table} (product_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'A') || "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'C') || "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'B') || "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'B')) "
+                f"ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                rows,
+            )
+            # Products that vanished between the signal and now
+            missing = set(product_ids) - {row[0] for row in rows}
+            if missing:
+                _delete(cursor, missing)
+    return len(rows)
+
+
+def _delete(cursor, product_ids):
+    table = connection.ops.quote_name(SEARCH_TABLE)
+    key = "rowid" if _vendor() == "sqlite" else "product_id"
+    product_ids = list(product_ids)
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({placeholders})", product_ids)
+
+
+def remove_products(product_ids):
+    product_ids = list(product_ids)
+    if not product_ids or not is_supported():
+        return
+    with connection.cursor() as cursor:
+        _delete(cursor, product_ids)
+
+
+def rebuild_index(batch_size=1000):
+    """Drop every indexed row and re-index all products in batches"""
+    from .models import Product
+
+    if not is_supported():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {connection.ops.quote_name(SEARCH_TABLE)}")
+
+    total = 0
+    batch = []
+    for pk in Product.objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=batch_size):
+        batch.append(pk)
+        if len(batch) >= batch_size:
+            total += index_products(batch)
+            batch = []
+    if batch:
+        total += index_products(batch)
+    return total
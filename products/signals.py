@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import SellerProfile
+from .models import Category, Product
+from . import autocomplete, category_cache, search
+
+
+# Keep the full-text search index (products.search) in sync.
+# Writes go through the same connection/transaction as the model change.
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # Stock / price / approval saves don't change the document
+    if update_fields is not None and not Product.SEARCH_FIELDS.intersection(update_fields):
+        return
+    values = instance._search_values()
+    if getattr(instance, "_loaded_search_values", None) == values:
+        return
+    search.index_products([instance.pk])
+    instance._loaded_search_values = values
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    search.index_products(instance.products.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=SellerProfile)
+def reindex_seller_products(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created or raw:
+        return
+    if update_fields is not None and "shop_name" not in update_fields:
+        return
+    if getattr(instance, "_loaded_shop_name", None) == instance.shop_name:
+        return
+    search.index_products(Product.objects.filter(seller_id=instance.user_id).values_list("pk", flat=True))
+    instance._loaded_shop_name = instance.shop_name
+
+
+# Keep this worker's autocomplete index (products.autocomplete) in sync.
+# Nothing to do until the index has been built in this process.
+
+@receiver(post_save, sender=Product)
+def update_product_suggestion(sender, instance, raw=False, **kwargs):
+    index = autocomplete.current_index()
+    if index is None or raw:
+        return
+    if instance.is_active and instance.is_approved:
+        index.add(*autocomplete.product_entry(instance))
+    else:
+        index.remove(f"product:{instance.pk}")
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_suggestion(sender, instance, **kwargs):
+    index = autocomplete.current_index()
+    if index is not None:
+        index.remove(f"product:{instance.pk}")
+
+
+@receiver(post_save, sender=Category)
+def update_category_suggestion(sender, instance, raw=False, **kwargs):
+    index = autocomplete.current_index()
+    if index is None or raw:
+        return
+    if instance.is_approved:
+        index.add(*autocomplete.category_entry(instance))
+    else:
+        index.remove(f"category:{instance.pk}")
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_suggestion(sender, instance, **kwargs):
+    index = autocomplete.current_index()
+    if index is not None:
+        index.remove(f"category:{instance.pk}")
+
+
+# Cached category list (products.category_cache) — bump the version once
+# the change is committed, so no reader caches the old rows again.
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, **kwargs):
+    transaction.on_commit(category_cache.invalidate)
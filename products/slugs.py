@@ -0,0 +1,96 @@
+# products/slugs.py
+"""
+Unique slug allocation: "red-shoes", then "red-shoes-1", "red-shoes-2", …
+
+Rather than one exists() query per candidate, the candidates are checked
+together with `slug IN (…)`: the base plus a window of suffixes in one
+query, and another window only if all of those are taken. IN uses the
+slug index on every database (SQLite can't use it for LIKE 'base-%').
+unique_slugs() does the same for a whole batch of names (bulk import).
+"""
+
+from collections import Counter
+
+from django.utils.text import slugify
+
+
+FALLBACK = "product"
+IN_CHUNK_SIZE = 500
+SUFFIX_WINDOW = 10
+
+
+def base_slug(value):
+    return slugify(value) or FALLBACK
+
+
+def _suffixed(base, number):
+    return f"{base}-{number}" if number else base
+
+
+def _existing(queryset, slugs):
+    slugs = list(slugs)
+    found = set()
+    for start in range(0, len(slugs), IN_CHUNK_SIZE):
+        found.update(queryset.filter(slug__in=slugs[start:start + IN_CHUNK_SIZE]).values_list("slug", flat=True))
+    return found
+
+
+def unique_slug(queryset, value):
+    """A free slug for `value` among `queryset`'s rows (usually one query)"""
+    base = base_slug(value)
+    first = 0
+    while True:
+        candidates = [_suffixed(base, number) for number in range(first, first + SUFFIX_WINDOW + 1)]
+        taken = _existing(queryset, candidates)
+        for slug in candidates:
+            if slug not in taken:
+                return slug
+        first += SUFFIX_WINDOW + 1
+
+
+def _free_suffixes(queryset, needed, taken):
+    """{base: iterator of free suffixed slugs}, needed[base] of them each"""
+    free = {base: [] for base in needed}
+    next_number = dict.fromkeys(needed, 1)
+    pending = dict(needed)
+    while pending:
+        windows = {
+            base: [_suffixed(base, number) for number in range(next_number[base], next_number[base] + count + SUFFIX_WINDOW)]
+            for base, count in pending.items()
+        }
+        used = _existing(queryset, (slug for window in windows.values() for slug in window))
+        for base, window in windows.items():
+            free[base].extend(slug for slug in window if slug not in used and slug not in taken)
+            next_number[base] += len(window)
+        pending = {base: count - len(free[base]) for base, count in needed.items() if len(free[base]) < count}
+    return {base: iter(slugs) for base, slugs in free.items()}
+
+
+def unique_slugs(queryset, values, allocated=None):
+    """
+    Free, mutually distinct slugs for `values`, in order. `allocated`
+    is a set of slugs already handed out but maybe not saved yet; it is
+    updated with the new slugs, so the same set can be passed to every
+    batch of an import.
+    """
+    allocated = set() if allocated is None else allocated
+    bases = [base_slug(value) for value in values]
+    taken = _existing(queryset, set(bases)) | allocated
+
+    # The first use of a free base keeps it; every other use gets a suffix
+    counts = Counter(bases)
+    bare = {base for base in counts if base not in taken}
+    taken |= bare
+    needed = {base: count - (base in bare) for base, count in counts.items() if count > (base in bare)}
+    suffixed = _free_suffixes(queryset, needed, taken)
+
+    slugs = []
+    for base in bases:
+        if base in bare:
+            bare.discard(base)
+            slug = base
+        else:
+            slug = next(suffixed[base])
+        allocated.add(slug)
+        slugs.append(slug)
+    return slugs
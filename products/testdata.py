@@ -0,0 +1,59 @@
+# products/testdata.py
+"""
+Throwaway catalog rows for tests and the benchmark / load-test commands.
+
+Everything is bulk-created. For the seller that skips the users signals,
+which would otherwise create its profile rows; for products it skips
+Product.save(), so effective_price is filled from price here, and
+store_effective_prices() recomputes it once promotions are added.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from .models import Category, Product
+
+
+def create_seller(username):
+    User = get_user_model()
+    User.objects.bulk_create([User(username=username, email=f"{username}@example.com", role="seller")])
+    return User.objects.get(username=username)
+
+
+def create_catalog(tag, count=1, price=Decimal("10.00"), stock=10):
+    """
+    A seller and an approved category both named `tag`, plus `count` approved
+    products with slugs `{tag}-0`, `{tag}-1`, … (returned in that order).
+    """
+    seller = create_seller(tag)
+    category = Category.objects.create(name=tag, is_approved=True)
+    Product.objects.bulk_create([
+        Product(
+            seller=seller,
+            category=category,
+            name=f"{tag} {i}",
+            slug=f"{tag}-{i}",
+            description="",
+            price=price,
+            effective_price=price,
+            stock=stock,
+            is_approved=True,
+        )
+        for i in range(count)
+    ])
+    products = list(Product.objects.filter(category=category).order_by("id"))
+    return seller, category, products
+
+
+def store_effective_prices(products):
+    """Recompute the stored price columns, e.g. after Promotion.objects.bulk_create"""
+    live = {
+        product.pk: product
+        for product in Product.objects.filter(pk__in=[product.pk for product in products]).with_effective_price()
+    }
+    cent = Decimal("0.01")
+    for product in products:
+        product.effective_price = Decimal(live[product.pk].live_price).quantize(cent)
+        product.promo_active = bool(live[product.pk].live_promo_active)
+    Product.objects.bulk_update(products, ["effective_price", "promo_active"])
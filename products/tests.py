@@ -1,3 +1,266 @@
-from django.test import TestCase
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from users.models import SellerProfile
+
+from . import autocomplete
+from .inventory import InsufficientStock, reserve_stock
+from .models import Category, Product
+from .testdata import create_catalog, create_seller
+
+
+class ReserveStockConcurrencyTests(TransactionTestCase):
+    """Concurrent checkouts of one product must never oversell it"""
+
+    STOCK = 40
+    THREADS = 8
+    ATTEMPTS = 10  # per thread: 80 checkouts for 40 units
+
+    def setUp(self):
+        _seller, _category, [self.product] = create_catalog("hot-sku", stock=self.STOCK)
+
+    def _retry(self, func, retries=200):
+        for _ in range(retries):
+            try:
+                return func()
+            except OperationalError:
+                # SQLite: the table is locked by another writer — retry
+                time.sleep(0.005)
+        raise AssertionError(f"Still locked after {retries} tries")
+
+    def _checkout(self, quantity=1):
+        def attempt():
+            try:
+                reserve_stock([(self.product.pk, quantity)])
+                return "ok"
+            except InsufficientStock:
+                return "sold_out"
+        return self._retry(attempt)
+
+    def _stock(self):
+        return self._retry(lambda: Product.objects.values_list("stock", flat=True).get(pk=self.product.pk))
+
+    def test_concurrent_reservations_never_oversell(self):
+        results = {"ok": 0, "sold_out": 0}
+        failures = []
+        lowest = [self.STOCK]
+        lock = threading.Lock()
+        start = threading.Barrier(self.THREADS)
+
+        def buyer():
+            try:
+                start.wait()
+                for _ in range(self.ATTEMPTS):
+                    outcome = self._checkout()
+                    stock = self._stock()
+                    with lock:
+                        results[outcome] += 1
+                        lowest[0] = min(lowest[0], stock)
+            except Exception as exc:
+                failures.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buyer) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.product.refresh_from_db(fields=["stock", "sold_count"])
+        self.assertEqual(failures, [])
+        self.assertGreaterEqual(lowest[0], 0)
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(results["ok"], self.STOCK)
+        self.assertEqual(results["sold_out"], self.THREADS * self.ATTEMPTS - self.STOCK)
+        self.assertEqual(self.product.sold_count, self.STOCK)
+
+    def test_short_line_rolls_back_whole_reservation(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve_stock([(self.product.pk, self.STOCK + 1)])
+        self.assertEqual(raised.exception.product_ids, [self.product.pk])
+        self.product.refresh_from_db(fields=["stock"])
+        self.assertEqual(self.product.stock, self.STOCK)
+
+
+class SearchIndexSignalTests(TestCase):
+    """Saves only reindex when a searchable field changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = create_seller("seller")
+        cls.category = Category.objects.create(name="Shoes", is_approved=True)
+        cls.product = Product.objects.create(
+            seller=cls.seller, category=cls.category, name="Red shoe", description="", price=Decimal("10.00"), stock=5,
+        )
+
+    def setUp(self):
+        patcher = mock.patch("products.signals.search.index_products")
+        self.index_products = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_partial_save_of_other_fields_skips(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.stock = 3
+        product.save(update_fields=["stock"])
+        self.index_products.assert_not_called()
+
+    def test_full_save_without_changes_skips(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.price = Decimal("12.00")
+        product.save()
+        self.index_products.assert_not_called()
+
+    def test_name_change_reindexes(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.name = "Blue shoe"
+        product.save()
+        self.index_products.assert_called_once_with([product.pk])
+
+    def test_shop_name_change_reindexes_seller(self):
+        SellerProfile.objects.create(user=self.seller, shop_name="Shop")
+        profile = SellerProfile.objects.get(user=self.seller)
+        profile.shop_description = "New"
+        profile.save()
+        self.index_products.assert_not_called()
+
+        profile.shop_name = "Better shop"
+        profile.save()
+        self.index_products.assert_called_once()
+        self.assertEqual(list(self.index_products.call_args.args[0]), [self.product.pk])
+
+
+class SuggestionIndexTests(SimpleTestCase):
+    def index(self, *entries):
+        index = autocomplete.SuggestionIndex()
+        for key, label, kind, score in entries:
+            index.add(key, label, kind, f"/{key}/", score)
+        return index
+
+    def labels(self, index, query, limit=8):
+        return [suggestion["label"] for suggestion in index.suggest(query, limit=limit)]
+
+    def test_tokenize(self):
+        self.assertEqual(autocomplete.tokenize("Chitenge-Print  DRESS, size 12"), ["chitenge", "print", "dress", "size", "12"])
+        self.assertEqual(autocomplete.tokenize(None), [])
+
+    def test_prefix_matches_any_word(self):
+        index = self.index(("p:1", "Red leather shoe", "product", 0), ("p:2", "Leather bag", "product", 0))
+        self.assertEqual(sorted(self.labels(index, "lea")), ["Leather bag", "Red leather shoe"])
+        self.assertEqual(self.labels(index, "red lea"), ["Red leather shoe"])
+        self.assertEqual(self.labels(index, "bag lea"), ["Leather bag"])
+        self.assertEqual(self.labels(index, "blue lea"), [])
+        self.assertEqual(self.labels(index, "x"), [])
+
+    def test_ranking(self):
+        index = self.index(
+            ("p:1", "Shirt", "product", 5),
+            ("p:2", "Shorts", "product", 50),
+            ("p:3", "Short dress", "product", 50),
+            ("c:1", "Shoes", "category", 0),
+        )
+        # Categories first, then best sellers, then shorter labels
+        self.assertEqual(self.labels(index, "sh"), ["Shoes", "Shorts", "Short dress", "Shirt"])
+
+    def test_best_seller_survives_a_crowded_prefix(self):
+        entries = [(f"p:{n}", f"Sock {n:04d}", "product", 0) for n in range(500)]
+        index = self.index(*entries, ("p:best", "Zebra sock", "product", 99))
+        self.assertEqual(self.labels(index, "s", limit=1), ["Zebra sock"])
+        self.assertEqual(self.labels(index, "z", limit=1), ["Zebra sock"])
+
+    def test_update_and_remove_rerank(self):
+        entries = [(f"p:{n}", f"Sock {n:02d}", "product", n) for n in range(30)]
+        index = self.index(*entries)
+        self.assertEqual(self.labels(index, "so", limit=1), ["Sock 29"])
+
+        index.add("p:0", "Sock 00", "product", "/p:0/", 100)
+        self.assertEqual(self.labels(index, "so", limit=1), ["Sock 00"])
+
+        # Removing from a full top list falls back to the entries it had left out
+        for n in (0, 29, 28):
+            index.remove(f"p:{n}")
+        self.assertEqual(self.labels(index, "so", limit=20), [f"Sock {n:02d}" for n in range(27, 7, -1)])
+
+        index.add("p:27", "Boot 27", "product", "/p:27/", 27)
+        self.assertEqual(self.labels(index, "so", limit=1), ["Sock 26"])
+        self.assertEqual(self.labels(index, "boo"), ["Boot 27"])
+        index.remove("p:27")
+        self.assertIsNone(index._node("b"))
+
+    def test_stale_index_is_served_while_rebuilding(self):
+        stale = autocomplete.SuggestionIndex()
+        stale.built_at = time.time() - autocomplete.REBUILD_SECONDS - 1
+        fresh = autocomplete.SuggestionIndex()
+        built = threading.Event()
+
+        def build_index():
+            built.wait(5)
+            return fresh
+
+        with mock.patch.object(autocomplete, "_index", stale), \
+                mock.patch.object(autocomplete, "build_index", build_index):
+            self.assertIs(autocomplete.get_index(), stale)
+            self.assertIs(autocomplete.get_index(), stale)  # one rebuild at a time
+            built.set()
+            for _ in range(50):
+                if autocomplete.current_index() is fresh and not autocomplete._rebuilding:
+                    break
+                time.sleep(0.01)
+            self.assertIs(autocomplete.current_index(), fresh)
+            self.assertFalse(autocomplete._rebuilding)
+
+
+class AutocompleteSignalTests(TestCase):
+    """Saves and deletes update this worker's built index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = create_seller("seller")
+        cls.category = Category.objects.create(name="Shoes", is_approved=True)
+
+    def setUp(self):
+        patcher = mock.patch.object(autocomplete, "_index", autocomplete.SuggestionIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def labels(self, query):
+        return [suggestion["label"] for suggestion in autocomplete.current_index().suggest(query)]
+
+    def test_product_save_and_delete(self):
+        product = Product.objects.create(
+            seller=self.seller, category=self.category, name="Red sandal", description="",
+            price=Decimal("10.00"), stock=5,
+        )
+        self.assertEqual(self.labels("san"), [])
+
+        product.is_approved = True
+        product.save()
+        self.assertEqual(self.labels("san"), ["Red sandal"])
+
+        product.name = "Blue sandal"
+        product.save()
+        self.assertEqual(self.labels("red"), [])
+        self.assertEqual(self.labels("san"), ["Blue sandal"])
+
+        product.is_active = False
+        product.save()
+        self.assertEqual(self.labels("san"), [])
+
+        product.is_active = True
+        product.save()
+        product.delete()
+        self.assertEqual(self.labels("san"), [])
+
+    def test_category_approval(self):
+        category = Category.objects.create(name="Sandals")
+        self.assertEqual(self.labels("san"), [])
+        category.is_approved = True
+        category.save()
+        self.assertEqual(self.labels("san"), ["Sandals"])
+        category.delete()
+        self.assertEqual(self.labels("san"), [])
@@ -7,10 +7,12 @@ urlpatterns = [
     # Seller
     path("seller/", views.seller_product_list, name="seller_product_list"),
     path("seller/add/", views.product_create, name="product_create"),
+    path("seller/import/", views.product_import, name="product_import"),
     path("seller/<int:pk>/edit/", views.product_update, name="product_update"),
     path("seller/<int:pk>/delete/", views.product_delete, name="product_delete"),
     path("inventory/", views.inventory, name="inventory"),
     path("reports/", views.seller_reports, name="seller_reports"),
+    path("reports/export/<str:dataset>/", views.seller_reports_export, name="seller_reports_export"),
     path("seller/promotions/", views.seller_promotions, name="seller_promotions"),
 
     # Categories
@@ -27,6 +29,8 @@ urlpatterns = [
 
     # Public
     path("", views.product_list, name="product_list"),
+    path("shop/", views.buyer_product_list, name="buyer_product_list"),
+    path("autocomplete/", views.search_autocomplete, name="search_autocomplete"),
 
     # Product detail (LAST)
     path("<slug:slug>/", views.product_detail, name="product_detail"),
@@ -3,18 +3,19 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.db.models import Sum, F
-from datetime import timedelta
-from django.db.models import Sum, F, FloatField
-from django.db.models.functions import TruncMonth
+from django.http import Http404, JsonResponse
 from django.utils import timezone
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 
 from products.models import Product
-from orders.models import Order, OrderItem
 from users.decorators import seller_required
 from .models import Product, Category, Promotion
+from . import autocomplete, catalog_import, facets
+from .category_cache import get_categories, get_category_by_slug
+from .pagination import paginate_request
+from .pricing import resolve_prices
+from .search import SEARCH_ORDERING, search_products
 from .forms import (
     ProductForm,
     ProductImageFormSet,
@@ -23,26 +24,34 @@ from .forms import (
 )
 # from orders.models import OrderItem  # Uncomment if you have this app
 
+# Keyset order for catalog pages: newest first, id breaks ties
+CATALOG_ORDERING = ("-created_at", "-id")
+
 
 # =======================
 # PUBLIC VIEWS
 # =======================
 
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
 from .models import Product, Category
 
 # (Duplicate imports kept as-is — harmless but can be cleaned later)
 
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
 from .models import Product, Category
 
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
 from products.models import Product, Category
 
 
+def _approved_category_or_404(slug):
+    """Approved category from the category cache (no query when warm)"""
+    category = get_category_by_slug(slug)
+    if category is None:
+        raise Http404("No such category")
+    return category
+
+
 def product_list(request):
     category_slug = request.GET.get("category")
     query = request.GET.get("q")
@@ -56,26 +65,29 @@ def product_list(request):
         "seller"
     ).prefetch_related(
         "images"
-    ).order_by("-created_at")
+    )
 
     selected_category = None
 
     # Filter by category
     if category_slug:
-        selected_category = get_object_or_404(Category, slug=category_slug, is_approved=True)
-        products = products.filter(category=selected_category)
+        selected_category = _approved_category_or_404(category_slug)
+        products = products.filter(category_id=selected_category.id)
 
-    # Search in name or description
+    # Full-text search (name, description, category, shop), ranked by relevance
+    ordering = CATALOG_ORDERING
     if query:
-        products = products.filter(
-            Q(name__icontains=query) | Q(description__icontains=query)
-        )
+        products = search_products(products, query)
+        ordering = SEARCH_ORDERING
 
     # Categories for sidebar (only approved ones)
-    categories = Category.objects.filter(is_approved=True).order_by("name")
+    categories = get_categories()
+
+    page_obj = paginate_request(request, products, ordering)
 
     context = {
-        "products": products,
+        "products": resolve_prices(page_obj.object_list),
+        "page_obj": page_obj,
         "categories": categories,
         "selected_category": selected_category,
         "search_query": query,
@@ -84,6 +96,8 @@ def product_list(request):
     return render(request, "products/product_list.html", context)
 
 
+from decimal import Decimal, InvalidOperation
+
 from django.shortcuts import render, get_object_or_404
 from django.db.models import Prefetch
 from .models import Category, Product, ProductImage  # Adjust if ProductImage is in a different app
@@ -94,28 +108,26 @@ def category_detail(request, slug):
     Display all approved and active products in a specific category.
     Only shows approved categories to buyers.
     """
-    category = get_object_or_404(
-        Category,
-        slug=slug,
-        is_approved=True
-    )
+    category = _approved_category_or_404(slug)
 
     products = (
         Product.objects.filter(
-            category=category,
+            category_id=category.id,
             is_active=True,
             is_approved=True
         )
         .select_related("seller")
-        .prefetch_related("images")  # Loads all images efficiently
-        .order_by("-created_at")
+        .prefetch_related("images")  # Images for the current page only
     )
 
-    categories = Category.objects.filter(is_approved=True).order_by("name")
+    page_obj = paginate_request(request, products, CATALOG_ORDERING, with_count=True)
+
+    categories = get_categories()
 
     context = {
         "category": category,
-        "products": products,
+        "products": resolve_prices(page_obj.object_list),
+        "page_obj": page_obj,
         "categories": categories,
         "page_title": f"{category.name} - Style Bazaar",
     }
@@ -136,13 +148,34 @@ def product_detail(request, slug):
     return render(request, "products/product_detail.html", {"product": product})
 
 
+@require_http_methods(["GET"])
+def search_autocomplete(request):
+    """
+    Type-ahead suggestions for the header search box (JSON).
+    Served from this worker's in-memory index — no database work per keystroke.
+    """
+    query = request.GET.get("q", "").strip()[:100]
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 8)), 20))
+    except ValueError:
+        limit = 8
+
+    data = {
+        "query": query,
+        "suggestions": autocomplete.suggest(query, limit=limit) if query else [],
+    }
+    if request.user.is_staff and request.GET.get("stats"):
+        data["index"] = autocomplete.get_index().stats()
+    return JsonResponse(data)
+
+
 # =======================
 # CATEGORY LIST (PUBLIC + STAFF MANAGEMENT)
 # =======================
 
 def category_list(request):
     # Public sees only approved categories
-    categories = Category.objects.filter(is_approved=True).order_by("name")
+    categories = get_categories()
 
     form = None
     if request.user.is_staff:
@@ -223,6 +256,47 @@ def product_create(request):
     })
 
 
+IMPORT_ERRORS_SHOWN = 200
+
+
+@login_required
+@seller_required
+def product_import(request):
+    """Bulk-create products from an uploaded CSV / JSON file (products.catalog_import)"""
+    result = None
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        if not upload:
+            messages.error(request, "Choose a CSV or JSON file to import.")
+        else:
+            try:
+                result = catalog_import.import_file(
+                    request.user,
+                    upload,
+                    catalog_import.guess_format(upload.name),
+                    dry_run=bool(request.POST.get("dry_run")),
+                )
+            except catalog_import.CatalogImportError as exc:
+                messages.error(request, str(exc))
+            else:
+                if result.created:
+                    messages.success(request, f"{result.created} product(s) imported and submitted for approval!")
+                if result.stopped_at:
+                    messages.warning(
+                        request,
+                        f"The file could not be read past row {result.stopped_at}. Rows before it were "
+                        f"{'checked' if result.dry_run else 'imported'}; fix the file and upload only the rows from "
+                        f"{result.stopped_at} on.",
+                    )
+
+    return render(request, "products/product_import.html", {
+        "result": result,
+        "errors": result.errors[:IMPORT_ERRORS_SHOWN] if result else [],
+        "columns": catalog_import.COLUMNS,
+        "title": "Import Products",
+    })
+
+
 @login_required
 @seller_required
 def product_update(request, pk):
@@ -262,29 +336,21 @@ def inventory(request):
 
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Count, F, FloatField
-from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from datetime import timedelta
 
 from products.models import Product
-from orders.models import OrderItem, Order
 from users.decorators import seller_required
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Count, F, FloatField
-from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from datetime import timedelta
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, F, FloatField, Max
-from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from products.models import Product
-from orders.models import OrderItem, Order
+from orders import exports, rollups
+from core import timeseries
 from users.decorators import seller_required
 
 
@@ -292,7 +358,6 @@ from users.decorators import seller_required
 @seller_required
 def seller_reports(request):
     seller = request.user
-    now = timezone.now()
 
     # -----------------------------
     # Date Range Filtering (FIXED & SAFE)
@@ -317,18 +382,9 @@ def seller_reports(request):
         except ValueError:
             end_date = None
 
-    # Base queryset
-    base_qs = OrderItem.objects.filter(
-        product__seller=seller,
-        order__is_paid=True
-    )
-
-    if start_date:
-        base_qs = base_qs.filter(order__created_at__gte=start_date)
-    if end_date:
-        base_qs = base_qs.filter(order__created_at__lte=end_date)
-
-    transactions = base_qs.select_related('order', 'product').prefetch_related('product__images')
+    # Sales come from the daily rollups (orders.rollups), by local date
+    start_day = start_date.date() if start_date else None
+    end_day = end_date.date() if end_date else None
 
     # -----------------------------
     # Basic Stats
@@ -339,39 +395,19 @@ def seller_reports(request):
         is_approved=True
     ).count()
 
-    revenue_agg = transactions.aggregate(
-        total_revenue=Sum(F('price') * F('quantity'), output_field=FloatField())
-    )
-    total_revenue = revenue_agg['total_revenue'] or 0.0
-
-    paid_orders_qs = Order.objects.filter(
-        items__product__seller=seller,
-        is_paid=True
-    )
-    if start_date:
-        paid_orders_qs = paid_orders_qs.filter(created_at__gte=start_date)
-    if end_date:
-        paid_orders_qs = paid_orders_qs.filter(created_at__lte=end_date)
-    paid_orders_count = paid_orders_qs.distinct().count()
+    totals = rollups.seller_totals(seller, start_day, end_day)
+    total_revenue = float(totals['revenue'])
+    paid_orders_count = totals['orders']
 
     average_order_value = total_revenue / paid_orders_count if paid_orders_count > 0 else 0.0
 
     # -----------------------------
     # Product Sales Summary
     # -----------------------------
-    product_sales = (
-        transactions
-        .values('product__id', 'product__name')
-        .annotate(
-            total_quantity=Sum('quantity'),
-            total_revenue=Sum(F('price') * F('quantity'), output_field=FloatField()),
-            last_sale_date=Max('order__created_at')
-        )
-        .order_by('-total_revenue')
-    )
+    product_sales = list(rollups.product_totals(seller, start_day, end_day))
 
     # Preload product images efficiently
-    product_ids = [item['product__id'] for item in product_sales if item['product__id']]
+    product_ids = [item['product_id'] for item in product_sales]
     product_map = {}
     if product_ids:
         products_with_images = Product.objects.filter(id__in=product_ids).prefetch_related('images')
@@ -379,63 +415,31 @@ def seller_reports(request):
 
     sales = []
     for item in product_sales:
-        product = product_map.get(item['product__id'])
-        main_image = product.images.first().image.url if product and product.images.exists() else None
+        product = product_map.get(item['product_id'])
+        images = product.images.all()[:1] if product else []  # from the prefetch, no query
+        main_image = images[0].image.url if images else None
 
-        percentage = (item['total_revenue'] / total_revenue * 100) if total_revenue > 0 else 0
+        item_revenue = float(item['revenue'])
+        percentage = (item_revenue / total_revenue * 100) if total_revenue > 0 else 0
 
         sales.append({
             'product__name': item['product__name'],
             'product_main_image': main_image,
-            'total_quantity': item['total_quantity'],
-            'total_revenue': item['total_revenue'],
+            'total_quantity': item['units'],
+            'total_revenue': item_revenue,
             'percentage': round(percentage, 1),
-            'last_sale_date': item['last_sale_date'],
+            'last_sale_date': item['last_sale_at'],
         })
 
     # -----------------------------
     # Monthly Revenue Trend (Last 12 months or filtered range)
     # -----------------------------
-    # Determine chart start: use filter start_date, otherwise go back ~12 months
-    if start_date:
-        chart_start_dt = start_date
-    else:
-        # Approximate 12 months ago
-        approximate_year_ago = now - timedelta(days=365)
-        chart_start_dt = approximate_year_ago.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    # Ensure timezone-aware
-    if timezone.is_naive(chart_start_dt):
-        chart_start_dt = timezone.make_aware(chart_start_dt)
-
-    monthly_qs = (
-        transactions
-        .annotate(month=TruncMonth('order__created_at'))
-        .values('month')
-        .annotate(revenue=Sum(F('price') * F('quantity'), output_field=FloatField()))
-        .filter(month__gte=chart_start_dt)
-        .order_by('month')
+    chart_start = start_day or timeseries.last_months(12)
+    monthly_labels, monthly_revenue = timeseries.monthly_series(
+        rollups.monthly_revenue(seller, timeseries.month_start(chart_start), end_day),
+        chart_start,
     )
 
-    monthly_map = {
-        item['month'].strftime('%b %Y'): float(item['revenue'] or 0)
-        for item in monthly_qs
-    }
-
-    monthly_labels = []
-    monthly_revenue = []
-
-    current = chart_start_dt.replace(day=1)
-    while current <= now:
-        label = current.strftime('%b %Y')
-        monthly_labels.append(label)
-        monthly_revenue.append(monthly_map.get(label, 0.0))
-
-        # Move to next month
-        next_month = current.month % 12 + 1
-        next_year = current.year + (current.month // 12)
-        current = current.replace(year=next_year, month=next_month, day=1)
-
     # -----------------------------
     # Top 10 Products for Chart
     # -----------------------------
@@ -462,6 +466,21 @@ def seller_reports(request):
     }
 
     return render(request, 'products/seller_reports.html', context)
+
+
+@login_required
+@seller_required
+def seller_reports_export(request, dataset):
+    """Download sales lines or per-product totals (?format=csv|xlsx, same date range as the report)"""
+    if dataset not in ("transactions", "products"):
+        raise Http404
+    start, end = exports.date_range(request.GET)
+    file_format = request.GET.get("format", "csv")
+    if file_format not in exports.FORMATS:
+        raise Http404
+    return exports.export_response(dataset, request.user, start, end, file_format)
+
+
 @login_required
 @seller_required
 def seller_promotions(request):
@@ -657,48 +676,90 @@ def category_delete(request, pk):
 # =======================
 # BUYER-FACING PRODUCT LIST (Public Shopping View)
 # =======================
+BUYER_SORT_OPTIONS = {
+    "relevance": SEARCH_ORDERING,
+    "newest": CATALOG_ORDERING,
+    "price_asc": ("effective_price", "id"),
+    "price_desc": ("-effective_price", "-id"),
+}
+
+
+def _parse_price(value):
+    """Return a non-negative Decimal from a query param, or None if blank/invalid"""
+    if not value:
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
 def buyer_product_list(request):
     """
     Dedicated product list for buyers — clean, grid layout, with search and category filters.
     Only shows active and approved products.
+    Price filters and sorting use the stored effective (sale) price column.
+    Sidebar facets (category, price bucket, on sale, in stock) come with counts
+    from one cached aggregate query — see products.facets.
     """
     category_slug = request.GET.get("category")
     query = request.GET.get("q")
     min_price = request.GET.get("min_price")
     max_price = request.GET.get("max_price")
+    sort = request.GET.get("sort")
 
     # Base queryset: only visible products
     products = Product.objects.filter(
         is_active=True,
         is_approved=True
-    ).select_related("category", "seller").prefetch_related("images").order_by("-created_at")
+    )
 
     selected_category = None
-
-    # Category filter
     if category_slug:
-        selected_category = get_object_or_404(Category, slug=category_slug, is_approved=True)
-        products = products.filter(category=selected_category)
+        selected_category = _approved_category_or_404(category_slug)
 
-    # Search filter
+    # Search filter (ranked full-text search)
     if query:
-        products = products.filter(name__icontains=query)
+        products = search_products(products, query)
+
+    # Price range filter (on what the buyer actually pays)
+    min_value = _parse_price(min_price)
+    max_value = _parse_price(max_price)
+    if min_value is not None:
+        products = products.filter(effective_price__gte=min_value)
+    if max_value is not None:
+        products = products.filter(effective_price__lte=max_value)
+
+    # Facets: counts use everything above, each facet ignoring its own filter
+    selected = facets.parse_selection(request.GET, selected_category)
+    signature = facets.filter_signature(
+        q=(query or "").strip().lower(),
+        min_price=min_value,
+        max_price=max_value,
+        **selected,
+    )
+    counts = facets.facet_counts(products, selected, signature)
+    products = facets.apply_facets(products, selected)
 
-    # Price range filter
-    if min_price:
-        products = products.filter(price__gte=min_price)
-    if max_price:
-        products = products.filter(price__lte=max_price)
+    if sort == "relevance" and not query:
+        sort = "newest"
+    if sort not in BUYER_SORT_OPTIONS:
+        sort = "relevance" if query else "newest"
+    products = products.select_related("category", "seller").prefetch_related("images")
+    page_obj = paginate_request(request, products, BUYER_SORT_OPTIONS[sort])
 
     # Get all categories for sidebar/filter
-    categories = Category.objects.filter(is_approved=True).order_by("name")
+    categories = get_categories()
 
     context = {
-        "products": products,
+        "products": resolve_prices(page_obj.object_list),
+        "page_obj": page_obj,
         "categories": categories,
+        "facets": facets.build_facets(request, categories, counts, selected),
         "selected_category": selected_category,
         "search_query": query,
         "min_price": min_price,
         "max_price": max_price,
+        "sort": sort,
     }
-    return render(request, "products/buyer_product_list.html", context)
\ No newline at end of file
+    return render(request, "products/buyer_product_list.html", context)
@@ -93,6 +93,7 @@ TEMPLATES = [
                 "products.context_processors.categories_processor",
                 "cart.context_processors.cart",
                 "orders.context_processors.seller_notifications",
+                "users.context_processors.notifications",
             ],
         },
     },
@@ -114,6 +115,28 @@ DATABASES = {
     }
 }
 
+# --------------------------------------------------
+# CACHE (Redis via REDIS_URL, shared by every worker)
+# --------------------------------------------------
+# Without REDIS_URL each process gets its own LocMemCache: deletes and
+# version bumps only reach that process, so cached data uses short TTLs.
+REDIS_URL = os.environ.get("REDIS_URL", "")
+CACHE_IS_SHARED = bool(REDIS_URL)
+
+if CACHE_IS_SHARED:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # --------------------------------------------------
 # AUTHENTICATION
 # --------------------------------------------------
@@ -166,6 +189,20 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 STRIPE_PUBLIC_KEY = os.environ.get("STRIPE_PUBLIC_KEY", "")
 STRIPE_SECRET_KEY = os.environ.get("STRIPE_SECRET_KEY", "")
 
+# --------------------------------------------------
+# PAYMENT GATEWAYS
+# --------------------------------------------------
+# Provider API base URLs (point them at `manage.py run_fake_providers` locally).
+# Mobile money credentials live on the MobileMoneyProvider rows.
+PAYMENT_GATEWAY_URLS = {
+    "airtel": os.environ.get("AIRTEL_API_URL", "https://openapi.airtel.africa"),
+    "mtn": os.environ.get("MTN_MOMO_API_URL", "https://proxy.momoapi.mtn.com"),
+    "zamtel": os.environ.get("ZAMTEL_API_URL", ""),
+    "stripe": os.environ.get("STRIPE_API_URL", "https://api.stripe.com"),
+}
+MTN_MOMO_SUBSCRIPTION_KEY = os.environ.get("MTN_MOMO_SUBSCRIPTION_KEY", "")
+MTN_MOMO_ENVIRONMENT = os.environ.get("MTN_MOMO_ENVIRONMENT", "mtnzambia")
+
 # --------------------------------------------------
 # EMAIL CONFIGURATION
 # --------------------------------------------------
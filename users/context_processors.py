@@ -0,0 +1,10 @@
+from functools import partial
+
+from . import inbox
+
+
+def notifications(request):
+    # Called by the template only where the badge is rendered (one cache read)
+    if request.user.is_authenticated:
+        return {"unread_notifications": partial(inbox.unread_count, request.user.pk)}
+    return {}
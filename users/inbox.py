@@ -0,0 +1,82 @@
+# users/inbox.py
+"""
+Notification inbox helpers: the cached per-user unread counter.
+
+The count lives in the Django cache and is kept current by the events
+that change it — a new notification bumps it (users.signals), marking
+read lowers it. Bulk writes that skip signals (broadcasts) drop the
+affected users' counters instead, and the next read recounts with one
+indexed COUNT. Counters also expire after UNREAD_CACHE_SECONDS, so any
+drift heals itself. Bumps and drops only reach other workers through a
+shared cache (settings.CACHE_IS_SHARED); without one the counters expire
+after 30 seconds instead of five minutes.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Notification
+
+
+UNREAD_CACHE_SECONDS = getattr(
+    settings, "NOTIFICATION_UNREAD_CACHE_SECONDS", 5 * 60 if getattr(settings, "CACHE_IS_SHARED", False) else 30
+)
+POLL_LIMIT = 50
+
+
+def _key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user_id):
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(_key(user_id), count, UNREAD_CACHE_SECONDS)
+    return max(count, 0)
+
+
+def bump(user_id, delta=1):
+    """Adjust a cached counter; nothing to do if it isn't cached (next read counts)"""
+    try:
+        cache.incr(_key(user_id), delta)
+    except ValueError:
+        pass
+
+
+def invalidate(user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+def mark_read(user_id, notification_ids):
+    """Mark the given notifications read (one UPDATE) and lower the counter"""
+    updated = Notification.objects.filter(
+        user_id=user_id, id__in=list(notification_ids), is_read=False
+    ).update(is_read=True, read_at=timezone.now())
+    if updated:
+        bump(user_id, -updated)
+    return updated
+
+
+def serialize(notification):
+    return {
+        "id": notification.id,
+        "type": notification.notification_type,
+        "title": notification.title,
+        "message": notification.message,
+        "icon": notification.get_icon(),
+        "created_at": notification.created_at.isoformat(),
+        "is_read": notification.is_read,
+        "link": notification.link,
+        "order_id": notification.order_id,
+    }
+
+
+def since(user_id, last_id, limit=POLL_LIMIT):
+    """Notifications newer than `last_id`, oldest first"""
+    return list(
+        Notification.objects
+        .filter(user_id=user_id, id__gt=last_id)
+        .order_by("id")[:limit]
+    )
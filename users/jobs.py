@@ -0,0 +1,83 @@
+# users/jobs.py
+"""Background job handlers for users (run by `manage.py run_jobs`)."""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import jobs
+from orders.models import Order
+
+from . import inbox
+from .models import Notification, NotificationBroadcast
+
+
+BATCH_SIZE = getattr(settings, "BROADCAST_BATCH_SIZE", 1000)
+
+
+def recipient_ids(seller_id, after=0):
+    """Ids of buyers with a paid order containing the seller's products, in id order"""
+    paid_buyers = Order.objects.filter(is_paid=True, items__product__seller_id=seller_id).values("buyer_id")
+    return (
+        get_user_model().objects
+        .filter(id__in=paid_buyers, id__gt=after)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def _write_batch(broadcast, user_ids, now):
+    # Each batch commits on its own: short write locks, and progress that survives a crash
+    with transaction.atomic():
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                sender_id=broadcast.sender_id,
+                title=broadcast.title,
+                message=broadcast.message,
+                notification_type=broadcast.notification_type,
+                created_at=now,
+            )
+            for user_id in user_ids
+        ])
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+            sent_count=F("sent_count") + len(user_ids),
+            last_user_id=user_ids[-1],
+        )
+    inbox.invalidate(user_ids)  # their unread counters are stale now
+
+
+def send_broadcast(broadcast_id, batch_size=BATCH_SIZE):
+    """Stream the recipients and write their notifications `batch_size` at a time"""
+    broadcast = NotificationBroadcast.objects.get(pk=broadcast_id)
+    if broadcast.status == NotificationBroadcast.DONE:
+        return
+    NotificationBroadcast.objects.filter(pk=broadcast.pk).update(status=NotificationBroadcast.SENDING)
+
+    now = timezone.now()
+    batch = []
+    for user_id in recipient_ids(broadcast.sender_id, after=broadcast.last_user_id).iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) == batch_size:
+            _write_batch(broadcast, batch, now)
+            batch = []
+    if batch:
+        _write_batch(broadcast, batch, now)
+
+    NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+        status=NotificationBroadcast.DONE, finished_at=timezone.now()
+    )
+
+
+@jobs.handler("broadcast")
+def send_broadcasts(payloads):
+    errors = []
+    for payload in payloads:
+        try:
+            send_broadcast(payload["broadcast_id"])
+            errors.append(None)
+        except Exception as exc:
+            errors.append(exc)
+    return errors
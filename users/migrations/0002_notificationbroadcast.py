@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationBroadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('notification_type', models.CharField(choices=[('order', 'Order Update'), ('message', 'Direct Message'), ('promotion', 'Promotion'), ('review', 'Review & Rating'), ('system', 'System Alert'), ('product', 'Product Update')], default='promotion', max_length=20)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('done', 'Sent')], default='queued', max_length=10)),
+                ('total_recipients', models.PositiveIntegerField(default=0, help_text='Buyer count when the broadcast was queued')),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('last_user_id', models.BigIntegerField(default=0, help_text='Recipients are written in id order; resume after this one')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcasts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['sender', '-created_at'], name='users_notif_sender__513555_idx')],
+            },
+        ),
+    ]
@@ -97,6 +97,13 @@ class SellerProfile(models.Model):
     shop_description = models.TextField(blank=True)
     is_approved = models.BooleanField(default=False)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        profile = super().from_db(db, field_names, values)
+        if "shop_name" in field_names:
+            profile._loaded_shop_name = values[field_names.index("shop_name")]
+        return profile
+
     def __str__(self):
         return f"Seller: {self.shop_name} ({self.user.username})"
 
@@ -323,9 +330,11 @@ class Notification(models.Model):
     def mark_as_read(self):
         """Mark notification as read with timestamp"""
         if not self.is_read:
-            self.is_read = True
-            self.read_at = timezone.now()
-            self.save(update_fields=['is_read', 'read_at'])
+            from .inbox import mark_read
+
+            if mark_read(self.user_id, [self.pk]):
+                self.is_read = True
+                self.read_at = timezone.now()
 
     def get_icon(self):
         """Return a suitable emoji/icon based on type"""
@@ -337,4 +346,57 @@ class Notification(models.Model):
             'system': "⚙️",
             'product': "🛍️",
         }
-        return icons.get(self.notification_type, "🔔")
\ No newline at end of file
+        return icons.get(self.notification_type, "🔔")
+
+# ========================
+# NOTIFICATION BROADCASTS
+# ========================
+class NotificationBroadcast(models.Model):
+    """
+    A seller's message to all of their buyers. The view only records it;
+    the `broadcast` job (users.jobs) writes the Notification rows in
+    batches and keeps `sent_count` / `last_user_id` up to date, so progress
+    is visible and an interrupted run resumes where it stopped.
+    """
+
+    QUEUED = "queued"
+    SENDING = "sending"
+    DONE = "done"
+
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (SENDING, "Sending"),
+        (DONE, "Sent"),
+    ]
+
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='broadcasts'
+    )
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=20, choices=Notification.TYPE_CHOICES, default='promotion')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    total_recipients = models.PositiveIntegerField(default=0, help_text="Buyer count when the broadcast was queued")
+    sent_count = models.PositiveIntegerField(default=0)
+    last_user_id = models.BigIntegerField(default=0, help_text="Recipients are written in id order; resume after this one")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['sender', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.sender}, {self.sent_count}/{self.total_recipients})"
+
+    @property
+    def progress_percent(self):
+        if self.status == self.DONE or not self.total_recipients:
+            return 100 if self.status == self.DONE else 0
+        return min(int(self.sent_count * 100 / self.total_recipients), 99)
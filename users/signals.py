@@ -9,3 +9,41 @@ def create_user_profile(sender, instance, created, **kwargs):
             BuyerProfile.objects.create(user=instance)
         elif instance.role == 'seller':
             SellerProfile.objects.create(user=instance)
+
+
+# Cached unread counters (users.inbox)
+from django.db.models.signals import post_delete
+from .models import Notification
+from . import inbox
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not instance.is_read:
+        inbox.bump(instance.user_id)
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        inbox.bump(instance.user_id, -1)
+
+
+# Cached buyer dashboard numbers (users.stats)
+from orders.models import Order, OrderItem
+from .models import Wishlist
+from . import stats
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Wishlist)
+@receiver(post_delete, sender=Wishlist)
+def drop_buyer_stats(sender, instance, **kwargs):
+    stats.invalidate(instance.buyer_id if sender is Order else instance.user_id)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def drop_buyer_stats_for_item(sender, instance, **kwargs):
+    stats.invalidate(instance.order.buyer_id)
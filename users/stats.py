@@ -0,0 +1,77 @@
+# users/stats.py
+"""
+Per-buyer dashboard numbers: one query, cached per user.
+
+buyer_stats() reads the order counts, the amount spent and the wishlist
+size in a single round-trip: conditional aggregates over the buyer's
+orders (using their stored totals) plus a wishlist COUNT subquery. The
+result is cached until one of the buyer's orders or wishlist items changes
+(users.signals) and expires after STATS_CACHE_SECONDS, so it also rolls
+over at the start of a month.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core import timeseries
+
+from .models import Wishlist
+
+
+STATS_CACHE_SECONDS = getattr(settings, "BUYER_STATS_CACHE_SECONDS", 5 * 60)
+CLOSED_STATUSES = ("delivered", "cancelled")
+
+
+def _key(user_id):
+    return f"users:buyer-stats:{user_id}"
+
+
+def _money(expression):
+    return Coalesce(expression, Value(0), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def compute_buyer_stats(user_id):
+    """The uncached numbers (one query)"""
+    month_start = timeseries.aware_start(timeseries.month_start(timezone.localdate()))
+    paid = Q(orders__is_paid=True)
+    wishlist_count = (
+        Wishlist.objects
+        .filter(user=OuterRef("pk"))
+        .order_by()
+        .values("user")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    stats = (
+        get_user_model().objects
+        .filter(pk=user_id)
+        .annotate(
+            active_orders=Count("orders", filter=paid & ~Q(orders__status__in=CLOSED_STATUSES)),
+            delivered_this_month=Count(
+                "orders", filter=paid & Q(orders__status="delivered", orders__paid_at__gte=month_start)
+            ),
+            items_total=_money(Sum("orders__items_total", filter=paid)),
+            delivery_total=_money(Sum("orders__delivery_price", filter=paid)),
+            wishlist_count=Coalesce(Subquery(wishlist_count), 0),
+        )
+        .values("active_orders", "delivered_this_month", "items_total", "delivery_total", "wishlist_count")
+        .get()
+    )
+    stats["total_spent"] = stats["items_total"] + stats["delivery_total"]
+    return stats
+
+
+def buyer_stats(user_id):
+    stats = cache.get(_key(user_id))
+    if stats is None:
+        stats = compute_buyer_stats(user_id)
+        cache.set(_key(user_id), stats, STATS_CACHE_SECONDS)
+    return stats
+
+
+def invalidate(user_id):
+    cache.delete(_key(user_id))
@@ -1,3 +1,85 @@
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+
+from . import stats
+from .models import User, Wishlist
+
+
+class BuyerStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create: no profile signals, just the users
+        User.objects.bulk_create([
+            User(username="buyer", email="buyer@example.com", role="buyer"),
+            User(username="seller", email="seller@example.com", role="seller"),
+        ])
+        cls.buyer = User.objects.get(username="buyer")
+        category = Category.objects.create(name="Shoes", is_approved=True)
+        cls.product = Product.objects.create(
+            seller=User.objects.get(username="seller"),
+            category=category,
+            name="Red shoe",
+            description="",
+            price=Decimal("100.00"),
+            stock=10,
+            is_approved=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def order(self, **fields):
+        fields = {"is_paid": True, "paid_at": timezone.now(), "items_total": Decimal("100.00"), **fields}
+        return Order.objects.create(
+            buyer=self.buyer, full_name="Buyer", email="buyer@example.com", address="Lusaka", **fields
+        )
+
+    def assertInvalidated(self):
+        self.assertIsNone(cache.get(stats._key(self.buyer.pk)))
+
+    def test_one_query(self):
+        self.order(status="processing")
+        self.order(status="delivered", delivery_price=Decimal("20.00"))
+        self.order(is_paid=False, paid_at=None)
+        Wishlist.objects.create(user=self.buyer, product=self.product)
+
+        with self.assertNumQueries(1):
+            numbers = stats.compute_buyer_stats(self.buyer.pk)
+
+        self.assertEqual(numbers["active_orders"], 1)
+        self.assertEqual(numbers["delivered_this_month"], 1)
+        self.assertEqual(numbers["total_spent"], Decimal("220.00"))
+        self.assertEqual(numbers["wishlist_count"], 1)
+
+    def test_cached(self):
+        stats.buyer_stats(self.buyer.pk)
+        with self.assertNumQueries(0):
+            stats.buyer_stats(self.buyer.pk)
+
+    def test_order_save_invalidates(self):
+        stats.buyer_stats(self.buyer.pk)
+        self.order(status="processing")
+        self.assertInvalidated()
+        self.assertEqual(stats.buyer_stats(self.buyer.pk)["active_orders"], 1)
+
+    def test_order_item_save_invalidates(self):
+        order = self.order(status="processing")
+        stats.buyer_stats(self.buyer.pk)
+        OrderItem.objects.create(order=order, product=self.product, price=Decimal("100.00"), quantity=1)
+        self.assertInvalidated()
+
+    def test_wishlist_save_invalidates(self):
+        stats.buyer_stats(self.buyer.pk)
+        item = Wishlist.objects.create(user=self.buyer, product=self.product)
+        self.assertInvalidated()
+        self.assertEqual(stats.buyer_stats(self.buyer.pk)["wishlist_count"], 1)
 
-# Create your tests here.
+        item.delete()
+        self.assertInvalidated()
+        self.assertEqual(stats.buyer_stats(self.buyer.pk)["wishlist_count"], 0)
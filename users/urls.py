@@ -25,8 +25,10 @@ urlpatterns = [
     path('addresses/delete/<int:address_id>/', views.delete_address, name='delete_address'),
     path('addresses/default/<int:address_id>/', views.set_default_address, name='set_default_address'),
     path('notifications/', views.notifications_view, name='notifications'),
+    path('notifications/poll/', views.notifications_poll, name='notifications_poll'),
     path('support/', views.support_view, name='support'),
     path("seller/payouts/", views.seller_payouts, name="seller_payouts"),
+    path("seller/payouts/export/", views.seller_payouts_export, name="seller_payouts_export"),
     
 
 path('password-reset/', auth_views.PasswordResetView.as_view(
@@ -9,8 +9,10 @@ from django.utils import timezone
 from .forms import UserRegistrationForm, ProfileForm, AddressForm
 from .models import Profile, Address, Wishlist
 from .decorators import buyer_required, seller_required
+from .stats import buyer_stats
 from orders.models import Order, OrderItem
 from products.models import Product
+from products.pricing import resolve_prices
 from users.models import Review  # Import moved here to avoid potential circular import issues
 from django.db.models import Avg
 from django.db.models import Sum, Avg, Count, F, Q
@@ -158,40 +160,13 @@ def profile_edit(request):
 @login_required
 @buyer_required
 def buyer_dashboard(request):
-    user = request.user
-    now = timezone.now()
-    this_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    active_orders_count = user.orders.filter(
-        is_paid=True
-    ).exclude(
-        status__in=['delivered', 'cancelled']
-    ).count()
-
-    delivered_this_month = user.orders.filter(
-        is_paid=True,
-        status='delivered',
-        paid_at__gte=this_month_start
-    ).count()
-
-    wishlist_count = Wishlist.objects.filter(user=user).count()
-
-    items_total = OrderItem.objects.filter(
-        order__buyer=user,
-        order__is_paid=True
-    ).aggregate(total=Sum(F('price') * F('quantity')))['total'] or 0
-
-    delivery_total = user.orders.filter(is_paid=True).aggregate(
-        total=Sum('delivery_price')
-    )['total'] or 0
-
-    total_spent_zmw = items_total + delivery_total
+    stats = buyer_stats(request.user.pk)
 
     context = {
-        'active_orders_count': active_orders_count,
-        'delivered_this_month': delivered_this_month,
-        'wishlist_count': wishlist_count,
-        'total_spent_zmw': total_spent_zmw,
+        'active_orders_count': stats['active_orders'],
+        'delivered_this_month': stats['delivered_this_month'],
+        'wishlist_count': stats['wishlist_count'],
+        'total_spent_zmw': stats['total_spent'],
     }
 
     return render(request, "users/buyer_dashboard.html", context)
@@ -213,6 +188,7 @@ from django.shortcuts import render
 
 from products.models import Product
 from orders.models import Order, OrderItem
+from orders import exports, rollups
 from .models import Review
 from users.models import User
 from users.decorators import seller_required
@@ -223,11 +199,6 @@ from users.decorators import seller_required
 def seller_dashboard(request):
     seller = request.user
     now = timezone.now()
-    
-    # Start of current month (timezone-aware)
-    current_month_start = now.replace(
-        day=1, hour=0, minute=0, second=0, microsecond=0
-    )
 
     # ─────────────────────────────────────────────────────────────
     # PRODUCT STATISTICS
@@ -243,34 +214,26 @@ def seller_dashboard(request):
     # ─────────────────────────────────────────────────────────────
     # ORDER & REVENUE STATISTICS
     # ─────────────────────────────────────────────────────────────
+    # Orders containing this seller's products (semi-join, no DISTINCT)
+    seller_orders = Order.objects.filter(
+        id__in=OrderItem.objects.filter(product__seller=seller).values('order_id')
+    )
+
     # Pending / Action-required orders
-    pending_orders = Order.objects.filter(
-        items__product__seller=seller,
+    pending_orders = seller_orders.filter(
         is_paid=True,
         status__in=['confirmed', 'processing', 'shipped']
-    ).distinct().count()
+    ).count()
 
     # Total orders (all time)
-    total_orders = Order.objects.filter(
-        items__product__seller=seller
-    ).distinct().count()
-
-    # Monthly revenue (current month)
-    monthly_revenue = OrderItem.objects.filter(
-        product__seller=seller,
-        order__is_paid=True,
-        order__created_at__gte=current_month_start
-    ).aggregate(
-        total=Sum(F('price') * F('quantity'))
-    )['total'] or 0
+    total_orders = seller_orders.count()
 
-    # Lifetime total earnings
-    lifetime_earnings = OrderItem.objects.filter(
-        product__seller=seller,
-        order__is_paid=True
-    ).aggregate(
-        total=Sum(F('price') * F('quantity'))
-    )['total'] or 0
+    # Monthly revenue (current month) and lifetime earnings, from the daily rollups
+    sales = rollups.seller_totals(
+        seller, month=rollups.revenue_since(timezone.localdate(now).replace(day=1))
+    )
+    monthly_revenue = sales['month']
+    lifetime_earnings = sales['revenue']
 
     # ─────────────────────────────────────────────────────────────
     # RATINGS & REVIEWS
@@ -301,13 +264,11 @@ def seller_dashboard(request):
     # ─────────────────────────────────────────────────────────────
     # RECENT ORDERS (for quick view / dropdown)
     # ─────────────────────────────────────────────────────────────
-    recent_orders = Order.objects.filter(
-        items__product__seller=seller
-    ).select_related(
+    recent_orders = seller_orders.select_related(
         'buyer'
     ).prefetch_related(
         'items__product'
-    ).distinct().order_by('-created_at')[:10]  # Reduced to 10 for performance
+    ).order_by('-created_at')[:10]  # Reduced to 10 for performance
 
     # ─────────────────────────────────────────────────────────────
     # CONTEXT FOR TEMPLATE
@@ -346,6 +307,7 @@ def wishlist_view(request):
     wishlist_items = Wishlist.objects.filter(user=request.user).select_related(
         'product__seller', 'product__category'
     ).prefetch_related('product__images').order_by('-added_at')
+    resolve_prices([item.product for item in wishlist_items])
     return render(request, 'users/wishlist.html', {'wishlist_items': wishlist_items})
 
 
@@ -432,53 +394,67 @@ def set_default_address(request, address_id):
 # ====================
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.utils import timezone
-from django.db import transaction
+from django.http import Http404, JsonResponse
 
+from products.pagination import paginate_request
+from . import inbox
 from .models import Notification  # Make sure this import is correct
 
+NOTIFICATION_TABS = [('all', 'All'), ('order', 'Orders'), ('message', 'Messages'), ('promotion', 'Promotions')]
+
 
 @login_required
 def notifications_view(request):
     user = request.user
 
-    # Fetch all notifications for the current user, newest first
-    notifications_qs = Notification.objects.filter(user=user).select_related('sender', 'order')
-
-    # Count unread notifications (for potential badge or highlight)
-    unread_count = notifications_qs.filter(is_read=False).count()
-
-    # Mark all as read when the user views the page
-    if unread_count > 0:
-        with transaction.atomic():
-            notifications_qs.filter(is_read=False).update(is_read=True, read_at=timezone.now())
-
-    # Convert queryset to list of dicts for easy template use
-    notifications = [
-        {
-            "id": n.id,
-            "type": n.notification_type,
-            "title": n.title,
-            "message": n.message,
-            "time": n.get_time(),  # Uses your model's method: "2 hours ago"
-            "icon": n.get_icon(),  # Uses your improved model's method
-            "is_read": n.is_read,
-            "link": n.link,  # Optional clickable link
-            "order_id": n.order.id if n.order else None,
-            "sender_username": n.sender.username if n.sender else None,
-        }
-        for n in notifications_qs
-    ]
+    # Newest first, a page at a time — seeks on the (user, -created_at) index
+    notifications_qs = Notification.objects.filter(user=user).select_related('sender')
+    active_type = request.GET.get('type')
+    if active_type in dict(NOTIFICATION_TABS) and active_type != 'all':
+        notifications_qs = notifications_qs.filter(notification_type=active_type)
+    else:
+        active_type = 'all'
+
+    page_obj = paginate_request(request, notifications_qs, ("-created_at", "-id"), with_count=True)
+    notifications = page_obj.object_list
+
+    # Mark what's on this page as read (it still shows as new this time)
+    inbox.mark_read(user.pk, [n.id for n in notifications if not n.is_read])
 
     context = {
         'notifications': notifications,
-        'unread_count': 0,  # Now 0 because we just marked them read
-        'total_notifications': len(notifications),
-        'has_notifications': len(notifications) > 0,
+        'page_obj': page_obj,
+        'active_type': active_type,
+        'notification_tabs': NOTIFICATION_TABS,
+        'unread_count': inbox.unread_count(user.pk),
+        'total_notifications': page_obj.total_count,
+        'has_notifications': bool(notifications),
+        'last_id': max((n.id for n in notifications), default=0),
     }
 
     return render(request, 'users/notifications.html', context)
 
+
+@login_required
+def notifications_poll(request):
+    """
+    New notifications since `?since=<id>` (0 or missing: from the start, so
+    an empty inbox still picks up its first ones) plus the unread count
+    (JSON, for polling). At most inbox.POLL_LIMIT per call; the client
+    continues from `last_id`.
+    """
+    try:
+        last_id = max(int(request.GET.get('since', 0)), 0)
+    except ValueError:
+        last_id = 0
+
+    new = inbox.since(request.user.pk, last_id)
+    return JsonResponse({
+        'notifications': [inbox.serialize(n) for n in new],
+        'unread_count': inbox.unread_count(request.user.pk),
+        'last_id': new[-1].id if new else last_id,
+    })
+
 @login_required
 def support_view(request):
     return render(request, 'users/support.html')
@@ -490,7 +466,7 @@ def support_view(request):
 @login_required
 @seller_required
 def seller_payouts(request):
-    payouts = OrderItem.objects.filter(
+    payouts = list(OrderItem.objects.filter(
         product__seller=request.user,
         order__is_paid=True
     ).values(
@@ -500,11 +476,23 @@ def seller_payouts(request):
         "order__buyer__username"
     ).annotate(
         total_amount=Sum(F("price") * F("quantity"))
-    ).order_by("-order__created_at")
+    ).order_by("-order__created_at"))
 
-    total_earned = payouts.aggregate(total=Sum('total_amount'))['total'] or 0
+    # Every row is listed, so total them here: the total always matches the rows
+    total_earned = sum((payout["total_amount"] for payout in payouts), 0)
 
     return render(request, "users/seller_payouts.html", {
         "payouts": payouts,
         "total_earned": total_earned,
-    })
\ No newline at end of file
+    })
+
+
+@login_required
+@seller_required
+def seller_payouts_export(request):
+    """Download every paid order's payout (?format=csv|xlsx&start_date=&end_date=)"""
+    start, end = exports.date_range(request.GET)
+    file_format = request.GET.get("format", "csv")
+    if file_format not in exports.FORMATS:
+        raise Http404
+    return exports.export_response("payouts", request.user, start, end, file_format)
\ No newline at end of file